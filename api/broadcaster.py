@@ -0,0 +1,345 @@
+# =========================
+# FILE: broadcaster.py
+# =========================
+# Coalescing websocket broadcast stage for the dashboard.
+#
+# Producers (the ZMQ listener, strategy engines) call publish(symbol, msg)
+# as often as they like. Messages are coalesced per (symbol, type) and every
+# BROADCAST_WINDOW_MS the latest state of each key is serialized once and
+# offered to every client. Each client has its own sender task, a bounded
+# "latest per key" mailbox and a frame-rate cap, so a slow browser only ever
+# loses intermediate states (counted as dropped) and never stalls the feed.
+#
+# Footprint patches (see FootprintBuilder.patch) are merged rather than
+# replaced so the merged message still continues the client's seq chain.
+# Event types (renko bricks) are discrete events, not state: each one gets
+# its own key, so none is coalesced and they reach clients in publish order
+# (a client mailbox overflowing under a stall can still evict them).
+#
+# Client -> server messages (JSON text on the same websocket):
+#   {"action": "subscribe", "symbols": [...], "types": [...]}  # omitted/null = all
+#   {"action": "unsubscribe", "symbols": [...]}
+#   {"action": "resync", "symbol": "..."}  # full footprint bar after a seq gap
+
+import asyncio
+import json
+import logging
+import threading
+import time
+from collections import OrderedDict
+from typing import Dict, Iterable, List, Optional, Set, Tuple
+
+import zmq
+
+import config
+
+logger = logging.getLogger(__name__)
+
+# (symbol, type), plus a sequence number for event types
+Key = Tuple
+
+# footprint and footprint_delta share a slot so deltas fold into a pending full bar
+_TYPE_SLOT = {"footprint_delta": "footprint"}
+
+# Types whose messages are events: queued one by one, never coalesced
+EVENT_TYPES = frozenset({"renko"})
+
+
+def message_key(symbol: str, msg: dict) -> Key:
+    mtype = msg.get("type", "")
+    return symbol, _TYPE_SLOT.get(mtype, mtype)
+
+
+def merge_footprint(pending: Optional[dict], msg: dict) -> Optional[dict]:
+    """
+    Folds footprint message `msg` into `pending` (same symbol) in place.
+    A full bar replaces whatever is pending; a delta is merged only if it
+    continues `pending` (base == pending seq, same bar). Returns the message
+    to keep, or None if `msg` does not continue `pending`.
+    """
+    if msg.get("type") == "footprint" or pending is None:
+        return msg
+    if msg.get("base") != pending.get("seq") or msg.get("ts") != pending.get("ts"):
+        return None
+    pending["levels"].update(msg["levels"])
+    for field, value in msg.items():
+        if field not in ("type", "levels", "base"):
+            pending[field] = value
+    return pending
+
+
+class ClientChannel:
+    """One websocket: latest-per-key mailbox plus a rate-capped sender task."""
+
+    def __init__(self, websocket, max_fps: float, max_pending: int, send_timeout: float):
+        self.websocket = websocket
+        self.min_interval = 1.0 / max_fps if max_fps > 0 else 0.0
+        self.max_pending = max_pending
+        self.send_timeout = send_timeout
+
+        self.pending: "OrderedDict[Key, str]" = OrderedDict()
+        self.sent = 0
+        self.dropped = 0  # states superseded or evicted before they were sent
+        self.max_depth = 0
+        self.connected_at = time.time()
+        self.closed = False
+        self._wake = asyncio.Event()
+
+        # Subscriptions; None means everything
+        self.symbols: Optional[Set[str]] = None
+        self.types: Optional[Set[str]] = None
+
+    def wants(self, key: Key) -> bool:
+        return (self.symbols is None or key[0] in self.symbols) and (self.types is None or key[1] in self.types)
+
+    def offer(self, key: Key, payload: str):
+        """Queues the latest payload for key. Never blocks."""
+        if self.closed:
+            return
+        if key in self.pending:
+            del self.pending[key]
+            self.dropped += 1
+        elif len(self.pending) >= self.max_pending:
+            self.pending.popitem(last=False)
+            self.dropped += 1
+        self.pending[key] = payload
+        self.max_depth = max(self.max_depth, len(self.pending))
+        self._wake.set()
+
+    async def run(self):
+        loop = asyncio.get_running_loop()
+        last_flush = 0.0
+        while not self.closed:
+            await self._wake.wait()
+            self._wake.clear()
+
+            # Frame-rate cap: anything arriving meanwhile is coalesced in pending
+            wait = last_flush + self.min_interval - loop.time()
+            if wait > 0:
+                await asyncio.sleep(wait)
+            last_flush = loop.time()
+
+            while self.pending and not self.closed:
+                _, payload = self.pending.popitem(last=False)
+                try:
+                    await asyncio.wait_for(self.websocket.send_text(payload), self.send_timeout)
+                    self.sent += 1
+                except asyncio.TimeoutError:
+                    logger.warning(f"Dropping slow websocket client (send > {self.send_timeout}s)")
+                    await self.close()
+                except Exception:
+                    await self.close()
+
+    async def close(self):
+        if self.closed:
+            return
+        self.closed = True
+        self.dropped += len(self.pending)
+        self.pending.clear()
+        self._wake.set()
+        try:
+            await self.websocket.close()
+        except Exception:
+            pass
+
+    def stats(self) -> dict:
+        return {
+            "queue_depth": len(self.pending),
+            "max_queue_depth": self.max_depth,
+            "sent": self.sent,
+            "dropped": self.dropped,
+            "symbols": sorted(self.symbols) if self.symbols is not None else "*",
+            "types": sorted(self.types) if self.types is not None else "*",
+            "connected_sec": round(time.time() - self.connected_at, 1),
+        }
+
+
+class CoalescingBroadcaster:
+    """
+    Usage (inside the server's event loop):
+        broadcaster = CoalescingBroadcaster()
+        asyncio.create_task(broadcaster.run())
+        broadcaster.publish(symbol, msg)      # loop or any other thread
+        await broadcaster.serve(websocket)    # per accepted websocket
+
+    Each flush serializes a message once; every subscribed client gets the
+    same string, so the cost per extra dashboard tab is one send, not one
+    json.dumps.
+    """
+
+    def __init__(self, window_ms=None, max_fps=None, max_pending=None, send_timeout=None):
+        self.window = (window_ms if window_ms is not None else getattr(config, 'BROADCAST_WINDOW_MS', 75)) / 1000.0
+        self.max_fps = max_fps if max_fps is not None else getattr(config, 'BROADCAST_MAX_FPS', 20)
+        self.max_pending = max_pending if max_pending is not None else getattr(config, 'BROADCAST_CLIENT_MAX_PENDING', 256)
+        self.send_timeout = send_timeout if send_timeout is not None else getattr(config, 'BROADCAST_SEND_TIMEOUT', 2.0)
+
+        self._lock = threading.Lock()
+        self._pending: Dict[Key, dict] = {}
+        # Latest full footprint bar per symbol, kept current from the patches; serves resync
+        self.footprints: Dict[str, dict] = {}
+        self.clients: List[ClientChannel] = []
+
+        self.published = 0
+        self.coalesced = 0
+        self._event_seq = 0
+        self.flushes = 0
+
+    # ---------- producer side ----------
+
+    def publish(self, symbol: str, msg: dict):
+        """Queues msg for the next flush. Thread-safe; takes ownership of msg."""
+        key = message_key(symbol, msg)
+        with self._lock:
+            self.published += 1
+            if key[1] in EVENT_TYPES:
+                self._event_seq += 1
+                self._pending[key + (self._event_seq,)] = msg
+            elif key[1] == "footprint":
+                self._track_footprint(symbol, msg)
+                prev = self._pending.get(key)
+                merged = merge_footprint(prev, msg)
+                if merged is None:
+                    # Upstream gap: forward as is, clients will detect it and resync
+                    merged = msg
+                if prev is not None:
+                    self.coalesced += 1
+                self._pending[key] = merged
+            else:
+                if key in self._pending:
+                    self.coalesced += 1
+                self._pending[key] = msg
+
+    def _track_footprint(self, symbol: str, msg: dict):
+        if msg.get("type") == "footprint":
+            bar = dict(msg)
+            bar["levels"] = dict(msg.get("levels", {}))
+            self.footprints[symbol] = bar
+            return
+        bar = self.footprints.get(symbol)
+        if bar is None:
+            return
+        if msg.get("base") != bar.get("seq") or msg.get("ts") != bar.get("ts"):
+            # Missed a patch; cache is unusable until the next full bar
+            del self.footprints[symbol]
+            return
+        bar["levels"].update(msg["levels"])
+        for field, value in msg.items():
+            if field not in ("type", "levels", "base"):
+                bar[field] = value
+
+    def footprint_snapshot(self, symbol: str) -> Optional[dict]:
+        with self._lock:
+            bar = self.footprints.get(symbol)
+            if bar is None:
+                return None
+            snap = dict(bar)
+            snap["levels"] = dict(bar["levels"])
+            return snap
+
+    # ---------- loop side ----------
+
+    async def run(self):
+        while True:
+            await asyncio.sleep(self.window)
+            try:
+                self.flush()
+            except Exception as e:
+                logger.error(f"Broadcast flush error: {e}")
+
+    def flush(self):
+        with self._lock:
+            if not self._pending:
+                return
+            pending, self._pending = self._pending, {}
+            # Serialize under the lock: pending footprint dicts are merged into in place
+            payloads = []
+            for key, msg in pending.items():
+                full = None
+                if key[1] == "footprint" and any(key in c.pending for c in self.clients):
+                    # A client still holding an unsent footprint message cannot take a
+                    # delta on top of it; it gets the full bar as of this flush instead
+                    bar = self.footprints.get(key[0])
+                    if bar is not None and bar.get("seq") == msg.get("seq"):
+                        full = json.dumps(bar, default=str)
+                payloads.append((key, json.dumps(msg, default=str), full))
+        self.flushes += 1
+        for client in list(self.clients):
+            for key, payload, full in payloads:
+                if not client.wants(key):
+                    continue
+                if full is not None and key in client.pending:
+                    payload = full
+                client.offer(key, payload)
+
+    async def serve(self, websocket):
+        """Runs one accepted websocket until it disconnects or is dropped as slow."""
+        channel = ClientChannel(websocket, self.max_fps, self.max_pending, self.send_timeout)
+        self.clients.append(channel)
+        sender = asyncio.create_task(channel.run())
+        try:
+            while not channel.closed:
+                text = await websocket.receive_text()
+                self._on_client_message(channel, text)
+        except Exception:
+            pass
+        finally:
+            await channel.close()
+            sender.cancel()
+            self.clients.remove(channel)
+
+    def _on_client_message(self, channel: ClientChannel, text: str):
+        try:
+            request = json.loads(text)
+        except ValueError:
+            return
+        action = request.get("action")
+        if action == "subscribe":
+            symbols, types = request.get("symbols"), request.get("types")
+            added = set(symbols or ()) - (channel.symbols or set())
+            channel.symbols = set(symbols) if symbols is not None else None
+            channel.types = {_TYPE_SLOT.get(t, t) for t in types} if types is not None else None
+            # New symbols start from a full footprint bar; deltas follow on the next flushes
+            self._send_footprints(channel, added)
+        elif action == "unsubscribe" and channel.symbols is not None:
+            channel.symbols.difference_update(request.get("symbols") or ())
+        elif action == "resync" and request.get("symbol"):
+            self._send_footprints(channel, [request["symbol"]])
+
+    def _send_footprints(self, channel: ClientChannel, symbols: Iterable[str]):
+        for symbol in symbols:
+            if not channel.wants((symbol, "footprint")):
+                continue
+            snap = self.footprint_snapshot(symbol)
+            if snap is not None:
+                # Replaces any queued delta for the symbol
+                channel.offer(message_key(symbol, snap), json.dumps(snap, default=str))
+
+    def stats(self) -> dict:
+        return {
+            "window_ms": int(self.window * 1000),
+            "published": self.published,
+            "coalesced": self.coalesced,
+            "flushes": self.flushes,
+            "pending_keys": len(self._pending),
+            "clients": [c.stats() for c in self.clients],
+        }
+
+
+class UiBusPublisher:
+    """
+    Engine-side broadcaster: forwards UI messages to the API server over
+    ZMQ (config.ZMQ_UI_URL). PUB never blocks the engine; pass an instance
+    to LiveAuctionEngine.set_broadcaster().
+    """
+
+    def __init__(self, url: str = None, context: zmq.Context = None):
+        self.context = context or zmq.Context.instance()
+        self.socket = self.context.socket(zmq.PUB)
+        self.socket.setsockopt(zmq.SNDHWM, 10000)
+        self.socket.connect(url or config.ZMQ_UI_URL)
+
+    def __call__(self, symbol: str, msg: dict):
+        try:
+            self.socket.send_multipart([symbol.encode('utf-8'), json.dumps(msg, default=str).encode('utf-8')], zmq.NOBLOCK)
+        except zmq.Again:
+            pass
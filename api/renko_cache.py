@@ -0,0 +1,113 @@
+# =========================
+# FILE: renko_cache.py
+# =========================
+# Server-side Renko bricks for the /api/renko endpoint.
+#
+# DuckDB buckets the stored ticks into 1-second bars (fetch_second_bars), so
+# one row per second leaves the database instead of every tick, and
+# RenkoAggregator.on_bars runs the ATR / brick recurrence over them. Results
+# are kept in an LRU cache keyed by (symbol, from_date, to_date, brick_mode,
+# brick_value) and returned as compact column arrays, so a repeated chart
+# view is a dict lookup. Ranges that reach past now are still receiving
+# ticks and are recomputed on every request rather than cached.
+
+import threading
+import time
+from collections import OrderedDict
+from datetime import datetime, timezone
+from typing import Dict, Tuple
+
+import config
+from strategy.renko_aggregator import RenkoAggregator
+
+Key = Tuple[str, str, str, str, float]
+
+BRICK_MODES = ("atr", "fixed", "percentage")
+
+
+def compute_renko(persistence, symbol: str, from_date: str, to_date: str,
+                  brick_mode: str, brick_value: float) -> Dict:
+    """
+    Bricks of one symbol over [from_date, to_date] as column arrays:
+    ts (brick close, ms), open, close. high / low are max / min(open, close).
+    """
+    bars = persistence.fetch_second_bars(symbol, from_date, to_date)
+    # Same bars as feeding the ticks to on_tick: it opens its first bar on the
+    # second distinct second and leaves the last one open.
+    bars = bars.iloc[1:-1]
+    aggregator = RenkoAggregator(brick_size_mode=brick_mode, brick_size_value=brick_value)
+    bricks = aggregator.on_bars(symbol, bars["sec"].to_numpy(), bars["high"].to_numpy(),
+                                bars["low"].to_numpy(), bars["close"].to_numpy())
+    return {
+        "symbol": symbol,
+        "from_date": from_date,
+        "to_date": to_date,
+        "brick_mode": brick_mode,
+        "brick_value": brick_value,
+        "bars": len(bars),
+        "atr": aggregator.get_atr(symbol),
+        "ts": [b.ts for b in bricks],
+        "open": [b.open for b in bricks],
+        "close": [b.close for b in bricks],
+    }
+
+
+def range_closed(to_date: str) -> bool:
+    """
+    True once no new tick can fall inside a range ending at to_date. The
+    timestamp column holds the ltt epoch as a naive UTC time, so "now" is
+    naive UTC too, not local time.
+    """
+    try:
+        return datetime.fromisoformat(to_date) < datetime.now(timezone.utc).replace(tzinfo=None)
+    except ValueError:
+        return False
+
+
+class RenkoCache:
+    """LRU of compute_renko results. Thread-safe (sync endpoints run in a thread pool)."""
+
+    def __init__(self, max_entries: int = None):
+        self.max_entries = max_entries if max_entries is not None else getattr(config, 'RENKO_CACHE_SIZE', 64)
+        self.entries: "OrderedDict[Key, Dict]" = OrderedDict()
+        self.hits = 0
+        self.misses = 0
+        self.uncached = 0  # open ranges, computed but not stored
+        self.compute_ms = 0.0
+        self._lock = threading.Lock()
+
+    def get(self, persistence, symbol: str, from_date: str, to_date: str,
+            brick_mode: str = "atr", brick_value: float = 2.0) -> Dict:
+        key = (symbol, from_date, to_date, brick_mode, float(brick_value))
+        with self._lock:
+            result = self.entries.get(key)
+            if result is not None:
+                self.entries.move_to_end(key)
+                self.hits += 1
+                return result
+
+        # Computed outside the lock: a concurrent miss on the same key only repeats the work
+        start = time.perf_counter()
+        result = compute_renko(persistence, *key)
+        elapsed = (time.perf_counter() - start) * 1000
+
+        with self._lock:
+            self.compute_ms += elapsed
+            if not range_closed(to_date):
+                self.uncached += 1
+                return result
+            self.misses += 1
+            self.entries[key] = result
+            self.entries.move_to_end(key)
+            while len(self.entries) > self.max_entries:
+                self.entries.popitem(last=False)
+        return result
+
+    def clear(self):
+        with self._lock:
+            self.entries.clear()
+
+    def stats(self) -> Dict:
+        with self._lock:
+            return {"entries": len(self.entries), "max_entries": self.max_entries, "hits": self.hits,
+                    "misses": self.misses, "uncached": self.uncached, "compute_ms": round(self.compute_ms, 1)}
@@ -1,19 +1,18 @@
 import sys
 import os
 import logging
-from fastapi import FastAPI, WebSocket, Request, Form
+from fastapi import FastAPI, WebSocket, Request, Form, HTTPException
 from fastapi.responses import HTMLResponse, RedirectResponse
 from fastapi.staticfiles import StaticFiles
 from fastapi.templating import Jinja2Templates
 import uvicorn
 import zmq
+import zmq.asyncio
 import asyncio
 import json
-from typing import Set, List
-import threading
+from typing import List
 import psycopg2
 import pandas as pd
-import plotly.graph_objects as go
 
 # Add project root to the Python path
 current_dir = os.path.dirname(os.path.abspath(__file__))
@@ -21,9 +20,11 @@ project_root = os.path.join(current_dir, "..")
 sys.path.insert(0, project_root)
 
 import config
-from trading_core.persistence import QuestDBPersistence
-from trading_core.models import Tick
-from strategy.renko_aggregator import RenkoAggregator
+from trading_core.persistence import DuckDBPersistence
+from data_handling.feed_codec import decode_frame, subscribe
+from api.broadcaster import CoalescingBroadcaster
+from trading_core.latency import LatencyRecorder, now_us
+from api.renko_cache import RenkoCache, BRICK_MODES
 
 # Configure logging
 logging.basicConfig(level=logging.INFO)
@@ -51,46 +52,109 @@ class MockEngine:
 engine = MockEngine()
 
 # --- WebSocket and ZMQ ---
-connected_clients: Set[WebSocket] = set()
+broadcaster = CoalescingBroadcaster()
 
-def zmq_listener():
-    """Listens to the ZeroMQ bus and broadcasts messages to all connected WebSockets."""
-    context = zmq.Context()
+# Messages handled per socket before yielding back to the event loop
+ZMQ_DRAIN_BATCH = 500
+
+# Renko results per (symbol, date range, brick mode, brick value)
+renko_cache = RenkoCache()
+
+# Bus latency as seen by this process, and the latest snapshot from each strategy's Monitor
+latency = LatencyRecorder()
+strategy_latency = {}
+
+async def zmq_pump(socket, handle):
+    """Receives from one zmq.asyncio socket on the server's event loop, draining bursts without re-awaiting."""
+    while True:
+        batch = [await socket.recv_multipart()]
+        for _ in range(ZMQ_DRAIN_BATCH):
+            try:
+                batch.append(await socket.recv_multipart(flags=zmq.NOBLOCK))
+            except zmq.Again:
+                break
+        for parts in batch:
+            try:
+                handle(parts)
+            except Exception as e:
+                logger.error(f"Dropping bad bus message: {e}")
+
+def on_market_data(parts):
+    topic, message = parts
+    frame = decode_frame(message)
+    decoded_us = now_us()
+    for record in frame.records:
+        latency.record_frame(record.symbol, frame.recv_us, frame.sent_us, decoded_us)
+        broadcaster.publish(record.symbol, record.to_dict())
+
+def on_ui_message(parts):
+    symbol, message = parts
+    msg = json.loads(message)
+    if msg.get("type") == "latency":
+        strategy_latency[msg.get("strategy", "")] = msg
+        return
+    broadcaster.publish(symbol.decode('utf-8'), msg)
+
+async def zmq_listener():
+    """
+    Feeds the broadcaster from the market data bus (ticks) and the UI bus
+    (footprint/dom/renko from strategy processes). Runs on the uvicorn loop;
+    publish() only queues, so nothing here waits on a websocket.
+    """
+    context = zmq.asyncio.Context.instance()
     sub_socket = context.socket(zmq.SUB)
     sub_socket.connect(config.ZMQ_PUB_URL)
-    sub_socket.setsockopt(zmq.SUBSCRIBE, config.ZMQ_TOPIC.encode('utf-8'))
+    subscribe(sub_socket)
+
+    ui_socket = context.socket(zmq.SUB)
+    ui_socket.bind(config.ZMQ_UI_URL)
+    ui_socket.setsockopt(zmq.SUBSCRIBE, b"")
     logger.info("ZMQ listener started and connected.")
 
     try:
-        while True:
-            topic, message = sub_socket.recv_multipart()
-            data = json.loads(message.decode('utf-8'))
-            logger.info(f"Received from ZMQ: {data}")
-            # Broadcast to all connected clients
-            for client in connected_clients:
-                asyncio.run(client.send_json(data))
+        await asyncio.gather(zmq_pump(sub_socket, on_market_data), zmq_pump(ui_socket, on_ui_message))
+    except asyncio.CancelledError:
+        pass
     except Exception as e:
         logger.error(f"Error in ZMQ listener: {e}")
     finally:
         sub_socket.close()
+        ui_socket.close()
 
 @app.on_event("startup")
 async def startup_event():
-    threading.Thread(target=zmq_listener, daemon=True).start()
+    asyncio.create_task(broadcaster.run())
+    asyncio.create_task(zmq_listener())
 
 @app.websocket("/ws")
 async def websocket_endpoint(websocket: WebSocket):
     await websocket.accept()
     logger.info("WebSocket connection accepted.")
-    connected_clients.add(websocket)
-    try:
-        while True:
-            await websocket.receive_text()
-    except Exception as e:
-        logger.error(f"WebSocket error: {e}")
-    finally:
-        connected_clients.remove(websocket)
-        logger.info("WebSocket connection closed.")
+    await broadcaster.serve(websocket)
+    logger.info("WebSocket connection closed.")
+
+@app.get("/api/broadcast/stats")
+async def broadcast_stats():
+    """Per-client queue depth and dropped-frame counters."""
+    return broadcaster.stats()
+
+@app.get("/api/latency")
+async def latency_stats(symbol: str = None):
+    """
+    Per-symbol, per-stage latency percentiles (microseconds): the bus stages
+    measured in this process, and the tick-to-decision stages each strategy
+    process reported in its latest Monitor snapshot.
+    """
+    strategies = {}
+    for name, msg in strategy_latency.items():
+        symbols = msg["symbols"]
+        if symbol:
+            symbols = {symbol: symbols[symbol]} if symbol in symbols else {}
+        strategies[name] = {"ts": msg.get("ts"), "since": msg.get("since"), "symbols": symbols}
+    return {
+        "server": {"since": int(latency.started * 1000), "symbols": latency.snapshot(symbol)},
+        "strategies": strategies,
+    }
 
 # --- Main Page ---
 @app.get("/")
@@ -136,38 +200,43 @@ async def query_post(request: Request, query: str = Form(...)):
     return templates.TemplateResponse("query_ui.html", {"request": request, "query": query, "results": results_html, "error": error})
 
 # --- Renko Chart ---
+def renko_page(request: Request, symbol: str, from_date: str, to_date: str,
+               brick_mode: str = "atr", brick_value: float = 2.0):
+    # The page only carries the form; the chart is drawn from /api/renko
+    persistence = DuckDBPersistence()
+    all_symbols = persistence.get_all_symbols()
+    return templates.TemplateResponse("renko_chart.html", {
+        "request": request, "all_symbols": all_symbols, "symbol": symbol or (all_symbols[0] if all_symbols else ""),
+        "from_date": from_date, "to_date": to_date, "brick_mode": brick_mode, "brick_value": brick_value,
+        "brick_modes": BRICK_MODES})
+
 @app.get("/renko")
 async def renko_get(request: Request):
-    persistence = QuestDBPersistence()
-    all_symbols = persistence.get_all_symbols()
-    return templates.TemplateResponse("renko_chart.html", {"request": request, "all_symbols": all_symbols, "symbol": all_symbols[0] if all_symbols else "", "from_date": "2024-01-01", "to_date": "2024-01-02", "chart_html": None})
+    return renko_page(request, "", "2024-01-01", "2024-01-02")
 
 @app.post("/renko")
-async def renko_post(request: Request, symbol: str = Form(...), from_date: str = Form(...), to_date: str = Form(...)):
-    persistence = QuestDBPersistence()
-    all_symbols = persistence.get_all_symbols()
-
-    bricks = []
-    def on_renko_brick(brick):
-        bricks.append(brick)
-
-    renko_aggregator = RenkoAggregator(on_renko_brick=on_renko_brick)
-
-    tick_data = persistence.fetch_tick_data(symbol, from_date, to_date)
-    for data in tick_data:
-        try:
-            tick = Tick(symbol=data['symbol'], ltp=data['ltp'], ts=data['ts'])
-            renko_aggregator.on_tick(tick)
-        except KeyError as e:
-            logger.error(f"KeyError: {e} in tick data: {data}")
+async def renko_post(request: Request, symbol: str = Form(...), from_date: str = Form(...), to_date: str = Form(...),
+                     brick_mode: str = Form("atr"), brick_value: float = Form(2.0)):
+    return renko_page(request, symbol, from_date, to_date, brick_mode, brick_value)
 
-    chart_html = None
-    if bricks:
-        df = pd.DataFrame([brick.__dict__ for brick in bricks])
-        fig = go.Figure(go.Candlestick(x=df['ts'], open=df['open'], high=df['high'], low=df['low'], close=df['close']))
-        chart_html = fig.to_html(full_html=False)
+@app.get("/api/renko")
+def renko_api(symbol: str, from_date: str, to_date: str, brick_mode: str = "atr", brick_value: float = 2.0):
+    """
+    Renko bricks as column arrays (ts, open, close), computed from DuckDB
+    1-second bars and cached per (symbol, date range, brick mode, brick
+    value). A plain def: FastAPI runs it in its thread pool, so a cache
+    miss's query never blocks the websocket broadcast loop.
+    """
+    if brick_mode not in BRICK_MODES:
+        raise HTTPException(status_code=400, detail=f"brick_mode must be one of {', '.join(BRICK_MODES)}")
+    if brick_value <= 0:
+        raise HTTPException(status_code=400, detail="brick_value must be positive")
+    return renko_cache.get(DuckDBPersistence(), symbol, from_date, to_date, brick_mode, brick_value)
 
-    return templates.TemplateResponse("renko_chart.html", {"request": request, "all_symbols": all_symbols, "symbol": symbol, "from_date": from_date, "to_date": to_date, "chart_html": chart_html})
+@app.get("/api/renko/stats")
+async def renko_stats():
+    """Renko cache size, hits / misses and total compute time."""
+    return renko_cache.stats()
 
 # --- Trade Viewer ---
 @app.get("/trades")
@@ -126,4 +126,37 @@ STD_DEV = 1
 
 # ZeroMQ Configuration
 ZMQ_PUB_URL = "tcp://127.0.0.1:5555"
-ZMQ_TOPIC = "market_data"
+ZMQ_TOPIC = "market_data"  # Prefix; each instrument is published on "market_data/<instrument_key>/"
+# Strategy processes publish UI messages (footprint, dom, renko) here; the API server binds it
+ZMQ_UI_URL = "tcp://127.0.0.1:5556"
+
+# Websocket broadcast (api/broadcaster.py)
+BROADCAST_WINDOW_MS = 75  # Coalesce updates per (symbol, type) within this window
+BROADCAST_MAX_FPS = 20  # Per-client cap on flushes per second
+BROADCAST_CLIENT_MAX_PENDING = 256  # Distinct (symbol, type) keys a client may have queued
+BROADCAST_SEND_TIMEOUT = 2.0  # Seconds; a client whose send takes longer is disconnected
+
+# Tick-to-decision latency histograms (trading_core/latency.py)
+LATENCY_DUMP_INTERVAL = 30  # Seconds between Monitor dumps / snapshots sent to /api/latency
+
+# Ingestor write-behind queue (data_handling/write_behind.py)
+WRITE_BEHIND_CAPACITY = 50000  # Frames held in memory
+# Overflow policy and spill dir apply to standalone WriteBehindQueues only: the
+# ingestor's queue (inside JournalReplayer) always blocks, the journal being its
+# overflow store. Capacity and the batching values apply to both.
+WRITE_BEHIND_POLICY = "spill"  # block | drop_oldest | spill
+WRITE_BEHIND_SPILL_DIR = "data/spill"
+WRITE_BEHIND_MIN_BATCH = 50
+WRITE_BEHIND_MAX_BATCH = 5000
+WRITE_BEHIND_TARGET_FLUSH_MS = 200  # Batch size shrinks when a flush takes longer
+WRITE_BEHIND_MAX_WAIT_MS = 500  # Flush a partial batch after this long
+
+# Ingestor tick journal (data_handling/tick_journal.py); the DB is fed from here
+JOURNAL_DIR = "data/journal"
+JOURNAL_SEGMENT_MB = 64
+
+# Parquet cache of the data/*.json.gz backtest files (data_handling/tick_cache.py)
+TICK_CACHE_DIR = "data/cache"
+
+# Server-side Renko results (api/renko_cache.py)
+RENKO_CACHE_SIZE = 64  # (symbol, date range, brick mode, brick value) entries kept, LRU
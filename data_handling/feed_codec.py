@@ -0,0 +1,373 @@
+# =========================
+# FILE: feed_codec.py
+# =========================
+# Compact binary wire format for the ZeroMQ market data bus.
+#
+# The ingestor normalizes every Upstox `feeds` dict into fixed-layout
+# tick / depth / OHLC records and packs them with `struct`. Every subscriber
+# (strategy processes, the DB writer, the API server) decodes frames through
+# `decode_frame`, so there is exactly one parser for the bus.
+#
+# Topics: every instrument is published on its own topic
+#   "<ZMQ_TOPIC>/<instrument_key>/"   e.g. "market_data/NSE_FO|51414/"
+# so SUB sockets filter by prefix: a whole segment ("market_data/NSE_FO|"),
+# a single symbol, or everything ("market_data/").
+#
+# Frame layout (little endian):
+#   header : magic(4s) version(B) feed_type(B) count(H) current_ts(q) recv_us(q) sent_us(q)
+#   record : flags(B) n_depth(B) n_ohlc(B) reserved(B) symbol_len(H) symbol(utf-8)
+#            [TICK]   ltp(d) ltt(q) ltq(q) cp(d)                      if FLAG_TICK
+#            [MARKET] atp(d) vtt(q) oi(d) iv(d) tbq(d) tsq(d)         if FLAG_MARKET
+#            [GREEKS] delta theta gamma vega rho (5d)                 if FLAG_GREEKS
+#            [DEPTH]  n_depth x bidP(d) bidQ(q) askP(d) askQ(q)
+#            [OHLC]   n_ohlc  x interval(4s) open high low close(4d) vol(q) ts(q)
+
+import struct
+import time
+from dataclasses import dataclass, field
+from typing import Dict, Iterable, List, Optional, Tuple
+
+import config
+
+WIRE_MAGIC = b"AUCF"
+WIRE_VERSION = 1
+
+FEED_TYPES = {"initial_feed": 0, "live_feed": 1, "market_info": 2}
+FEED_TYPE_NAMES = {v: k for k, v in FEED_TYPES.items()}
+
+FLAG_TICK = 0x01
+FLAG_MARKET = 0x02
+FLAG_GREEKS = 0x04
+FLAG_INDEX = 0x08
+
+_HEADER = struct.Struct("<4sBBHqqq")
+_RECORD = struct.Struct("<BBBBH")
+_TICK = struct.Struct("<dqqd")
+_MARKET = struct.Struct("<dqdddd")
+_GREEKS = struct.Struct("<5d")
+_DEPTH = struct.Struct("<dqdq")
+_OHLC = struct.Struct("<4sddddqq")
+
+GREEK_FIELDS = ("delta", "theta", "gamma", "vega", "rho")
+
+
+@dataclass
+class OHLCBar:
+    """One entry of `marketOHLC.ohlc` (e.g. interval "I1" or "1d")."""
+    interval: str
+    open: float
+    high: float
+    low: float
+    close: float
+    vol: int
+    ts: int
+
+
+@dataclass
+class FeedRecord:
+    """Normalized view of a single instrument's feed entry."""
+    symbol: str
+    ltp: float = 0.0
+    ltt: int = 0
+    ltq: int = 0
+    cp: float = 0.0
+    atp: float = 0.0
+    vtt: int = 0
+    oi: float = 0.0
+    iv: float = 0.0
+    tbq: float = 0.0
+    tsq: float = 0.0
+    has_tick: bool = False
+    has_market: bool = False
+    is_index: bool = False
+    # (bidP, bidQ, askP, askQ) per level, best level first
+    depth: List[Tuple[float, int, float, int]] = field(default_factory=list)
+    ohlc: List[OHLCBar] = field(default_factory=list)
+    greeks: Optional[Dict[str, float]] = None
+
+    def to_dict(self) -> dict:
+        """Plain dict for JSON consumers (e.g. websocket clients)."""
+        return {
+            "type": "tick",
+            "symbol": self.symbol,
+            "ltp": self.ltp,
+            "ltt": self.ltt,
+            "ltq": self.ltq,
+            "cp": self.cp,
+            "atp": self.atp,
+            "vtt": self.vtt,
+            "oi": self.oi,
+            "iv": self.iv,
+            "tbq": self.tbq,
+            "tsq": self.tsq,
+            "depth": [list(level) for level in self.depth],
+            "ohlc": [bar.__dict__ for bar in self.ohlc],
+            "greeks": self.greeks,
+        }
+
+
+@dataclass
+class Frame:
+    """A decoded bus message: header fields plus its records."""
+    version: int
+    feed_type: str
+    current_ts: int
+    recv_us: int
+    sent_us: int
+    records: List[FeedRecord]
+
+
+# -------------------------
+# Topics
+# -------------------------
+
+def feed_topic(symbol: str) -> bytes:
+    """Topic for a single instrument. The trailing separator stops "NSE_FO|514" matching "NSE_FO|51414"."""
+    return f"{config.ZMQ_TOPIC}/{symbol}/".encode("utf-8")
+
+
+def segment_topic(segment: str) -> bytes:
+    """Topic prefix for a whole exchange segment, e.g. "NSE_FO"."""
+    return f"{config.ZMQ_TOPIC}/{segment}|".encode("utf-8")
+
+
+def subscribe(sub_socket, symbols: Optional[Iterable[str]] = None):
+    """
+    Subscribes a zmq.SUB socket to the given instruments (all if None).
+    Unwanted instruments are then discarded by ZeroMQ before they are decoded.
+    """
+    import zmq
+
+    if symbols is None:
+        sub_socket.setsockopt(zmq.SUBSCRIBE, f"{config.ZMQ_TOPIC}/".encode("utf-8"))
+        return
+    for symbol in symbols:
+        sub_socket.setsockopt(zmq.SUBSCRIBE, feed_topic(symbol))
+
+
+# -------------------------
+# Normalization (Upstox dict -> records)
+# -------------------------
+
+def _int(value) -> int:
+    # Upstox JSON encodes int64 fields as strings ("ltt": "1765771373160")
+    return int(value) if value not in (None, "") else 0
+
+
+def _float(value) -> float:
+    return float(value) if value not in (None, "") else 0.0
+
+
+def normalize_feed(symbol: str, feed: dict) -> Optional[FeedRecord]:
+    """
+    Converts one `feeds[symbol]` entry into a FeedRecord.
+    Returns None if the entry carries nothing we persist or trade on.
+    """
+    full_feed = feed.get("fullFeed", {})
+    market = full_feed.get("marketFF")
+    is_index = False
+    if market is None:
+        market = full_feed.get("indexFF")
+        is_index = market is not None
+    if market is None:
+        # LTPC-only subscription mode
+        market = {"ltpc": feed["ltpc"]} if "ltpc" in feed else None
+    if not market:
+        return None
+
+    has_tick = False
+    ltp, ltt, ltq, cp = 0.0, 0, 0, 0.0
+    ltpc = market.get("ltpc")
+    if ltpc and "ltp" in ltpc and "ltt" in ltpc:
+        has_tick = True
+        ltp = float(ltpc["ltp"])
+        ltt = int(ltpc["ltt"])
+        ltq = _int(ltpc.get("ltq"))
+        cp = _float(ltpc.get("cp"))
+
+    has_market = False
+    atp, vtt, oi, iv, tbq, tsq = 0.0, 0, 0.0, 0.0, 0.0, 0.0
+    if "vtt" in market or "tbq" in market or "atp" in market:
+        has_market = True
+        atp = _float(market.get("atp"))
+        vtt = _int(market.get("vtt"))
+        oi = _float(market.get("oi"))
+        iv = _float(market.get("iv"))
+        tbq = _float(market.get("tbq"))
+        tsq = _float(market.get("tsq"))
+
+    depth = []
+    market_level = market.get("marketLevel")
+    if market_level:
+        for q in market_level.get("bidAskQuote", ()):
+            depth.append((_float(q.get("bidP")), _int(q.get("bidQ")), _float(q.get("askP")), _int(q.get("askQ"))))
+
+    ohlc = []
+    market_ohlc = market.get("marketOHLC")
+    if market_ohlc:
+        for o in market_ohlc.get("ohlc", ()):
+            if "interval" not in o:
+                continue
+            ohlc.append(OHLCBar(
+                o["interval"],
+                _float(o.get("open")),
+                _float(o.get("high")),
+                _float(o.get("low")),
+                _float(o.get("close")),
+                _int(o.get("vol")),
+                _int(o.get("ts")),
+            ))
+
+    greeks = full_feed.get("optionGreeks") or market.get("optionGreeks")
+    if greeks:
+        greeks = {k: _float(greeks.get(k)) for k in GREEK_FIELDS}
+
+    return FeedRecord(
+        symbol, ltp, ltt, ltq, cp, atp, vtt, oi, iv, tbq, tsq,
+        has_tick, has_market, is_index, depth, ohlc, greeks or None,
+    )
+
+
+def normalize_feeds(data: dict) -> List[FeedRecord]:
+    """Normalizes every instrument in an Upstox message (`{"feeds": {...}}`)."""
+    records = []
+    for symbol, feed in data.get("feeds", {}).items():
+        record = normalize_feed(symbol, feed)
+        if record is not None:
+            records.append(record)
+    return records
+
+
+# -------------------------
+# Encoding
+# -------------------------
+
+def _pack_record(record: FeedRecord, out: List[bytes]):
+    flags = 0
+    if record.has_tick:
+        flags |= FLAG_TICK
+    if record.has_market:
+        flags |= FLAG_MARKET
+    if record.greeks:
+        flags |= FLAG_GREEKS
+    if record.is_index:
+        flags |= FLAG_INDEX
+
+    symbol = record.symbol.encode("utf-8")
+    depth = record.depth[:255]
+    ohlc = record.ohlc[:255]
+    out.append(_RECORD.pack(flags, len(depth), len(ohlc), 0, len(symbol)))
+    out.append(symbol)
+    if flags & FLAG_TICK:
+        out.append(_TICK.pack(record.ltp, record.ltt, record.ltq, record.cp))
+    if flags & FLAG_MARKET:
+        out.append(_MARKET.pack(record.atp, record.vtt, record.oi, record.iv, record.tbq, record.tsq))
+    if flags & FLAG_GREEKS:
+        out.append(_GREEKS.pack(*(record.greeks.get(k, 0.0) for k in GREEK_FIELDS)))
+    for level in depth:
+        out.append(_DEPTH.pack(*level))
+    for bar in ohlc:
+        out.append(_OHLC.pack(bar.interval.encode("ascii")[:4], bar.open, bar.high, bar.low, bar.close, bar.vol, bar.ts))
+
+
+def encode_frame(
+    records: List[FeedRecord],
+    feed_type: str = "live_feed",
+    current_ts: int = 0,
+    recv_us: int = 0,
+) -> bytes:
+    """Packs records into one bus frame. `sent_us` is stamped here."""
+    out: List[bytes] = [_HEADER.pack(
+        WIRE_MAGIC,
+        WIRE_VERSION,
+        FEED_TYPES.get(feed_type, 1),
+        len(records),
+        current_ts,
+        recv_us,
+        time.time_ns() // 1000,
+    )]
+    for record in records:
+        _pack_record(record, out)
+    return b"".join(out)
+
+
+def encode_feeds(data: dict, recv_us: Optional[int] = None) -> bytes:
+    """Normalizes and encodes a raw Upstox message in one call."""
+    return encode_frame(
+        normalize_feeds(data),
+        feed_type=data.get("type", "live_feed"),
+        current_ts=_int(data.get("currentTs")),
+        recv_us=recv_us if recv_us is not None else time.time_ns() // 1000,
+    )
+
+
+# -------------------------
+# Decoding (shared by every subscriber)
+# -------------------------
+
+def frame_recv_us(payload: bytes) -> int:
+    """Ingestor receive time of a frame, read from the header without decoding records."""
+    return _HEADER.unpack_from(payload, 0)[5]
+
+
+def decode_frame(payload: bytes) -> Frame:
+    """
+    Decodes a bus frame produced by `encode_frame`.
+    Raises ValueError on a foreign or newer-version payload.
+    """
+    if len(payload) < _HEADER.size:
+        raise ValueError("Truncated feed frame")
+    magic, version, feed_type, count, current_ts, recv_us, sent_us = _HEADER.unpack_from(payload, 0)
+    if magic != WIRE_MAGIC:
+        raise ValueError(f"Not a feed frame (magic={magic!r})")
+    if version != WIRE_VERSION:
+        raise ValueError(f"Unsupported feed frame version {version} (expected {WIRE_VERSION})")
+
+    mv = memoryview(payload)
+    offset = _HEADER.size
+    records = []
+    for _ in range(count):
+        flags, n_depth, n_ohlc, _reserved, sym_len = _RECORD.unpack_from(payload, offset)
+        offset += _RECORD.size
+        symbol = str(mv[offset:offset + sym_len], "utf-8")
+        offset += sym_len
+
+        if flags & FLAG_TICK:
+            ltp, ltt, ltq, cp = _TICK.unpack_from(payload, offset)
+            offset += _TICK.size
+        else:
+            ltp, ltt, ltq, cp = 0.0, 0, 0, 0.0
+        if flags & FLAG_MARKET:
+            atp, vtt, oi, iv, tbq, tsq = _MARKET.unpack_from(payload, offset)
+            offset += _MARKET.size
+        else:
+            atp, vtt, oi, iv, tbq, tsq = 0.0, 0, 0.0, 0.0, 0.0, 0.0
+        greeks = None
+        if flags & FLAG_GREEKS:
+            greeks = dict(zip(GREEK_FIELDS, _GREEKS.unpack_from(payload, offset)))
+            offset += _GREEKS.size
+        depth = []
+        if n_depth:
+            end = offset + n_depth * _DEPTH.size
+            depth = list(_DEPTH.iter_unpack(mv[offset:end]))
+            offset = end
+        ohlc = []
+        for _ in range(n_ohlc):
+            interval, o, h, l, c, vol, ts = _OHLC.unpack_from(payload, offset)
+            ohlc.append(OHLCBar(interval.rstrip(b"\0").decode("ascii"), o, h, l, c, vol, ts))
+            offset += _OHLC.size
+
+        records.append(FeedRecord(
+            symbol, ltp, ltt, ltq, cp, atp, vtt, oi, iv, tbq, tsq,
+            bool(flags & FLAG_TICK), bool(flags & FLAG_MARKET), bool(flags & FLAG_INDEX),
+            depth, ohlc, greeks,
+        ))
+
+    return Frame(
+        version=version,
+        feed_type=FEED_TYPE_NAMES.get(feed_type, "live_feed"),
+        current_ts=current_ts,
+        recv_us=recv_us,
+        sent_us=sent_us,
+        records=records,
+    )
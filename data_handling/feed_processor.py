@@ -1,81 +1,65 @@
-from datetime import datetime
-from trading_core.persistence import QuestDBPersistence
+from trading_core.persistence import DuckDBPersistence
+from trading_core.clock import Clock, WALL_CLOCK
+from data_handling.feed_codec import FeedRecord, normalize_feed
 import logging
 
 logger = logging.getLogger(__name__)
 
-def save_feed_data(persistence: QuestDBPersistence, symbol: str, feed: dict):
+def save_feed_data(persistence: DuckDBPersistence, symbol: str, feed: dict, clock: Clock = None):
     """
     Parses and saves raw feed data to QuestDB.
     This function is designed to be called from the data ingestion service.
     """
-    now = datetime.now()
-    full_feed = feed.get("fullFeed", {})
-    market = full_feed.get("marketFF") or full_feed.get("indexFF")
+    record = normalize_feed(symbol, feed)
+    if record is not None:
+        save_feed_record(persistence, record, clock)
 
-    if not market:
-        return
+def save_feed_record(persistence: DuckDBPersistence, record: FeedRecord, clock: Clock = None):
+    """
+    Saves a decoded bus record (see data_handling.feed_codec).
+    Writes one TICK row plus one CANDLE_<interval> row per OHLC entry.
+    processed_time comes from clock (default: wall clock).
+    """
+    now = (clock or WALL_CLOCK).now()
+    symbol = record.symbol
 
     # Process Tick and associated data
-    ltpc = market.get('ltpc')
-    if ltpc and 'ltp' in ltpc and 'ltt' in ltpc:
-        record = {
-            'timestamp': int(ltpc['ltt']) * 1_000_000,
-            'instrument_key': symbol,
-            'feed_type': 'TICK',
-            'insertion_time': int(ltpc['ltt']),
-            'processed_time': now,
-            'ltp': ltpc.get('ltp'),
-            'ltq': ltpc.get('ltq'),
-            'cp': market.get('cp'),
-            'oi': market.get('oi'),
-            'atp': market.get('atp'),
-            'vtt': market.get('vtt'),
-            'tbq': market.get('tbq'),
-            'tsq': market.get('tsq'),
-        }
-
-        market_level = market.get('marketLevel', {})
-        quotes = market_level.get('bidAskQuote', [])
-        if quotes:
-            record['bid_price_1'] = quotes[0].get('bidP')
-            record['bid_qty_1'] = quotes[0].get('bidQ')
-            record['ask_price_1'] = quotes[0].get('askP')
-            record['ask_qty_1'] = quotes[0].get('askQ')
-
-        option_greeks = full_feed.get('optionGreeks')
-        if option_greeks:
-            record.update({
-                'delta': option_greeks.get('delta'),
-                'theta': option_greeks.get('theta'),
-                'gamma': option_greeks.get('gamma'),
-                'vega': option_greeks.get('vega'),
-                'rho': option_greeks.get('rho'),
-                'iv': option_greeks.get('iv'),
-            })
-
+    if record.has_tick:
+        # One tick_data row in TICK_DATA_COLUMNS order, appended column-wise (no per-tick dict)
+        market = record.has_market
+        depth = record.depth[0] if record.depth else (None, None, None, None)
+        greeks = record.greeks or {}
+        row = (
+            record.ltt * 1_000_000, symbol, 'TICK',
+            record.ltp, record.ltt, record.ltq, record.cp,
+            record.oi if market else None, record.atp if market else None, record.vtt if market else None,
+            record.tbq if market else None, record.tsq if market else None,
+            greeks.get('delta'), greeks.get('theta'), greeks.get('gamma'), greeks.get('vega'), greeks.get('rho'),
+            record.iv if greeks else None,
+            depth[0], depth[1], depth[2], depth[3],
+            None, None, None, None,
+            record.ltt, now,
+        )
         try:
-            persistence.save_market_data(record)
+            persistence.save_market_data_values(row)
         except Exception as e:
             logger.error(f"Error saving tick data: {e}")
 
     # Process Candle Data
-    ohlc_list = market.get("marketOHLC", {}).get("ohlc", [])
-    for ohlc in ohlc_list:
-        if "interval" in ohlc:
-            candle_record = {
-                'timestamp': int(ohlc['ts']) * 1_000_000,
-                'instrument_key': symbol,
-                'feed_type': f'CANDLE_{ohlc["interval"]}',
-                'insertion_time': int(ohlc['ts']),
-                'processed_time': now,
-                'open': ohlc.get('open'),
-                'high': ohlc.get('high'),
-                'low': ohlc.get('low'),
-                'close': ohlc.get('close'),
-                'vtt': ohlc.get('vol')
-            }
-            try:
-                persistence.save_market_data(candle_record)
-            except Exception as e:
-                logger.error(f"Error saving candle data: {e}")
+    for ohlc in record.ohlc:
+        candle_row = {
+            'timestamp': ohlc.ts * 1_000_000,
+            'instrument_key': symbol,
+            'feed_type': f'CANDLE_{ohlc.interval}',
+            'insertion_time': ohlc.ts,
+            'processed_time': now,
+            'open': ohlc.open,
+            'high': ohlc.high,
+            'low': ohlc.low,
+            'close': ohlc.close,
+            'vtt': ohlc.vol
+        }
+        try:
+            persistence.save_market_data(candle_row)
+        except Exception as e:
+            logger.error(f"Error saving candle data: {e}")
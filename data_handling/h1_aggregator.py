@@ -7,12 +7,12 @@
 from collections import deque
 from typing import Dict, Optional, List
 from dataclasses import dataclass
-import time
 
 
 import config
+from trading_core.clock import WALL_CLOCK
 
-@dataclass
+@dataclass(slots=True)
 class H1Candle:
     """Aggregated Generic Candle (Timeframe specific)"""
     symbol: str
@@ -24,6 +24,29 @@ class H1Candle:
     ts: int  # Candle close timestamp (ms)
 
 
+class _OpenWindow:
+    """Running OHLCV of the 1-min candles in the current window (no per-candle storage)."""
+
+    __slots__ = ("open", "high", "low", "close", "volume", "ts", "count")
+
+    def __init__(self):
+        self.count = 0
+
+    def add(self, candle):
+        if self.count == 0:
+            self.open, self.high, self.low = candle.open, candle.high, candle.low
+            self.volume = 0
+        else:
+            if candle.high > self.high:
+                self.high = candle.high
+            if candle.low < self.low:
+                self.low = candle.low
+        self.close = candle.close
+        self.volume += candle.volume
+        self.ts = candle.ts
+        self.count += 1
+
+
 class H1Aggregator: # Kept name for compatibility, but acts as MultiFrameAggregator
     """
     Aggregates 1-minute candles into Timeframe candles.
@@ -34,14 +57,16 @@ class H1Aggregator: # Kept name for compatibility, but acts as MultiFrameAggrega
         self, 
         sma_period: int = config.SMA_PERIOD, 
         bias_confirm_candles: int = config.BIAS_CONFIRM_CANDLES, 
-        timeframe_minutes: int = config.BIAS_TIMEFRAME_MINUTES
+        timeframe_minutes: int = config.BIAS_TIMEFRAME_MINUTES,
+        clock=None
     ):
+        self.clock = clock or WALL_CLOCK
         self.sma_period = sma_period
         self.bias_confirm_candles = bias_confirm_candles
         self.timeframe_minutes = timeframe_minutes 
         
-        # symbol -> list of 1-min candles in current window
-        self.current_window: Dict[str, List[dict]] = {}
+        # symbol -> running OHLCV of the 1-min candles in current window
+        self.current_window: Dict[str, _OpenWindow] = {}
         
         # symbol -> deque of completed candles (for SMA calculation)
         self.history_candles: Dict[str, deque] = {}
@@ -75,7 +100,7 @@ class H1Aggregator: # Kept name for compatibility, but acts as MultiFrameAggrega
             return
             
         # Determine current window start
-        now_ms = int(time.time() * 1000)
+        now_ms = self.clock.now_ms()
         current_start = self._get_window_start(now_ms)
         
         # Load last N candles
@@ -162,7 +187,7 @@ class H1Aggregator: # Kept name for compatibility, but acts as MultiFrameAggrega
         
         # Initialize if first candle for symbol
         if symbol not in self.current_window:
-            self.current_window[symbol] = []
+            self.current_window[symbol] = _OpenWindow()
             self.history_candles[symbol] = deque(maxlen=self.sma_period + 10)
             self.window_start_ts[symbol] = self._get_window_start(candle_ts)
             self.bias[symbol] = None
@@ -181,35 +206,28 @@ class H1Aggregator: # Kept name for compatibility, but acts as MultiFrameAggrega
                 self._update_bias(symbol, completed_candle)
             
             # Reset for new window
-            self.current_window[symbol] = []
+            self.current_window[symbol].count = 0
             self.window_start_ts[symbol] = current_period_start
         
         # Add to current window
-        self.current_window[symbol].append({
-            "open": candle.open,
-            "high": candle.high,
-            "low": candle.low,
-            "close": candle.close,
-            "volume": candle.volume,
-            "ts": candle.ts
-        })
+        self.current_window[symbol].add(candle)
         
         return None
     
     def _aggregate_candle(self, symbol: str) -> Optional[H1Candle]:
         """Aggregate 1-min candles into timeframed candle"""
-        candles = self.current_window.get(symbol, [])
-        if not candles:
+        window = self.current_window.get(symbol)
+        if window is None or not window.count:
             return None
         
         return H1Candle(
             symbol=symbol,
-            open=candles[0]["open"],
-            high=max(c["high"] for c in candles),
-            low=min(c["low"] for c in candles),
-            close=candles[-1]["close"],
-            volume=sum(c["volume"] for c in candles),
-            ts=candles[-1]["ts"]
+            open=window.open,
+            high=window.high,
+            low=window.low,
+            close=window.close,
+            volume=window.volume,
+            ts=window.ts
         )
     
     def _calculate_sma(self, symbol: str) -> Optional[float]:
@@ -7,7 +7,7 @@ import requests
 from datetime import datetime, timedelta
 from typing import List, Dict
 import config
-from trading_core.persistence import QuestDBPersistence
+from trading_core.persistence import DuckDBPersistence
 from trading_core.models import Candle
 
 class HistoricalDataFetcher:
@@ -18,7 +18,7 @@ class HistoricalDataFetcher:
     
     BASE_URL = "https://api.upstox.com/v3"
     
-    def __init__(self, access_token: str, persistence: QuestDBPersistence):
+    def __init__(self, access_token: str, persistence: DuckDBPersistence):
         self.access_token = access_token
         self.headers = {
             "Content-Type": "application/json",
@@ -0,0 +1,130 @@
+# =========================
+# FILE: json_stream.py
+# =========================
+# Incremental reader for the recorded feed files in data/ (one gzipped JSON
+# array of Upstox feed messages per symbol).
+#
+# iter_json_array() decodes the top-level array one element at a time with
+# the stdlib C scanner (JSONDecoder.raw_decode) over a sliding text window,
+# so memory is bounded by the largest single element rather than by the
+# inflated file, and the first element is available after the first chunk.
+# iter_feed_events() turns those feed messages into Tick / Candle objects
+# for the backtester.
+
+import gzip
+import json
+from typing import IO, Iterator, Union
+
+from trading_core.models import Candle, Tick
+
+_WHITESPACE = " \t\n\r"
+_DECODER = json.JSONDecoder()
+
+
+def _open_text(source: Union[str, IO]) -> IO:
+    if not isinstance(source, str):
+        return source
+    if source.endswith(".gz"):
+        return gzip.open(source, "rt", encoding="utf-8")
+    return open(source, "r", encoding="utf-8")
+
+
+def iter_json_array(source: Union[str, IO], chunk_size: int = 1 << 16) -> Iterator:
+    """
+    Yields the elements of a top-level JSON array one by one.
+    source is a path (.gz is decompressed on the fly) or a text file object.
+    """
+    f = _open_text(source)
+    try:
+        buf = ""
+        pos = 0
+        eof = False
+        started = False
+
+        while True:
+            # Skip whitespace and separators between elements
+            while pos < len(buf) and (buf[pos] in _WHITESPACE or (started and buf[pos] == ",")):
+                pos += 1
+            if pos >= len(buf):
+                if eof:
+                    raise ValueError("Unexpected end of JSON array")
+                buf, pos = f.read(chunk_size), 0
+                eof = not buf
+                continue
+
+            if not started:
+                if buf[pos] != "[":
+                    raise ValueError(f"Expected a top-level JSON array, got {buf[pos]!r}")
+                started = True
+                pos += 1
+                continue
+            if buf[pos] == "]":
+                return
+
+            try:
+                value, end = _DECODER.raw_decode(buf, pos)
+                # The element is complete only once its separator is in the window:
+                # a number cut at the window edge ("2." of "2.5") also decodes
+                nxt = end
+                while nxt < len(buf) and buf[nxt] in _WHITESPACE:
+                    nxt += 1
+                if nxt < len(buf) and buf[nxt] not in ",]":
+                    if eof:
+                        raise ValueError(f"Expected ',' or ']' at offset {nxt} of the JSON window")
+                    complete = False
+                else:
+                    complete = nxt < len(buf) or eof
+            except json.JSONDecodeError:
+                if eof:
+                    raise
+                complete = False
+            if not complete:
+                chunk = f.read(chunk_size)
+                eof = not chunk
+                buf = buf[pos:] + chunk
+                pos = 0
+                continue
+
+            yield value
+            pos = end
+            # Drop the consumed prefix once it dominates the window
+            if pos > chunk_size:
+                buf, pos = buf[pos:], 0
+    finally:
+        if f is not source:
+            f.close()
+
+
+def iter_feed_events(symbol: str, source: Union[str, IO]) -> Iterator[Union[Tick, Candle]]:
+    """
+    Tick (from ltpc) and 1-minute Candle (marketOHLC I1) objects for symbol,
+    in file order. Malformed messages are reported and skipped.
+    """
+    for feed_data in iter_json_array(source):
+        try:
+            market_ff = feed_data.get("fullFeed", {}).get("marketFF", {})
+            ltpc = market_ff.get("ltpc", {})
+            if ltpc and 'ltp' in ltpc and 'ltt' in ltpc:
+                yield Tick(
+                    symbol=symbol,
+                    ltp=float(ltpc['ltp']),
+                    ts=int(ltpc['ltt']),
+                    volume=int(market_ff.get("vtt", 0)),
+                    total_buy_qty=int(market_ff.get("tbq", 0)),
+                    total_sell_qty=int(market_ff.get("tsq", 0))
+                )
+
+            for ohlc in market_ff.get("marketOHLC", {}).get("ohlc", []):
+                if ohlc.get("interval") == "I1":
+                    yield Candle(
+                        symbol=symbol,
+                        open=float(ohlc["open"]),
+                        high=float(ohlc["high"]),
+                        low=float(ohlc["low"]),
+                        close=float(ohlc["close"]),
+                        volume=int(ohlc.get("vol", 0)),
+                        ts=int(ohlc["ts"]),
+                    )
+        except (ValueError, TypeError, AttributeError) as e:
+            print(f"Skipping tick due to data error: {e}")
+            continue
@@ -0,0 +1,348 @@
+# =========================
+# FILE: tick_cache.py
+# =========================
+# Columnar cache of the recorded feed files for repeated backtests.
+#
+# build_cache() flattens each data/*.json.gz file once into a Parquet file
+# with one row per feed message: the ltpc tick (ltp, ltt, ltq, vtt, tbq,
+# tsq), the 5 bid/ask levels and the I1 candle (i1_* columns). A message
+# carrying more than one I1 candle gets extra rows with a null ltp, so file
+# order is preserved. A manifest (content hash of each source) makes
+# rebuilding a no-op until a source file changes.
+#
+# iter_cached_events() memory-maps the Parquet file and yields the same
+# Tick / Candle sequence as json_stream.iter_feed_events, without the JSON
+# parse and string -> int conversions. load_cached_replay() returns the same
+# events as columns instead: one TickBatch of every tick and the candles with
+# their row positions (LiveAuctionEngine.on_ticks).
+# SharedTickStream puts the same event columns into a shared memory block so
+# sweep workers read one copy.
+
+import glob
+import hashlib
+import json
+import os
+import time
+from multiprocessing import shared_memory
+from typing import Dict, Iterator, List, Optional, Tuple, Union
+
+import numpy as np
+
+import config
+from data_handling.json_stream import iter_json_array
+from trading_core.models import Candle, Tick, TickBatch
+
+try:
+    import pyarrow as pa
+    import pyarrow.parquet as pq
+except ImportError:  # optional; backtests fall back to streaming the JSON
+    pa = None
+    pq = None
+
+# Bump when the schema or the flattening changes: every entry is rebuilt
+CACHE_VERSION = 1
+DEPTH_LEVELS = 5
+
+
+def _schema():
+    fields = [
+        ("ltp", pa.float64()), ("ltt", pa.int64()), ("ltq", pa.int64()),
+        ("vtt", pa.int64()), ("tbq", pa.float64()), ("tsq", pa.float64()),
+    ]
+    for i in range(1, DEPTH_LEVELS + 1):
+        fields += [(f"bid_price_{i}", pa.float64()), (f"bid_qty_{i}", pa.int64()),
+                   (f"ask_price_{i}", pa.float64()), (f"ask_qty_{i}", pa.int64())]
+    fields += [
+        ("i1_ts", pa.int64()), ("i1_open", pa.float64()), ("i1_high", pa.float64()),
+        ("i1_low", pa.float64()), ("i1_close", pa.float64()), ("i1_vol", pa.int64()),
+    ]
+    return pa.schema(fields)
+
+
+def default_cache_dir() -> str:
+    return getattr(config, 'TICK_CACHE_DIR', os.path.join("data", "cache"))
+
+
+def cache_path(source: str, cache_dir: str = None) -> str:
+    name = os.path.basename(source)
+    while name.endswith((".gz", ".json")):
+        name = os.path.splitext(name)[0]
+    return os.path.join(cache_dir or default_cache_dir(), name + ".parquet")
+
+
+def file_hash(path: str) -> str:
+    digest = hashlib.sha256()
+    with open(path, "rb") as f:
+        for block in iter(lambda: f.read(1 << 20), b""):
+            digest.update(block)
+    return digest.hexdigest()
+
+
+def _manifest_path(cache_dir: str) -> str:
+    return os.path.join(cache_dir, "manifest.json")
+
+
+def load_manifest(cache_dir: str = None) -> Dict[str, dict]:
+    try:
+        with open(_manifest_path(cache_dir or default_cache_dir())) as f:
+            return json.load(f)
+    except (FileNotFoundError, ValueError):
+        return {}
+
+
+def _save_manifest(cache_dir: str, manifest: Dict[str, dict]):
+    path = _manifest_path(cache_dir)
+    tmp = path + ".tmp"
+    with open(tmp, "w") as f:
+        json.dump(manifest, f, indent=2, sort_keys=True)
+    os.replace(tmp, path)
+
+
+def _num(value, cast):
+    return None if value is None else cast(value)
+
+
+def flatten_feed_file(source: str):
+    """One source file -> pyarrow Table (see module header for the layout)."""
+    schema = _schema()
+    columns: Dict[str, List] = {name: [] for name in schema.names}
+    depth_names = [(f"bid_price_{i}", f"bid_qty_{i}", f"ask_price_{i}", f"ask_qty_{i}")
+                   for i in range(1, DEPTH_LEVELS + 1)]
+    empty_tick = {"ltp": None, "ltt": None, "ltq": None, "vtt": None, "tbq": None, "tsq": None}
+
+    def add_row(tick: dict, depth: list, i1: Optional[dict]):
+        for name, value in tick.items():
+            columns[name].append(value)
+        for i, names in enumerate(depth_names):
+            quote = depth[i] if i < len(depth) else {}
+            columns[names[0]].append(_num(quote.get("bidP"), float))
+            columns[names[1]].append(_num(quote.get("bidQ"), int))
+            columns[names[2]].append(_num(quote.get("askP"), float))
+            columns[names[3]].append(_num(quote.get("askQ"), int))
+        i1 = i1 or {}
+        columns["i1_ts"].append(_num(i1.get("ts"), int))
+        columns["i1_open"].append(_num(i1.get("open"), float))
+        columns["i1_high"].append(_num(i1.get("high"), float))
+        columns["i1_low"].append(_num(i1.get("low"), float))
+        columns["i1_close"].append(_num(i1.get("close"), float))
+        columns["i1_vol"].append(_num(i1.get("vol", 0), int) if i1 else None)
+
+    for feed_data in iter_json_array(source):
+        try:
+            market_ff = feed_data.get("fullFeed", {}).get("marketFF", {})
+            ltpc = market_ff.get("ltpc", {})
+            tick = empty_tick
+            if ltpc and 'ltp' in ltpc and 'ltt' in ltpc:
+                tick = {
+                    "ltp": float(ltpc['ltp']),
+                    "ltt": int(ltpc['ltt']),
+                    "ltq": _num(ltpc.get('ltq'), int),
+                    "vtt": int(market_ff.get("vtt", 0)),
+                    "tbq": float(market_ff.get("tbq", 0)),
+                    "tsq": float(market_ff.get("tsq", 0)),
+                }
+            depth = market_ff.get("marketLevel", {}).get("bidAskQuote", [])
+            candles = [o for o in market_ff.get("marketOHLC", {}).get("ohlc", []) if o.get("interval") == "I1"]
+        except (ValueError, TypeError, AttributeError) as e:
+            print(f"Skipping tick due to data error: {e}")
+            continue
+        if tick is empty_tick and not candles:
+            continue
+        add_row(tick, depth, candles[0] if candles else None)
+        for extra in candles[1:]:
+            add_row(empty_tick, [], extra)
+
+    return pa.Table.from_pydict(columns, schema=schema)
+
+
+def build_cache(sources: List[str], cache_dir: str = None, force: bool = False) -> Dict[str, dict]:
+    """
+    Converts every source whose content hash is not in the manifest (or
+    whose Parquet file is missing). Returns the manifest entries of sources.
+    """
+    if pa is None:
+        raise RuntimeError("pyarrow is required for the tick cache")
+    cache_dir = cache_dir or default_cache_dir()
+    os.makedirs(cache_dir, exist_ok=True)
+    manifest = load_manifest(cache_dir)
+
+    entries = {}
+    for source in sources:
+        key = os.path.basename(source)
+        target = cache_path(source, cache_dir)
+        digest = file_hash(source)
+        entry = manifest.get(key)
+        if (not force and entry and entry.get("sha256") == digest
+                and entry.get("version") == CACHE_VERSION and os.path.exists(target)):
+            entries[key] = entry
+            continue
+
+        start = time.perf_counter()
+        table = flatten_feed_file(source)
+        tmp = target + ".tmp"
+        pq.write_table(table, tmp)
+        os.replace(tmp, target)
+        entry = {
+            "sha256": digest,
+            "version": CACHE_VERSION,
+            "parquet": os.path.basename(target),
+            "rows": table.num_rows,
+            "built": time.time(),
+        }
+        manifest[key] = entry
+        entries[key] = entry
+        # Persist per file so an interrupted build keeps what it converted
+        _save_manifest(cache_dir, manifest)
+        print(f"Cached {key}: {table.num_rows} rows in {time.perf_counter() - start:.1f}s")
+    return entries
+
+
+def cached_table_path(source: str, cache_dir: str = None) -> Optional[str]:
+    """Parquet path for source if the cache is current, else None. Hashes the source."""
+    if pa is None:
+        return None
+    cache_dir = cache_dir or default_cache_dir()
+    entry = load_manifest(cache_dir).get(os.path.basename(source))
+    target = cache_path(source, cache_dir)
+    if (entry and entry.get("version") == CACHE_VERSION and os.path.exists(target)
+            and entry.get("sha256") == file_hash(source)):
+        return target
+    return None
+
+
+def ensure_cached(source: str, cache_dir: str = None) -> Optional[str]:
+    """Parquet path for source, converting it first if needed; None without pyarrow."""
+    if pa is None:
+        return None
+    path = cached_table_path(source, cache_dir)
+    if path is None:
+        build_cache([source], cache_dir)
+        path = cache_path(source, cache_dir)
+    return path
+
+
+def iter_cached_events(symbol: str, parquet_path: str) -> Iterator[Union[Tick, Candle]]:
+    """Tick / Candle objects from a cache file, in the order of the source messages."""
+    table = pq.read_table(parquet_path, memory_map=True,
+                          columns=["ltp", "ltt", "vtt", "tbq", "tsq",
+                                   "i1_ts", "i1_open", "i1_high", "i1_low", "i1_close", "i1_vol"])
+    for batch in table.to_batches():
+        cols = [batch.column(i).to_pylist() for i in range(batch.num_columns)]
+        for ltp, ltt, vtt, tbq, tsq, c_ts, c_open, c_high, c_low, c_close, c_vol in zip(*cols):
+            if ltp is not None:
+                yield Tick(symbol=symbol, ltp=ltp, ts=ltt, volume=vtt,
+                           total_buy_qty=int(tbq), total_sell_qty=int(tsq))
+            if c_ts is not None:
+                yield Candle(symbol=symbol, open=c_open, high=c_high, low=c_low,
+                             close=c_close, volume=c_vol, ts=c_ts)
+
+
+# Event columns held in shared memory. No tick: ltp is NaN; no candle: i1_ts is -1
+STREAM_DTYPE = np.dtype([
+    ("ltp", "f8"), ("ltt", "i8"), ("vtt", "i8"), ("tbq", "f8"), ("tsq", "f8"),
+    ("i1_ts", "i8"), ("i1_open", "f8"), ("i1_high", "f8"), ("i1_low", "f8"),
+    ("i1_close", "f8"), ("i1_vol", "i8"),
+])
+
+
+CANDLE_COLUMNS = ("i1_ts", "i1_open", "i1_high", "i1_low", "i1_close", "i1_vol")
+
+
+def _stream_columns(parquet_path: str) -> Dict[str, np.ndarray]:
+    """The STREAM_DTYPE columns of a cache file as arrays, nulls filled as in STREAM_DTYPE."""
+    table = pq.read_table(parquet_path, memory_map=True, columns=list(STREAM_DTYPE.names))
+    columns = {}
+    for name in STREAM_DTYPE.names:
+        fill = np.nan if STREAM_DTYPE[name].kind == "f" else -1
+        column = table.column(name).fill_null(fill)
+        columns[name] = column.to_numpy() if table.num_rows else np.empty(0, STREAM_DTYPE[name])
+    return columns
+
+
+def _replay_columns(symbol: str, columns) -> Tuple[TickBatch, List[Tuple[int, Candle]]]:
+    """
+    STREAM_DTYPE columns -> every tick as one TickBatch, and each candle with
+    the number of ticks before it (a message's tick comes before its candle).
+    """
+    tick_rows = np.flatnonzero(~np.isnan(columns["ltp"]))
+    candle_rows = np.flatnonzero(columns["i1_ts"] != -1)
+    # TBQ/TSQ truncated like the int() of iter_cached_events
+    ticks = TickBatch(symbol, columns["ltp"][tick_rows], columns["ltt"][tick_rows], columns["vtt"][tick_rows],
+                      np.trunc(columns["tbq"][tick_rows]), np.trunc(columns["tsq"][tick_rows]))
+    cuts = np.searchsorted(tick_rows, candle_rows, side="right").tolist()
+    candles = [
+        (cut, Candle(symbol=symbol, open=c_open, high=c_high, low=c_low, close=c_close, volume=c_vol, ts=c_ts))
+        for cut, c_ts, c_open, c_high, c_low, c_close, c_vol
+        in zip(cuts, *(columns[name][candle_rows].tolist() for name in CANDLE_COLUMNS))
+    ]
+    return ticks, candles
+
+
+def load_cached_replay(symbol: str, parquet_path: str) -> Tuple[TickBatch, List[Tuple[int, Candle]]]:
+    """A cache file as (ticks, [(row, candle)]) for LiveAuctionEngine.on_ticks."""
+    return _replay_columns(symbol, _stream_columns(parquet_path))
+
+
+class SharedTickStream:
+    """
+    One symbol's cached event columns in a multiprocessing shared memory
+    block. The creating process owns the block (close() unlinks it); other
+    processes attach() with the picklable handle and read without copying.
+
+        stream = SharedTickStream.create(parquet_path)
+        pool.submit(work, stream.handle)            # worker: SharedTickStream.attach(handle)
+        ...
+        stream.close()
+    """
+
+    def __init__(self, shm: shared_memory.SharedMemory, length: int, owner: bool):
+        self.shm = shm
+        self.length = length
+        self.owner = owner
+        self.records = np.ndarray((length,), dtype=STREAM_DTYPE, buffer=shm.buf)
+
+    @classmethod
+    def create(cls, parquet_path: str) -> "SharedTickStream":
+        columns = _stream_columns(parquet_path)
+        length = len(columns["ltp"])
+        shm = shared_memory.SharedMemory(create=True, size=max(1, length * STREAM_DTYPE.itemsize))
+        stream = cls(shm, length, owner=True)
+        for name, values in columns.items():
+            stream.records[name] = values
+        return stream
+
+    @property
+    def handle(self) -> Tuple[str, int]:
+        return self.shm.name, self.length
+
+    @classmethod
+    def attach(cls, handle: Tuple[str, int]) -> "SharedTickStream":
+        name, length = handle
+        return cls(shared_memory.SharedMemory(name=name), length, owner=False)
+
+    def events(self, symbol: str) -> Iterator[Union[Tick, Candle]]:
+        """Same Tick / Candle sequence as iter_cached_events."""
+        r = self.records
+        has_tick = (~np.isnan(r["ltp"])).tolist()
+        cols = [r[name].tolist() for name in STREAM_DTYPE.names]
+        for tick_ok, ltp, ltt, vtt, tbq, tsq, c_ts, c_open, c_high, c_low, c_close, c_vol in zip(has_tick, *cols):
+            if tick_ok:
+                yield Tick(symbol=symbol, ltp=ltp, ts=ltt, volume=vtt,
+                           total_buy_qty=int(tbq), total_sell_qty=int(tsq))
+            if c_ts != -1:
+                yield Candle(symbol=symbol, open=c_open, high=c_high, low=c_low,
+                             close=c_close, volume=c_vol, ts=c_ts)
+
+    def replay(self, symbol: str) -> Tuple[TickBatch, List[Tuple[int, Candle]]]:
+        """Same as load_cached_replay."""
+        return _replay_columns(symbol, {name: self.records[name] for name in STREAM_DTYPE.names})
+
+    def close(self):
+        self.records = None
+        self.shm.close()
+        if self.owner:
+            self.shm.unlink()
+
+
+def list_sources(data_dir: str = "data", pattern: str = "*.json.gz") -> List[str]:
+    return sorted(glob.glob(os.path.join(data_dir, pattern)))
@@ -0,0 +1,292 @@
+# =========================
+# FILE: tick_journal.py
+# =========================
+# Append-only, memory-mapped journal of raw bus frames.
+#
+# The ingestor appends every frame it receives (the exact bytes published on
+# the ZMQ bus, see feed_codec) before anything touches the database. A
+# JournalReplayer tails the journal and drains it into the database through
+# a WriteBehindQueue, committing a checkpoint only after each batch is
+# persisted. A slow or locked database therefore only grows replay lag, never
+# loses ticks, and the segments double as an exact raw-tick archive
+# (JournalReader can iterate them from any position).
+#
+# Layout: <dir>/<segment:010d>.seg, each preallocated to segment_size bytes.
+#   record : length(I) payload(length bytes)
+#   length == 0          -> end of written data (tail)
+#   length == 0xFFFFFFFF -> segment closed, continue in segment + 1
+# The payload is written before its length, so a reader never sees a
+# partially written record.
+
+import glob
+import json
+import logging
+import mmap
+import os
+import struct
+import threading
+import time
+from typing import Callable, Iterator, List, Optional, Tuple
+
+import config
+from data_handling.feed_codec import frame_recv_us
+from data_handling.write_behind import WriteBehindQueue
+
+logger = logging.getLogger(__name__)
+
+_LEN = struct.Struct("<I")
+_END_OF_SEGMENT = 0xFFFFFFFF
+
+Position = Tuple[int, int]  # (segment number, byte offset)
+
+
+def _segment_path(directory: str, segment: int) -> str:
+    return os.path.join(directory, f"{segment:010d}.seg")
+
+
+def list_segments(directory: str) -> List[int]:
+    return sorted(int(os.path.basename(p)[:-4]) for p in glob.glob(os.path.join(directory, "*.seg")))
+
+
+class TickJournal:
+    """Single-writer journal. append() is a memcpy into the mapped segment."""
+
+    def __init__(self, directory: str = None, segment_size: int = None):
+        self.directory = directory or getattr(config, 'JOURNAL_DIR', os.path.join("data", "journal"))
+        self.segment_size = segment_size or getattr(config, 'JOURNAL_SEGMENT_MB', 64) * 1024 * 1024
+        os.makedirs(self.directory, exist_ok=True)
+
+        self._file = None
+        self._mm: Optional[mmap.mmap] = None
+        self._lock = threading.Lock()  # append (may roll) vs sync() from another thread
+        self.segment = 0
+        self.offset = 0
+        self.appended = 0
+
+        segments = list_segments(self.directory)
+        if segments:
+            self._open(segments[-1])
+            self.offset = self._find_tail()
+            if self.offset is None:
+                # Last segment was closed (crash before the next one was created)
+                self._close_segment()
+                self._open(segments[-1] + 1)
+        else:
+            self._open(1)
+
+    def _open(self, segment: int):
+        path = _segment_path(self.directory, segment)
+        exists = os.path.exists(path)
+        self._file = open(path, "r+b" if exists else "w+b")
+        if not exists or os.path.getsize(path) == 0:
+            # New, or created but not yet preallocated when the writer crashed
+            self._file.truncate(self.segment_size)
+        self._mm = mmap.mmap(self._file.fileno(), 0)
+        self.segment = segment
+        self.offset = 0
+
+    def _find_tail(self) -> Optional[int]:
+        """Offset of the first free byte in the open segment, None if it is closed."""
+        offset = 0
+        size = len(self._mm)
+        while offset + _LEN.size <= size:
+            length = _LEN.unpack_from(self._mm, offset)[0]
+            if length == 0:
+                return offset
+            if length == _END_OF_SEGMENT:
+                return None
+            offset += _LEN.size + length
+        return None
+
+    def _roll(self):
+        if self.offset + _LEN.size <= len(self._mm):
+            _LEN.pack_into(self._mm, self.offset, _END_OF_SEGMENT)
+        self._close_segment()
+        self._open(self.segment + 1)
+
+    def _close_segment(self):
+        self._mm.flush()
+        self._mm.close()
+        self._file.close()
+
+    def append(self, payload: bytes) -> Position:
+        """Appends one frame; returns the position just after it."""
+        needed = _LEN.size + len(payload)
+        with self._lock:
+            # Keep room for the end-of-segment marker
+            if self.offset + needed + _LEN.size > len(self._mm):
+                if needed + _LEN.size > self.segment_size:
+                    raise ValueError(f"Frame of {len(payload)} bytes does not fit a journal segment")
+                self._roll()
+            start = self.offset + _LEN.size
+            self._mm[start:start + len(payload)] = payload
+            _LEN.pack_into(self._mm, self.offset, len(payload))  # publish last
+            self.offset = start + len(payload)
+            self.appended += 1
+            return self.segment, self.offset
+
+    def sync(self):
+        """Flushes dirty pages of the open segment to disk."""
+        with self._lock:
+            self._mm.flush()
+
+    def close(self):
+        with self._lock:
+            self._close_segment()
+
+
+class JournalReader:
+    """Reads frames from a position onwards; read() returns only what is already written."""
+
+    def __init__(self, directory: str = None, position: Position = None):
+        self.directory = directory or getattr(config, 'JOURNAL_DIR', os.path.join("data", "journal"))
+        if position is None:
+            segments = list_segments(self.directory)
+            position = (segments[0] if segments else 1, 0)
+        self.segment, self.offset = position
+        self._file = None
+        self._mm: Optional[mmap.mmap] = None
+
+    def _map(self) -> bool:
+        if self._mm is not None:
+            return True
+        path = _segment_path(self.directory, self.segment)
+        if not os.path.exists(path) or os.path.getsize(path) == 0:
+            return False  # not created (or not yet preallocated) by the writer
+        self._file = open(path, "rb")
+        self._mm = mmap.mmap(self._file.fileno(), 0, access=mmap.ACCESS_READ)
+        return True
+
+    def _unmap(self):
+        if self._mm is not None:
+            self._mm.close()
+            self._file.close()
+            self._mm = None
+
+    def seek(self, position: Position):
+        if position[0] != self.segment:
+            self._unmap()
+        self.segment, self.offset = position
+
+    def read(self, limit: int) -> List[Tuple[bytes, Position]]:
+        """Up to limit (payload, position after it) pairs, in journal order."""
+        out = []
+        while len(out) < limit and self._map():
+            mm = self._mm
+            if self.offset + _LEN.size > len(mm):
+                length = _END_OF_SEGMENT
+            else:
+                length = _LEN.unpack_from(mm, self.offset)[0]
+            if length == 0:
+                break  # caught up with the writer
+            if length == _END_OF_SEGMENT:
+                self._unmap()
+                self.segment += 1
+                self.offset = 0
+                continue
+            start = self.offset + _LEN.size
+            self.offset = start + length
+            out.append((mm[start:self.offset], (self.segment, self.offset)))
+        return out
+
+    def __iter__(self) -> Iterator[bytes]:
+        """Every frame currently in the journal from the start position (archive replay)."""
+        while True:
+            chunk = self.read(1000)
+            if not chunk:
+                return
+            for payload, _ in chunk:
+                yield payload
+
+    def close(self):
+        self._unmap()
+
+
+class JournalReplayer:
+    """
+    Tails the journal into `sink(payloads)` through a WriteBehindQueue and
+    checkpoints the position of the last persisted frame. On restart it
+    resumes from the checkpoint, so every journaled frame is written once
+    the database is reachable again (at-least-once: a crash between a sink
+    commit and the checkpoint write replays that batch).
+    """
+
+    def __init__(self, sink: Callable[[List[bytes]], None], directory: str = None,
+                 checkpoint_path: str = None, poll_interval: float = 0.05, name: str = "journal-replay"):
+        self.directory = directory or getattr(config, 'JOURNAL_DIR', os.path.join("data", "journal"))
+        self.checkpoint_path = checkpoint_path or os.path.join(self.directory, "checkpoint.json")
+        self.poll_interval = poll_interval
+        self.name = name
+        self.sink = sink
+
+        self.position = self._load_checkpoint()
+        self.reader = JournalReader(self.directory, self.position)
+        # The journal is the overflow store: block the replayer, retry the DB forever.
+        # put() gives up after block_timeout; _run then re-puts the same frame.
+        self.queue = WriteBehindQueue(sink=self._persist, policy="block", block_timeout=1.0,
+                                      max_retries=None, name=name)
+        self.put_timeouts = 0  # counted as dropped by the queue, but re-put here
+        self._stopping = threading.Event()
+        self._thread: Optional[threading.Thread] = None
+
+    def _load_checkpoint(self) -> Optional[Position]:
+        try:
+            with open(self.checkpoint_path) as f:
+                data = json.load(f)
+            return int(data["segment"]), int(data["offset"])
+        except FileNotFoundError:
+            return None
+        except (ValueError, KeyError) as e:
+            logger.error(f"[{self.name}] Unreadable checkpoint {self.checkpoint_path}: {e}; replaying from the start")
+            return None
+
+    def _save_checkpoint(self, position: Position):
+        tmp = self.checkpoint_path + ".tmp"
+        with open(tmp, "w") as f:
+            json.dump({"segment": position[0], "offset": position[1], "updated": time.time()}, f)
+        os.replace(tmp, self.checkpoint_path)
+        self.position = position
+
+    def _persist(self, items: List[Tuple[bytes, Position]]):
+        self.sink([payload for payload, _ in items])
+        self._save_checkpoint(items[-1][1])
+
+    def start(self):
+        self.queue.start()
+        self._thread = threading.Thread(target=self._run, name=f"{self.name}-tail", daemon=True)
+        self._thread.start()
+        logger.info(f"[{self.name}] Replaying journal from {self.position or 'the start'}")
+
+    def _run(self):
+        while not self._stopping.is_set():
+            start = (self.reader.segment, self.reader.offset)
+            records = self.reader.read(self.queue.max_batch)
+            if not records:
+                time.sleep(self.poll_interval)
+                continue
+            for payload, position in records:
+                # A frame is never skipped: while the DB stalls, keep offering it
+                while not self.queue.put((payload, position), origin_us=frame_recv_us(payload)):
+                    self.put_timeouts += 1
+                    if self.put_timeouts % 60 == 1:
+                        logger.warning(f"[{self.name}] Write-behind queue full, replay paused at {start}")
+                    if self._stopping.is_set():
+                        # The checkpoint never passed this frame; rewind so the reader agrees
+                        self.reader.seek(start)
+                        return
+                start = position
+
+    def stop(self):
+        self._stopping.set()
+        if self._thread:
+            self._thread.join()
+        self.queue.stop()
+        self.reader.close()
+
+    def metrics(self) -> dict:
+        m = self.queue.metrics()
+        m["dropped"] -= self.put_timeouts
+        m["put_timeouts"] = self.put_timeouts
+        m["checkpoint"] = list(self.position) if self.position else None
+        m["reader_position"] = [self.reader.segment, self.reader.offset]
+        return m
@@ -0,0 +1,313 @@
+# =========================
+# FILE: write_behind.py
+# =========================
+# Bounded write-behind stage between a producer (the ZMQ listener) and a slow
+# sink (DuckDB).
+#
+#   - Fixed-capacity ring buffer: memory no longer grows with a burst.
+#   - Overflow policy when the ring is full:
+#       "block"       producer waits (backpressure onto the ZMQ socket / HWM),
+#                     up to block_timeout, then the item is dropped
+#       "drop_oldest" oldest queued item is discarded
+#       "spill"       item is appended to a spill file and written later;
+#                     while the spill holds items, new items follow them into
+#                     it, so the ring (older) drains first, then the spill,
+#                     and frames reach the sink in put() order
+#   - Adaptive batch size (AIMD): grows while flushes stay under the target
+#     latency and the queue is backing up, halves when a flush is too slow.
+#   - metrics(): queue depth, batch size, flush latency, end-to-end lag and
+#     drop/spill counters; logged every metrics_interval seconds.
+#
+# Items carry an origin timestamp (epoch microseconds, e.g. the bus frame's
+# recv_us) so "lag" is measured from ingestion to the sink returning.
+
+import logging
+import os
+import struct
+import threading
+import time
+from typing import Callable, List, Optional, Tuple
+
+import config
+
+logger = logging.getLogger(__name__)
+
+POLICIES = ("block", "drop_oldest", "spill")
+
+_SPILL_HEADER = struct.Struct("<Iq")  # payload length, origin_us
+
+
+def _now_us() -> int:
+    return time.time_ns() // 1000
+
+
+class SpillFile:
+    """Append-only overflow file of (origin_us, bytes) records, read back in order."""
+
+    def __init__(self, path: str):
+        self.path = path
+        os.makedirs(os.path.dirname(path) or ".", exist_ok=True)
+        self._lock = threading.Lock()
+        self._writer = open(path, "ab")
+        self._reader = open(path, "rb")
+        self.pending = 0
+        # Records left over from a previous run are replayed first
+        self._reader.seek(0)
+        while True:
+            header = self._reader.read(_SPILL_HEADER.size)
+            if len(header) < _SPILL_HEADER.size:
+                break
+            length, _ = _SPILL_HEADER.unpack(header)
+            self._reader.seek(length, os.SEEK_CUR)
+            self.pending += 1
+        self._reader.seek(0)
+
+    def append(self, payload: bytes, origin_us: int):
+        with self._lock:
+            self._writer.write(_SPILL_HEADER.pack(len(payload), origin_us))
+            self._writer.write(payload)
+            self._writer.flush()
+            self.pending += 1
+
+    def read(self, limit: int) -> List[Tuple[bytes, int]]:
+        with self._lock:
+            out = []
+            while len(out) < limit and self.pending:
+                length, origin_us = _SPILL_HEADER.unpack(self._reader.read(_SPILL_HEADER.size))
+                out.append((self._reader.read(length), origin_us))
+                self.pending -= 1
+            if not self.pending:
+                # Fully drained: start the file over
+                self._writer.truncate(0)
+                self._writer.seek(0)
+                self._reader.seek(0)
+            return out
+
+    def close(self):
+        with self._lock:
+            self._writer.close()
+            self._reader.close()
+
+
+class WriteBehindQueue:
+    """
+    Usage:
+        queue = WriteBehindQueue(sink=persist_batch, name="ticks")
+        queue.start()
+        queue.put(payload, origin_us=recv_us)   # from the producer thread
+        ...
+        queue.stop()                            # drains what is left
+
+    `sink(items)` receives a list of queued items and must have made them
+    durable when it returns. A failing batch is retried max_retries times
+    (None = until it succeeds) and then counted as dropped. With policy
+    "spill" items must be bytes, or serializer/deserializer must convert them.
+    """
+
+    def __init__(self, sink: Callable[[List], None], capacity: int = None, policy: str = None,
+                 min_batch: int = None, max_batch: int = None, target_flush_ms: float = None,
+                 max_wait_ms: float = None, block_timeout: float = 1.0, spill_path: str = None,
+                 serializer: Callable = None, deserializer: Callable = None,
+                 metrics_interval: float = 30.0, max_retries: Optional[int] = 3, name: str = "write-behind"):
+        self.sink = sink
+        self.name = name
+        self.capacity = capacity or getattr(config, 'WRITE_BEHIND_CAPACITY', 50000)
+        self.policy = policy or getattr(config, 'WRITE_BEHIND_POLICY', "block")
+        if self.policy not in POLICIES:
+            raise ValueError(f"Unknown write-behind policy {self.policy!r} (expected one of {POLICIES})")
+        self.min_batch = min_batch or getattr(config, 'WRITE_BEHIND_MIN_BATCH', 50)
+        self.max_batch = max_batch or getattr(config, 'WRITE_BEHIND_MAX_BATCH', 5000)
+        self.target_flush_s = (target_flush_ms or getattr(config, 'WRITE_BEHIND_TARGET_FLUSH_MS', 200)) / 1000.0
+        self.max_wait_s = (max_wait_ms or getattr(config, 'WRITE_BEHIND_MAX_WAIT_MS', 500)) / 1000.0
+        self.block_timeout = block_timeout
+        self.metrics_interval = metrics_interval
+        self.max_retries = max_retries
+        self.serializer = serializer or (lambda item: item)
+        self.deserializer = deserializer or (lambda data: data)
+
+        self.spill: Optional[SpillFile] = None
+        if self.policy == "spill":
+            spill_dir = getattr(config, 'WRITE_BEHIND_SPILL_DIR', os.path.join("data", "spill"))
+            self.spill = SpillFile(spill_path or os.path.join(spill_dir, f"{name}.spill"))
+
+        # Ring buffer of (item, origin_us)
+        self._ring: List = [None] * self.capacity
+        self._head = 0  # next slot to read
+        self._count = 0
+        self._cond = threading.Condition()
+        self._stopping = False
+        self._thread: Optional[threading.Thread] = None
+
+        self.batch_size = self.min_batch
+        # Counters
+        self.enqueued = 0
+        self.persisted = 0
+        self.dropped = 0
+        self.spilled = 0
+        self.failures = 0
+        self.blocked_s = 0.0
+        self.max_depth = 0
+        self.last_flush_ms = 0.0
+        self.avg_flush_ms = 0.0
+        self.last_lag_ms = 0.0
+        self.max_lag_ms = 0.0
+
+    # ---------- producer side ----------
+
+    def put(self, item, origin_us: int = None) -> bool:
+        """Queues item. Returns False if it was dropped (never for drop_oldest/spill)."""
+        if origin_us is None:
+            origin_us = _now_us()
+        with self._cond:
+            if self.spill is not None and self.spill.pending:
+                return self._spill(item, origin_us)
+            if self._count >= self.capacity:
+                if self.policy == "block":
+                    start = time.perf_counter()
+                    self._cond.wait_for(lambda: self._count < self.capacity or self._stopping, self.block_timeout)
+                    self.blocked_s += time.perf_counter() - start
+                    if self._count >= self.capacity:
+                        self.dropped += 1
+                        return False
+                elif self.policy == "drop_oldest":
+                    self._ring[self._head] = None
+                    self._head = (self._head + 1) % self.capacity
+                    self._count -= 1
+                    self.dropped += 1
+                else:
+                    return self._spill(item, origin_us)
+
+            self._ring[(self._head + self._count) % self.capacity] = (item, origin_us)
+            self._count += 1
+            self.enqueued += 1
+            if self._count > self.max_depth:
+                self.max_depth = self._count
+            if self._count >= self.batch_size:
+                self._cond.notify_all()
+        return True
+
+    def _spill(self, item, origin_us: int) -> bool:
+        """Caller holds the condition."""
+        self.spill.append(self.serializer(item), origin_us)
+        self.spilled += 1
+        self.enqueued += 1
+        self._cond.notify_all()
+        return True
+
+    # ---------- consumer side ----------
+
+    def start(self):
+        self._thread = threading.Thread(target=self._run, name=f"{self.name}-persister", daemon=True)
+        self._thread.start()
+
+    def stop(self, timeout: float = 30.0):
+        """Stops accepting waits, drains the ring (and spill) and joins the persister."""
+        with self._cond:
+            self._stopping = True
+            self._cond.notify_all()
+        if self._thread:
+            self._thread.join(timeout)
+        if self.spill:
+            self.spill.close()
+
+    def _take(self, limit: int) -> List[Tuple[object, int]]:
+        """Pops up to limit items. Caller holds the condition."""
+        n = min(limit, self._count)
+        out = []
+        for _ in range(n):
+            out.append(self._ring[self._head])
+            self._ring[self._head] = None
+            self._head = (self._head + 1) % self.capacity
+        self._count -= n
+        if n:
+            self._cond.notify_all()  # wake blocked producers
+        return out
+
+    def _run(self):
+        last_metrics = time.monotonic()
+        while True:
+            with self._cond:
+                # Wait for a full batch, but never hold items longer than max_wait
+                self._cond.wait_for(
+                    lambda: self._count >= self.batch_size or self._stopping or (self.spill and self.spill.pending),
+                    self.max_wait_s,
+                )
+                backlog = self._count
+                batch = self._take(self.batch_size)
+                stopping = self._stopping
+
+            # Ring items predate everything in the spill (see put), so it goes second
+            if not batch and self.spill and self.spill.pending:
+                batch = [(self.deserializer(data), origin_us) for data, origin_us in self.spill.read(self.batch_size)]
+
+            if batch:
+                self._flush(batch, backlog)
+            elif stopping:
+                break
+
+            if time.monotonic() - last_metrics >= self.metrics_interval:
+                last_metrics = time.monotonic()
+                self.log_metrics()
+
+    def _flush(self, batch: List[Tuple[object, int]], backlog: int):
+        items = [item for item, _ in batch]
+        attempt = 0
+        while True:
+            start = time.perf_counter()
+            try:
+                self.sink(items)
+                break
+            except Exception as e:
+                self.failures += 1
+                logger.error(f"[{self.name}] Sink error (attempt {attempt + 1}): {e}")
+                if self.max_retries is not None and attempt >= self.max_retries:
+                    self.dropped += len(items)
+                    return
+                time.sleep(min(2 ** attempt * 0.1, 2.0))
+                attempt += 1
+        elapsed = time.perf_counter() - start
+
+        now_us = _now_us()
+        self.persisted += len(items)
+        self.last_flush_ms = elapsed * 1000
+        self.avg_flush_ms = self.last_flush_ms if not self.avg_flush_ms else 0.9 * self.avg_flush_ms + 0.1 * self.last_flush_ms
+        self.last_lag_ms = (now_us - batch[0][1]) / 1000  # oldest item in the batch
+        self.max_lag_ms = max(self.max_lag_ms, self.last_lag_ms)
+
+        # AIMD: additive increase while under target and backed up, halve when too slow
+        if elapsed > self.target_flush_s:
+            self.batch_size = max(self.min_batch, self.batch_size // 2)
+        elif backlog > self.batch_size:
+            self.batch_size = min(self.max_batch, self.batch_size + max(self.min_batch, self.batch_size // 4))
+
+    # ---------- metrics ----------
+
+    def metrics(self) -> dict:
+        with self._cond:
+            depth = self._count
+        return {
+            "queue_depth": depth,
+            "max_queue_depth": self.max_depth,
+            "capacity": self.capacity,
+            "batch_size": self.batch_size,
+            "flush_ms_last": round(self.last_flush_ms, 2),
+            "flush_ms_avg": round(self.avg_flush_ms, 2),
+            "lag_ms_last": round(self.last_lag_ms, 1),
+            "lag_ms_max": round(self.max_lag_ms, 1),
+            "enqueued": self.enqueued,
+            "persisted": self.persisted,
+            "dropped": self.dropped,
+            "spilled": self.spilled,
+            "spill_pending": self.spill.pending if self.spill else 0,
+            "blocked_s": round(self.blocked_s, 3),
+            "failures": self.failures,
+        }
+
+    def log_metrics(self):
+        m = self.metrics()
+        logger.info(
+            f"[{self.name}] depth={m['queue_depth']}/{m['capacity']} batch={m['batch_size']} "
+            f"flush={m['flush_ms_last']}ms (avg {m['flush_ms_avg']}) lag={m['lag_ms_last']}ms (max {m['lag_ms_max']}) "
+            f"persisted={m['persisted']} dropped={m['dropped']} spilled={m['spilled']} spill_pending={m['spill_pending']}"
+        )
+        self.max_lag_ms = 0.0
@@ -10,6 +10,9 @@ const state = {
     symbols: [],
     bars: [], // Array of {ts, levels: {price: {bid, ask}}}
     dom: { bids: {}, asks: {} },
+    ws: null,
+    fpSeq: null, // seq of the last footprint message applied for state.symbol
+    resyncPending: false,
     view: {
         offsetX: 0, // Time offset (pixels)
         offsetY: 0, // Price offset (pixels)
@@ -114,6 +117,7 @@ async function loadHistory(symbol) {
     setOverlay(`Loading ${symbol}...`);
     state.bars = [];
     state.symbol = symbol;
+    state.fpSeq = null;
 
     // Reset State cleanly for new symbol
     // Reset State cleanly for new symbol
@@ -179,6 +183,9 @@ async function loadHistory(symbol) {
             state.trades = [];
         }
 
+        // Live bar arrives as patches; subscribing sends the full current bar to start from
+        subscribeSymbol();
+
         // Attempt Auto-Center immediately after load
         checkAutoCenter();
 
@@ -196,10 +203,17 @@ async function loadHistory(symbol) {
 
 function connectWS() {
     const ws = new WebSocket(`ws://${location.host}/ws`);
+    state.ws = ws;
+    ws.onopen = () => {
+        state.resyncPending = false;
+        subscribeSymbol();
+    };
     ws.onmessage = (e) => {
         const msg = JSON.parse(e.data);
         if (msg.type === 'footprint' && msg.symbol === state.symbol) {
             handleFootprintUpdate(msg);
+        } else if (msg.type === 'footprint_delta' && msg.symbol === state.symbol) {
+            handleFootprintDelta(msg);
         } else if (msg.type === 'dom' && msg.symbol === state.symbol) {
             state.dom = msg;
             // drawDOM(); // drawDOM is handled in loop? No, it's separate canvas.
@@ -208,7 +222,26 @@ function connectWS() {
             checkAutoCenter();
         }
     };
-    ws.onclose = () => setTimeout(connectWS, 2000);
+    ws.onclose = () => {
+        state.fpSeq = null;
+        setTimeout(connectWS, 2000);
+    };
+}
+
+// Only the selected symbol's footprint/DOM is sent to this tab; the server
+// follows a subscribe with the full current footprint bar
+function subscribeSymbol() {
+    if (!state.symbol || !state.ws || state.ws.readyState !== WebSocket.OPEN) return;
+    state.resyncPending = true;
+    state.ws.send(JSON.stringify({ action: 'subscribe', symbols: [state.symbol], types: ['footprint', 'dom'] }));
+}
+
+// Ask the server for a full footprint bar after a seq gap
+function requestResync() {
+    if (!state.symbol || state.resyncPending) return;
+    if (!state.ws || state.ws.readyState !== WebSocket.OPEN) return;
+    state.resyncPending = true;
+    state.ws.send(JSON.stringify({ action: 'resync', symbol: state.symbol }));
 }
 
 // ... (Other functions) ...
@@ -279,7 +312,13 @@ function checkAutoCenter() {
     }
 }
 
+// Full bar: replaces whatever we had for msg.ts and (re)starts the patch stream
 function handleFootprintUpdate(msg) {
+    if (msg.seq !== undefined) {
+        state.fpSeq = msg.seq;
+        state.resyncPending = false;
+    }
+
     // Check if we have this bar
     const existing = state.bars.find(b => b.ts === msg.ts);
 
@@ -323,6 +362,40 @@ function handleFootprintUpdate(msg) {
     checkAutoCenter();
 }
 
+// Patch: only changed levels/aggregates, valid on top of seq === msg.base
+function handleFootprintDelta(msg) {
+    if (state.fpSeq === null || msg.base !== state.fpSeq) {
+        // Missed a message (or never had a full bar): drop patches until resynced
+        if (state.fpSeq !== null && msg.seq <= state.fpSeq) return; // stale duplicate
+        state.fpSeq = null;
+        requestResync();
+        return;
+    }
+
+    // Live bar is almost always the last one
+    let bar = state.bars[state.bars.length - 1];
+    if (!bar || bar.ts !== msg.ts) bar = state.bars.find(b => b.ts === msg.ts);
+    if (!bar) {
+        state.fpSeq = null;
+        requestResync();
+        return;
+    }
+
+    Object.entries(msg.levels).forEach(([pStr, val]) => {
+        const p = parseFloat(pStr);
+        const prev = bar.levels[p];
+        const prevVol = prev ? (prev.bid || 0) + (prev.ask || 0) : 0;
+        const vol = (val.bid || 0) + (val.ask || 0);
+        bar.levels[p] = val;
+        bar.totalVol += vol - prevVol;
+        if (vol > bar.maxVol) bar.maxVol = vol;
+    });
+    state.fpSeq = msg.seq;
+
+    calculateVolumeStats();
+    checkAutoCenter();
+}
+
 // --- Interaction ---
 
 function initInputAPI() {
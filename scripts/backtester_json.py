@@ -1,110 +1,136 @@
 # backtester_json.py
 import argparse
 import pandas as pd
-import json
-import gzip
+from data_handling.json_stream import iter_feed_events
+from data_handling.tick_cache import ensure_cached, iter_cached_events, load_cached_replay
 from trading_core.stage8_engine import LiveAuctionEngine
-from trading_core.persistence import QuestDBPersistence
+from trading_core.persistence import DuckDBPersistence, InMemoryPersistence
+from trading_core.clock import EventClock, PacedClock
+from trading_core.profiling import StackSampler, profile_call
 from trading_core.models import Tick, Trade, Candle
 import config
 
-def run_backtest(symbol: str, file_path: str):
+def make_engine(persistence=None, parameters: dict = None, clock=None) -> LiveAuctionEngine:
     """
-    Runs a backtest for a given symbol from a gzipped JSON file.
+    Simulation-mode engine for backtests. persistence defaults to a fresh
+    InMemoryPersistence; parameters go to the engine's config["parameters"].
+    clock defaults to an EventClock driven by the replayed tick timestamps.
     """
-    print(f"Running backtest for {symbol} from {file_path}...")
-
-    # 1. Initialize Engine and Persistence
-    persistence = QuestDBPersistence(db_name="auction_trading_backtest")
-    engine = LiveAuctionEngine(
-        config={
-            "simulation_mode": True,
-            "bias_timeframe_minutes": config.BIAS_TIMEFRAME_MINUTES,
-            "db_name": "auction_trading_backtest"
-        },
-        persistence=persistence
-    )
+    if persistence is None:
+        persistence = InMemoryPersistence()
+    engine_config = {
+        "simulation_mode": True,
+        "bias_timeframe_minutes": config.BIAS_TIMEFRAME_MINUTES,
+        "db_name": "auction_trading_backtest"
+    }
+    if parameters:
+        engine_config["parameters"] = dict(parameters)
+    engine = LiveAuctionEngine(config=engine_config, persistence=persistence, clock=clock or EventClock())
     engine.loadFromDb()
-
-    try:
-        # 2. Load data from the gzipped JSON file
-        with gzip.open(file_path, 'rt', encoding='utf-8') as f:
-            data = json.load(f)
-
-        if not data:
-            print(f"No data found in {file_path}.")
-            return
-
-        # 3. Simulate Live Ticks
-        print(f"Simulating {len(data)} ticks...")
-        for feed_data in data:
-            try:
-                market_ff = feed_data.get("fullFeed", {}).get("marketFF", {})
-                ltpc = market_ff.get("ltpc", {})
-                if ltpc and 'ltp' in ltpc and 'ltt' in ltpc:
-                    tick = Tick(
-                        symbol=symbol,
-                        ltp=float(ltpc['ltp']),
-                        ts=int(ltpc['ltt']),
-                    volume=int(market_ff.get("vtt", 0)),
-                        total_buy_qty=int(market_ff.get("tbq", 0)),
-                        total_sell_qty=int(market_ff.get("tsq", 0))
-                    )
-                    market_data = {
+    return engine
+
+def simulate(engine: LiveAuctionEngine, symbol: str, events, market_data_sink=None):
+    """Feeds Tick/Candle events to the engine. Returns (ticks, candles) simulated."""
+    ticks = candles = 0
+    for event in events:
+        try:
+            if isinstance(event, Tick):
+                tick = event
+                if market_data_sink is not None:
+                    market_data_sink.save_market_data({
                         "instrument_key": symbol,
                         "feed_type": "TICK",
-                        "timestamp": tick.ts,
+                        "timestamp": tick.ts * 1_000_000,  # ns, like feed_processor.save_feed_record
                         "ltp": tick.ltp,
                         "ltt": tick.ts,
                         "vtt": tick.volume,
                         "tbq": tick.total_buy_qty,
                         "tsq": tick.total_sell_qty,
                         "insertion_time": tick.ts,
-                        "processed_time": tick.ts
-                    }
-                    persistence.save_market_data(market_data)
-                    engine.on_tick(tick)
-
-                ohlc_list = market_ff.get("marketOHLC", {}).get("ohlc", [])
-                for ohlc in ohlc_list:
-                    if ohlc.get("interval") == "I1":
-                        candle = Candle(
-                            symbol=symbol,
-                            open=float(ohlc["open"]),
-                            high=float(ohlc["high"]),
-                            low=float(ohlc["low"]),
-                            close=float(ohlc["close"]),
-                            volume=int(ohlc.get("vol", 0)),
-                            ts=int(ohlc["ts"]),
-                        )
-
-                        market_data = {
-                            "instrument_key": symbol,
-                            "feed_type": "CANDLE_I1",
-                            "timestamp": candle.ts,
-                            "open": candle.open,
-                            "high": candle.high,
-                            "low": candle.low,
-                            "close": candle.close,
-                            "vtt": candle.volume,
-                            "insertion_time": candle.ts,
-                            "processed_time": candle.ts
-                        }
-                        persistence.save_market_data(market_data)
-                        engine.on_candle_close(candle)
-
-            except (ValueError, TypeError) as e:
-                print(f"Skipping tick due to data error: {e}")
-                continue
-
-        # 4. Summarize Results
+                        "processed_time": tick.ts * 1000  # us, event time (the replay's "now")
+                    })
+                engine.on_tick(tick)
+                ticks += 1
+            else:
+                candle = event
+                if market_data_sink is not None:
+                    market_data_sink.save_market_data({
+                        "instrument_key": symbol,
+                        "feed_type": "CANDLE_I1",
+                        "timestamp": candle.ts * 1_000_000,  # ns, like feed_processor.save_feed_record
+                        "open": candle.open,
+                        "high": candle.high,
+                        "low": candle.low,
+                        "close": candle.close,
+                        "vtt": candle.volume,
+                        "insertion_time": candle.ts,
+                        "processed_time": candle.ts * 1000  # us, event time (the replay's "now")
+                    })
+                engine.on_candle_close(candle)
+                candles += 1
+
+        except (ValueError, TypeError) as e:
+            print(f"Skipping tick due to data error: {e}")
+            continue
+    return ticks, candles
+
+def run_backtest(symbol: str, file_path: str, persistence=None, market_data_sink=None, use_cache: bool = True,
+                 parameters: dict = None, clock=None, broadcaster=None, profile: bool = False,
+                 batch_ticks: bool = True):
+    """
+    Runs a backtest for a given symbol from a gzipped JSON file and returns
+    the engine's closed trades.
+
+    persistence (engine state) defaults to a fresh InMemoryPersistence, so
+    each call is isolated. Replayed ticks/candles are only written back when
+    a market_data_sink (e.g. DuckDBPersistence) is given. With use_cache the
+    events come from the Parquet tick cache (built on first use), otherwise
+    the JSON file is streamed. Pass a PacedClock (and a broadcaster such as
+    UiBusPublisher) to watch a replay in the UI at N x real time. With
+    profile the per-stage call/time/rejection table is printed at the end.
+    With batch_ticks the cached events go to the engine as columns in one
+    LiveAuctionEngine.on_ticks call (same trades); paced replays, market
+    data write-back and the JSON stream always go event by event.
+    """
+    print(f"Running backtest for {symbol} from {file_path}...")
+
+    # 1. Initialize Engine and Persistence
+    engine = make_engine(persistence, parameters, clock)
+    if broadcaster is not None:
+        engine.set_broadcaster(broadcaster)
+    if profile:
+        engine.enable_profiling()
+
+    try:
+        # 2. Read the Parquet cache, or stream the gzipped JSON file
+        cached = ensure_cached(file_path) if use_cache else None
+        if cached and batch_ticks and market_data_sink is None and not isinstance(engine.clock, PacedClock):
+            batch, candle_rows = load_cached_replay(symbol, cached)
+            engine.on_ticks(batch, candle_rows)
+            ticks, candles = len(batch), len(candle_rows)
+        else:
+            events = iter_cached_events(symbol, cached) if cached else iter_feed_events(symbol, file_path)
+            ticks, candles = simulate(engine, symbol, events, market_data_sink)
+
+        if not ticks and not candles:
+            print(f"No data found in {file_path}.")
+            return []
+        print(f"Simulated {ticks} ticks and {candles} candles.")
+
+        # 3. Summarize Results
         trades = engine.trade_engine.closed_trades
         if trades:
             summarize(trades)
         else:
             print("No trades were executed during the backtest.")
+        return trades
 
     finally:
+        if market_data_sink is not None:
+            market_data_sink.flush_tick_buffer()
+        if engine.profiler is not None:
+            print("\n===== Stage Profile =====")
+            print(engine.profiler.format_table(per_symbol=False))
         print("Backtest complete.")
 
 def summarize(trades):
@@ -129,9 +155,37 @@ def main():
     parser = argparse.ArgumentParser(description="Run a backtest for the trading strategy from a JSON file.")
     parser.add_argument("--symbol", type=str, required=True, help="The symbol to backtest.")
     parser.add_argument("--file-path", type=str, required=True, help="The path to the gzipped JSON data file.")
+    parser.add_argument("--write-market-data", action="store_true",
+                        help="Also write the replayed ticks/candles into the DuckDB tick_data table.")
+    parser.add_argument("--no-cache", action="store_true", help="Parse the JSON file instead of the Parquet tick cache.")
+    parser.add_argument("--speed", type=float, default=None,
+                        help="Paced replay at SPEED x real time (default: as fast as possible, event time).")
+    parser.add_argument("--per-tick", action="store_true",
+                        help="Feed cached events one by one (on_tick/on_candle_close) instead of on_ticks.")
+    parser.add_argument("--ui", action="store_true", help="Publish UI messages to the API server (config.ZMQ_UI_URL).")
+    parser.add_argument("--profile", action="store_true", help="Print call counts, time and rejections per strategy stage.")
+    parser.add_argument("--flame", default=None, metavar="PATH",
+                        help="Write a sampled flame profile (folded stacks for flamegraph.pl/speedscope) to PATH.")
+    parser.add_argument("--cprofile", default=None, metavar="PATH", help="Run under cProfile and dump pstats to PATH.")
     args = parser.parse_args()
 
-    run_backtest(args.symbol, args.file_path)
+    sink = DuckDBPersistence() if args.write_market_data else None
+    clock = PacedClock(speed=args.speed) if args.speed else None
+    broadcaster = None
+    if args.ui:
+        from api.broadcaster import UiBusPublisher
+        broadcaster = UiBusPublisher()
+    kwargs = dict(market_data_sink=sink, use_cache=not args.no_cache, clock=clock,
+                  broadcaster=broadcaster, profile=args.profile, batch_ticks=not args.per_tick)
+    if args.cprofile:
+        profile_call(run_backtest, args.cprofile, args.symbol, args.file_path, **kwargs)
+        print(f"cProfile stats written to {args.cprofile}")
+    elif args.flame:
+        with StackSampler() as sampler:
+            run_backtest(args.symbol, args.file_path, **kwargs)
+        print(f"{sampler.write_folded(args.flame)} stack samples written to {args.flame}")
+    else:
+        run_backtest(args.symbol, args.file_path, **kwargs)
 
 if __name__ == "__main__":
     main()
@@ -0,0 +1,140 @@
+# scripts/batch_backtest.py
+# Backtests every symbol file in data/ in parallel and merges the results.
+#
+# Each file is one task on a ProcessPoolExecutor. A worker builds its own
+# LiveAuctionEngine on an InMemoryPersistence (no shared DuckDB file, no
+# write-back of the replayed ticks) and returns its closed trades as plain
+# dicts. Files are submitted largest first, so with enough workers the
+# wall time is that of the slowest file. Stale Parquet tick cache entries
+# are rebuilt up front in this process (workers only read the cache).
+#
+#   python scripts/batch_backtest.py                       # data/*.json.gz
+#   python scripts/batch_backtest.py --workers 4 --out trades.csv
+import sys
+import os
+import re
+import io
+import glob
+import time
+import argparse
+import contextlib
+from dataclasses import asdict
+from concurrent.futures import ProcessPoolExecutor, as_completed
+
+import pandas as pd
+
+# Add project root to path
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+from scripts.backtester_json import run_backtest
+from data_handling.tick_cache import build_cache, pa
+from trading_core.persistence import InMemoryPersistence
+
+# NSE_FO_51414_data.json.json.gz -> NSE_FO|51414
+_FILE_SYMBOL = re.compile(r"^([A-Z]+_[A-Z]+)_(.+?)_data\b")
+
+
+def symbol_from_path(path: str) -> str:
+    name = os.path.basename(path)
+    match = _FILE_SYMBOL.match(name)
+    if not match:
+        raise ValueError(f"Cannot derive an instrument key from {name}")
+    return f"{match.group(1)}|{match.group(2)}"
+
+
+def trade_pnl(trade: dict) -> float:
+    if trade.get("pnl") is not None:
+        return trade["pnl"]
+    if trade.get("exit_price") is None:
+        return float("nan")
+    if trade["side"] == "LONG":
+        return trade["exit_price"] - trade["entry_price"]
+    return trade["entry_price"] - trade["exit_price"]
+
+
+def backtest_file(path: str, verbose: bool = False, use_cache: bool = True) -> dict:
+    """Worker: one symbol file on an isolated in-memory persistence."""
+    symbol = symbol_from_path(path)
+    start = time.perf_counter()
+    log = io.StringIO()
+    with contextlib.redirect_stdout(sys.stdout if verbose else log):
+        trades = run_backtest(symbol, path, persistence=InMemoryPersistence(), use_cache=use_cache)
+    return {
+        "symbol": symbol,
+        "file": os.path.basename(path),
+        "elapsed": time.perf_counter() - start,
+        "trades": [asdict(t) for t in trades or []],
+    }
+
+
+def report(results: list) -> pd.DataFrame:
+    trades = [dict(t, pnl=trade_pnl(t)) for r in results for t in r["trades"]]
+    df = pd.DataFrame(trades, columns=["symbol", "side", "entry_price", "entry_ts", "stop_price", "tp_price",
+                                       "exit_price", "exit_ts", "reason", "pnl", "status"])
+
+    print("\n===== Batch Backtest =====")
+    print(f"{'symbol':<22} {'trades':>6} {'wins':>5} {'win%':>6} {'pnl':>10} {'sec':>7}")
+    for r in sorted(results, key=lambda r: r["symbol"]):
+        sym = df[df["symbol"] == r["symbol"]]
+        wins = int((sym["pnl"] > 0).sum())
+        win_rate = 100.0 * wins / len(sym) if len(sym) else 0.0
+        print(f"{r['symbol']:<22} {len(sym):>6} {wins:>5} {win_rate:>5.1f}% {sym['pnl'].sum():>10.2f} {r['elapsed']:>7.1f}")
+
+    if not df.empty:
+        print("\nBy side:")
+        print(df.groupby("side")["pnl"].agg(["count", "sum", "mean"]))
+        print("\nBy exit reason:")
+        print(df.groupby("reason")["pnl"].agg(["count", "sum", "mean"]))
+    wins = int((df["pnl"] > 0).sum())
+    print(f"\nTotal: {len(df)} trades, {wins} wins, pnl {df['pnl'].sum():.2f}")
+    return df
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Backtest all symbol files in parallel and merge the trades.")
+    parser.add_argument("--data-dir", default="data")
+    parser.add_argument("--pattern", default="*.json.gz")
+    parser.add_argument("--workers", type=int, default=None,
+                        help="Worker processes (default: one per file, at most the CPU count).")
+    parser.add_argument("--out", default=None, help="Write the merged closed trades to this CSV.")
+    parser.add_argument("--verbose", action="store_true", help="Keep the engines' console output.")
+    parser.add_argument("--no-cache", action="store_true", help="Parse the JSON files instead of the Parquet tick cache.")
+    args = parser.parse_args()
+
+    files = sorted(glob.glob(os.path.join(args.data_dir, args.pattern)), key=os.path.getsize, reverse=True)
+    if not files:
+        print(f"No files matching {args.pattern} in {args.data_dir}.")
+        return
+    use_cache = not args.no_cache and pa is not None
+    if use_cache:
+        build_cache(files)
+    workers = args.workers or min(len(files), os.cpu_count() or 1)
+    print(f"Backtesting {len(files)} files on {workers} workers...")
+
+    start = time.perf_counter()
+    results = []
+    with ProcessPoolExecutor(max_workers=workers) as pool:
+        futures = {pool.submit(backtest_file, path, args.verbose, use_cache): path for path in files}
+        for future in as_completed(futures):
+            path = futures[future]
+            try:
+                result = future.result()
+            except Exception as e:
+                print(f"FAILED {os.path.basename(path)}: {e}")
+                continue
+            results.append(result)
+            print(f"  done {result['symbol']:<22} {len(result['trades']):>4} trades  {result['elapsed']:6.1f}s")
+    wall = time.perf_counter() - start
+
+    df = report(results)
+    if results:
+        slowest = max(r["elapsed"] for r in results)
+        serial = sum(r["elapsed"] for r in results)
+        print(f"\nWall {wall:.1f}s | slowest file {slowest:.1f}s | serial sum {serial:.1f}s ({serial / wall:.1f}x)")
+    if args.out:
+        df.to_csv(args.out, index=False)
+        print(f"Trades written to {args.out}")
+
+
+if __name__ == "__main__":
+    main()
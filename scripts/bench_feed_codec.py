@@ -0,0 +1,81 @@
+# scripts/bench_feed_codec.py
+# Compares encode/decode cost of the binary bus format (data_handling.feed_codec)
+# against the previous json.dumps / json.loads path, using the recorded
+# Upstox feeds in data/*.json.gz.
+import sys
+import os
+import glob
+import gzip
+import json
+import time
+import argparse
+
+# Add project root to path
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+from data_handling.feed_codec import encode_feeds, decode_frame
+
+
+def load_frames(data_dir: str, feeds_per_frame: int, max_frames: int):
+    """Builds Upstox-shaped messages ({"type", "feeds", "currentTs"}) from the recorded files."""
+    entries = []
+    for path in sorted(glob.glob(os.path.join(data_dir, "*.json.gz"))):
+        with gzip.open(path, 'rt', encoding='utf-8') as f:
+            for feed in json.load(f)[:max_frames]:
+                entries.append(feed)
+
+    frames = []
+    for i in range(0, len(entries), feeds_per_frame):
+        chunk = entries[i:i + feeds_per_frame]
+        # Mimic a multi-instrument live message; suffix keeps keys unique within a frame
+        feeds = {f"{feed.get('instrumentKey', 'NSE_FO|0')}#{j}": feed for j, feed in enumerate(chunk)}
+        frames.append({"type": "live_feed", "feeds": feeds, "currentTs": "1765771373160"})
+    return frames
+
+
+def bench(label, fn, items, repeat):
+    best = float('inf')
+    for _ in range(repeat):
+        start = time.perf_counter()
+        for item in items:
+            fn(item)
+        best = min(best, time.perf_counter() - start)
+    per_frame_us = best / len(items) * 1e6
+    print(f"{label:<28} {best * 1000:10.1f} ms   {per_frame_us:8.1f} us/frame")
+    return best
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark binary feed codec vs JSON.")
+    parser.add_argument("--data-dir", default="data")
+    parser.add_argument("--feeds-per-frame", type=int, default=25)
+    parser.add_argument("--max-per-file", type=int, default=2000)
+    parser.add_argument("--repeat", type=int, default=3)
+    args = parser.parse_args()
+
+    frames = load_frames(args.data_dir, args.feeds_per_frame, args.max_per_file)
+    if not frames:
+        print(f"No data found in {args.data_dir}")
+        return
+    print(f"{len(frames)} frames x {args.feeds_per_frame} feeds\n")
+
+    json_payloads = [json.dumps(f).encode('utf-8') for f in frames]
+    wire_payloads = [encode_feeds(f) for f in frames]
+
+    t_json_enc = bench("json.dumps (encode)", lambda f: json.dumps(f).encode('utf-8'), frames, args.repeat)
+    t_wire_enc = bench("feed_codec (encode)", encode_feeds, frames, args.repeat)
+    t_json_dec = bench("json.loads (decode)", lambda p: json.loads(p.decode('utf-8')), json_payloads, args.repeat)
+    t_wire_dec = bench("feed_codec (decode)", decode_frame, wire_payloads, args.repeat)
+
+    json_bytes = sum(len(p) for p in json_payloads)
+    wire_bytes = sum(len(p) for p in wire_payloads)
+
+    print("\n===== Summary =====")
+    print(f"Encode speedup : {t_json_enc / t_wire_enc:5.2f}x")
+    # Each subscriber (strategy, DB writer, API server) pays the decode cost
+    print(f"Decode speedup : {t_json_dec / t_wire_dec:5.2f}x")
+    print(f"Payload size   : json {json_bytes / 1e6:.2f} MB vs wire {wire_bytes / 1e6:.2f} MB ({wire_bytes / json_bytes:.0%})")
+
+
+if __name__ == "__main__":
+    main()
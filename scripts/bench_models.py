@@ -0,0 +1,167 @@
+# scripts/bench_models.py
+# Memory, allocations and construction time of the hot-path models
+# (trading_core.models): the previous __dict__ dataclass (kept below as
+# LegacyTick), the slotted dataclass, and TickBatch columns. Also times the
+# H1Aggregator 1-min window (previously one dict per candle, now running
+# OHLCV) and PressureTracker.update per Tick vs update_batch per TickBatch.
+#
+#   python scripts/bench_models.py --ticks 200000
+import sys
+import os
+import gc
+import time
+import random
+import argparse
+import tracemalloc
+from dataclasses import dataclass
+
+# Add project root to path
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+from trading_core.models import Candle, Tick, TickBatch
+from data_handling.h1_aggregator import _OpenWindow
+from strategy.pressure_tracker import PressureTracker
+
+
+@dataclass
+class LegacyTick:
+    symbol: str
+    ltp: float
+    ts: int
+    volume: int = 0
+    total_buy_qty: int = 0
+    total_sell_qty: int = 0
+    side: str = ""
+
+
+def make_columns(count: int, symbols: int, seed: int):
+    rng = random.Random(seed)
+    names = [f"NSE_FO|{50000 + i}" for i in range(symbols)]
+    cols = {"symbol": [], "ltp": [], "ts": [], "volume": [], "total_buy_qty": [], "total_sell_qty": []}
+    tbq, tsq, vtt = 100000, 100000, 0
+    for n in range(count):
+        tbq += rng.randint(-300, 400)
+        tsq += rng.randint(-300, 300)
+        vtt += rng.randint(0, 50)
+        cols["symbol"].append(names[n % symbols])
+        cols["ltp"].append(round(100 + rng.random(), 2))
+        cols["ts"].append(1765771200000 + n * 10)
+        cols["volume"].append(vtt)
+        cols["total_buy_qty"].append(tbq)
+        cols["total_sell_qty"].append(tsq)
+    return cols
+
+
+def measure(label, build, count):
+    """Live bytes and allocated blocks per item of whatever build() returns, and its build time."""
+    gc.collect()
+    tracemalloc.start()
+    before = tracemalloc.take_snapshot()
+    start = time.perf_counter()
+    result = build()
+    elapsed = time.perf_counter() - start
+    after = tracemalloc.take_snapshot()
+    tracemalloc.stop()
+    stats = after.compare_to(before, "filename")
+    size = sum(s.size_diff for s in stats)
+    blocks = sum(s.count_diff for s in stats)
+    print(f"{label:<34} {size / count:8.1f} B/tick {blocks / count:7.2f} allocs/tick "
+          f"{elapsed / count * 1e6:7.2f} us/tick (traced)")
+    return result
+
+
+def bench(label, fn, count, repeat):
+    best = float('inf')
+    for _ in range(repeat):
+        start = time.perf_counter()
+        fn()
+        best = min(best, time.perf_counter() - start)
+    print(f"{label:<34} {best * 1000:10.1f} ms   {best / count * 1e6:8.2f} us/item")
+    return best
+
+
+class LegacyWindow:
+    """The previous H1Aggregator window: one dict per 1-min candle, aggregated on close."""
+
+    def __init__(self):
+        self.candles = []
+
+    def add(self, candle):
+        self.candles.append({"open": candle.open, "high": candle.high, "low": candle.low,
+                             "close": candle.close, "volume": candle.volume, "ts": candle.ts})
+
+    def close(self):
+        c = self.candles
+        bar = (c[0]["open"], max(x["high"] for x in c), min(x["low"] for x in c), c[-1]["close"],
+               sum(x["volume"] for x in c), c[-1]["ts"])
+        self.candles = []
+        return bar
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark slotted / columnar models.")
+    parser.add_argument("--ticks", type=int, default=200000)
+    parser.add_argument("--symbols", type=int, default=10)
+    parser.add_argument("--batch", type=int, default=500, help="Rows per TickBatch for update_batch.")
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--repeat", type=int, default=3)
+    args = parser.parse_args()
+
+    cols = make_columns(args.ticks, args.symbols, args.seed)
+    rows = list(zip(cols["symbol"], cols["ltp"], cols["ts"], cols["volume"],
+                    cols["total_buy_qty"], cols["total_sell_qty"]))
+    n = len(rows)
+    print(f"{n} ticks over {args.symbols} symbols\n")
+
+    print("--- holding every tick ---")
+    measure("dataclass Tick (__dict__)", lambda: [LegacyTick(*r) for r in rows], n)
+    ticks = measure("dataclass(slots=True) Tick", lambda: [Tick(*r) for r in rows], n)
+    measure("TickBatch (columns)", lambda: TickBatch(**cols), n)
+
+    print("\n--- construction ---")
+    bench("dataclass Tick (__dict__)", lambda: [LegacyTick(*r) for r in rows], n, args.repeat)
+    bench("dataclass(slots=True) Tick", lambda: [Tick(*r) for r in rows], n, args.repeat)
+    bench("TickBatch (columns)", lambda: TickBatch(**cols), n, args.repeat)
+
+    print("\n--- H1 window, 60 one-minute candles per bar ---")
+    candles = [Candle(symbol="NSE_FO|50000", open=t.ltp, high=t.ltp + 0.5, low=t.ltp - 0.5,
+                      close=t.ltp, volume=t.volume % 1000, ts=t.ts) for t in ticks[:n // 4]]
+
+    def legacy_window():
+        window = LegacyWindow()
+        for i, c in enumerate(candles):
+            window.add(c)
+            if i % 60 == 59:
+                window.close()
+
+    def running_window():
+        window = _OpenWindow()
+        for i, c in enumerate(candles):
+            window.add(c)
+            if i % 60 == 59:
+                (window.open, window.high, window.low, window.close, window.volume, window.ts)
+                window.count = 0
+
+    bench("dict per candle (previous)", legacy_window, len(candles), args.repeat)
+    bench("running OHLCV (H1Aggregator)", running_window, len(candles), args.repeat)
+
+    print("\n--- PressureTracker ---")
+    batches = [TickBatch(**{k: v[i:i + args.batch] for k, v in cols.items()})
+               for i in range(0, n, args.batch)]
+
+    def per_tick():
+        tracker = PressureTracker()
+        for tick in ticks:
+            tracker.update(tick)
+
+    def per_batch():
+        tracker = PressureTracker()
+        for batch in batches:
+            tracker.update_batch(batch)
+
+    bench("update (Tick objects)", per_tick, n, args.repeat)
+    bench(f"update_batch ({args.batch}-row TickBatch)", per_batch, n, args.repeat)
+
+
+if __name__ == "__main__":
+    main()
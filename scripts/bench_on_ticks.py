@@ -0,0 +1,84 @@
+# scripts/bench_on_ticks.py
+# Per-event replay (simulate: on_tick / on_candle_close per cached event)
+# versus the columnar LiveAuctionEngine.on_ticks(batch, candles) over the
+# data/ files. Closed trades, renko bricks and pressure windows are checked
+# equal first. Also times the tick part alone: on_tick per Tick with no
+# trade open versus one _advance_ticks call.
+#
+#   python scripts/bench_on_ticks.py
+#   python scripts/bench_on_ticks.py --pattern "NSE_FO_60166*" --repeat 5
+import sys
+import os
+import io
+import glob
+import time
+import argparse
+import contextlib
+from dataclasses import astuple
+
+# Add project root to path
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+from scripts.backtester_json import make_engine, simulate
+from scripts.batch_backtest import symbol_from_path
+from data_handling.tick_cache import ensure_cached, iter_cached_events, load_cached_replay
+
+
+def best_of(repeat, fn):
+    best = float('inf')
+    for _ in range(repeat):
+        with contextlib.redirect_stdout(io.StringIO()):
+            engine = make_engine()
+            start = time.perf_counter()
+            fn(engine)
+            best = min(best, time.perf_counter() - start)
+    return best, engine
+
+
+def state(engine, symbol):
+    return ([astuple(t) for t in engine.trade_engine.closed_trades],
+            [astuple(b) for b in engine.renko_aggregator.get_bricks(symbol)],
+            engine.pressure_tracker.snapshots(symbol))
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark per-event replay vs LiveAuctionEngine.on_ticks.")
+    parser.add_argument("--data-dir", default="data")
+    parser.add_argument("--pattern", default="*.json.gz")
+    parser.add_argument("--repeat", type=int, default=3)
+    args = parser.parse_args()
+
+    totals = [0.0, 0.0, 0.0, 0.0]
+    print(f"{'symbol':<24} {'ticks':>7} {'trades':>6} {'per-event':>10} {'on_ticks':>10} "
+          f"{'tick part':>10} {'batched':>10}")
+    for path in sorted(glob.glob(os.path.join(args.data_dir, args.pattern))):
+        symbol = symbol_from_path(path)
+        cached = ensure_cached(path)
+        events = list(iter_cached_events(symbol, cached))
+        batch, candles = load_cached_replay(symbol, cached)
+        ticks = list(batch)
+
+        per_event, reference = best_of(args.repeat, lambda e: simulate(e, symbol, events))
+        batched, engine = best_of(args.repeat, lambda e: e.on_ticks(batch, candles))
+        if state(engine, symbol) != state(reference, symbol):
+            print(f"MISMATCH for {symbol}")
+            return
+
+        def tick_loop(e):
+            for tick in ticks:
+                e.on_tick(tick)
+
+        tick_part, _ = best_of(args.repeat, tick_loop)
+        tick_batched, _ = best_of(args.repeat, lambda e: e._advance_ticks(batch))
+
+        timings = (per_event, batched, tick_part, tick_batched)
+        totals = [t + x for t, x in zip(totals, timings)]
+        print(f"{symbol:<24} {len(batch):>7} {len(engine.trade_engine.closed_trades):>6} "
+              + " ".join(f"{x * 1000:8.1f}ms" for x in timings))
+
+    print(f"{'total':<24} {'':>7} {'':>6} " + " ".join(f"{x * 1000:8.1f}ms" for x in totals))
+    print(f"\nreplay {totals[0] / totals[1]:.2f}x, tick part {totals[2] / totals[3]:.2f}x")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,179 @@
+# scripts/bench_pressure_tracker.py
+# Compares strategy.pressure_tracker.PressureTracker (per-symbol ring arrays,
+# O(1) queries) against the previous deque-of-PressureSnapshot version, kept
+# below as DequePressureTracker. Ticks are synthetic random walks of
+# TBQ/TSQ over several symbols; every query result is checked against the
+# deque version before timing.
+#
+#   python scripts/bench_pressure_tracker.py --ticks 200000 --window 30
+import sys
+import os
+import time
+import random
+import argparse
+from collections import deque
+
+# Add project root to path
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+from strategy.pressure_tracker import PressureTracker, PressureSnapshot
+from trading_core.models import Tick
+
+
+class DequePressureTracker:
+    """The previous implementation: a deque of snapshots, queries copy / rescan it."""
+
+    def __init__(self, window: int = 30):
+        self.window = window
+        self.history = {}
+        self.last_tbq = {}
+        self.last_tsq = {}
+
+    def _get_history(self, symbol):
+        if symbol not in self.history:
+            self.history[symbol] = deque(maxlen=self.window)
+        return self.history[symbol]
+
+    def update(self, tick):
+        symbol = tick.symbol
+        history = self._get_history(symbol)
+        if symbol in self.last_tbq:
+            if tick.total_buy_qty == self.last_tbq[symbol] and tick.total_sell_qty == self.last_tsq[symbol]:
+                return
+        history.append(PressureSnapshot(ts=tick.ts, tbq=tick.total_buy_qty, tsq=tick.total_sell_qty, ltp=tick.ltp))
+        self.last_tbq[symbol] = tick.total_buy_qty
+        self.last_tsq[symbol] = tick.total_sell_qty
+
+    def get_pressure_ratio(self, symbol):
+        history = self._get_history(symbol)
+        if len(history) < 2:
+            return 0.0
+        tbq_delta = history[-1].tbq - history[0].tbq
+        tsq_delta = history[-1].tsq - history[0].tsq
+        total = abs(tbq_delta) + abs(tsq_delta)
+        return (tbq_delta - tsq_delta) / total if total else 0.0
+
+    def is_trending(self, symbol, threshold=0.5):
+        return abs(self.get_pressure_ratio(symbol)) > threshold
+
+    def pressure_supports(self, symbol, side):
+        ratio = self.get_pressure_ratio(symbol)
+        return ratio > 0.2 if side == "LONG" else ratio < -0.2
+
+    def check_exhaustion_aggression(self, symbol, side, tick_count=10):
+        history = self._get_history(symbol)
+        if len(history) < tick_count:
+            return False
+        recent = list(history)[-tick_count:]
+        tbq_delta = recent[-1].tbq - recent[0].tbq
+        tsq_delta = recent[-1].tsq - recent[0].tsq
+        if side == "LONG":
+            return tsq_delta > tbq_delta * 1.5 and tsq_delta > 0
+        return tbq_delta > tsq_delta * 1.5 and tbq_delta > 0
+
+    def get_pressure_momentum(self, symbol):
+        history = self._get_history(symbol)
+        if len(history) < 10:
+            return 0.0
+        mid = len(history) // 2
+        first_half = list(history)[:mid]
+        second_half = list(history)[mid:]
+        tbq1 = first_half[-1].tbq - first_half[0].tbq
+        tsq1 = first_half[-1].tsq - first_half[0].tsq
+        total1 = abs(tbq1) + abs(tsq1)
+        ratio1 = (tbq1 - tsq1) / total1 if total1 > 0 else 0
+        tbq2 = second_half[-1].tbq - second_half[0].tbq
+        tsq2 = second_half[-1].tsq - second_half[0].tsq
+        total2 = abs(tbq2) + abs(tsq2)
+        ratio2 = (tbq2 - tsq2) / total2 if total2 > 0 else 0
+        return ratio2 - ratio1
+
+    def reset(self, symbol):
+        if symbol in self.history:
+            self.history[symbol].clear()
+        self.last_tbq.pop(symbol, None)
+        self.last_tsq.pop(symbol, None)
+
+
+def make_ticks(count: int, symbols: int, seed: int):
+    rng = random.Random(seed)
+    books = {f"NSE_FO|{50000 + i}": [100000, 100000, 100.0] for i in range(symbols)}
+    names = list(books)
+    ticks = []
+    for n in range(count):
+        symbol = rng.choice(names)
+        book = books[symbol]
+        if rng.random() < 0.8:  # some ticks repeat TBQ/TSQ and are skipped
+            book[0] = max(0, book[0] + rng.randint(-500, 600))
+            book[1] = max(0, book[1] + rng.randint(-500, 500))
+        book[2] += rng.choice((-0.05, 0.0, 0.05))
+        ticks.append(Tick(symbol=symbol, ts=1765771200000 + n * 10, ltp=round(book[2], 2),
+                          total_buy_qty=book[0], total_sell_qty=book[1]))
+    return ticks
+
+
+def queries(tracker, tick):
+    """The open-trade path of LiveAuctionEngine.on_tick, plus momentum."""
+    symbol = tick.symbol
+    return (tracker.is_trending(symbol),
+            tracker.check_exhaustion_aggression(symbol, "LONG", tick_count=10),
+            tracker.pressure_supports(symbol, "SHORT"),
+            tracker.get_pressure_ratio(symbol),
+            tracker.get_pressure_momentum(symbol))
+
+
+def run_updates(tracker, ticks):
+    for tick in ticks:
+        tracker.update(tick)
+
+
+def run_with_queries(tracker, ticks):
+    for tick in ticks:
+        tracker.update(tick)
+        queries(tracker, tick)
+
+
+def bench(label, fn, make_tracker, ticks, repeat):
+    best = float('inf')
+    for _ in range(repeat):
+        tracker = make_tracker()
+        start = time.perf_counter()
+        fn(tracker, ticks)
+        best = min(best, time.perf_counter() - start)
+    per_tick_us = best / len(ticks) * 1e6
+    print(f"{label:<36} {best * 1000:10.1f} ms   {per_tick_us:8.2f} us/tick")
+    return best
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark PressureTracker ring arrays vs deque snapshots.")
+    parser.add_argument("--ticks", type=int, default=200000)
+    parser.add_argument("--symbols", type=int, default=20)
+    parser.add_argument("--window", type=int, default=30)
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--repeat", type=int, default=3)
+    args = parser.parse_args()
+
+    ticks = make_ticks(args.ticks, args.symbols, args.seed)
+    print(f"{len(ticks)} ticks over {args.symbols} symbols, window {args.window}\n")
+
+    ring, reference = PressureTracker(args.window), DequePressureTracker(args.window)
+    for n, tick in enumerate(ticks):
+        ring.update(tick)
+        reference.update(tick)
+        if queries(ring, tick) != queries(reference, tick):
+            print(f"MISMATCH at tick {n} ({tick.symbol})")
+            return
+        if n % 5000 == 4999:
+            ring.reset(tick.symbol)
+            reference.reset(tick.symbol)
+
+    window = args.window
+    bench("deque: update", run_updates, lambda: DequePressureTracker(window), ticks, args.repeat)
+    bench("ring:  update", run_updates, lambda: PressureTracker(window), ticks, args.repeat)
+    bench("deque: update + 5 queries", run_with_queries, lambda: DequePressureTracker(window), ticks, args.repeat)
+    bench("ring:  update + 5 queries", run_with_queries, lambda: PressureTracker(window), ticks, args.repeat)
+
+
+if __name__ == "__main__":
+    main()
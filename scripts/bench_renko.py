@@ -0,0 +1,184 @@
+# scripts/bench_renko.py
+# strategy.renko_aggregator.RenkoAggregator (per-symbol series, NumPy batch
+# path) against the previous single shared aggregator, kept below as
+# SharedRenkoAggregator, over the data/ files. Per file (one symbol, where
+# the shared version was correct) the bricks of on_tick and on_ticks are
+# checked equal to it before timing. A merged two-symbol stream then shows
+# the isolation: the per-symbol bricks must equal each symbol run alone.
+#
+#   python scripts/bench_renko.py
+#   python scripts/bench_renko.py --mode fixed --value 0.5
+import sys
+import os
+import glob
+import time
+import argparse
+from dataclasses import astuple
+
+import numpy as np
+
+# Add project root to path
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+from strategy.renko_aggregator import RenkoAggregator
+from scripts.batch_backtest import symbol_from_path
+from data_handling.tick_cache import ensure_cached, load_cached_replay
+from trading_core.models import Candle, TickBatch
+
+
+class SharedRenkoAggregator:
+    """The previous implementation: one 1-second bar / ATR / brick state for every symbol."""
+
+    def __init__(self, on_renko_brick, brick_size_mode='atr', brick_size_value=2.0):
+        self.on_renko_brick = on_renko_brick
+        self.brick_size_mode = brick_size_mode
+        self.brick_size_value = brick_size_value
+        self.last_tick = None
+        self.current_1s_bar = None
+        self.atr_period = 14
+        self.atr_smoothing = 14
+        self.true_ranges = []
+        self.atr = None
+        self.bricks = []
+        self.last_brick_price = None
+
+    def on_tick(self, tick):
+        if self.last_tick is None:
+            self.last_tick = tick
+        tick_ts_sec = tick.ts // 1000
+        last_tick_ts_sec = self.last_tick.ts // 1000
+        if tick_ts_sec > last_tick_ts_sec:
+            if self.current_1s_bar:
+                self._finalize_1s_bar(last_tick_ts_sec)
+            self.current_1s_bar = {"open": tick.ltp, "high": tick.ltp, "low": tick.ltp, "close": tick.ltp, "volume": 0}
+        elif self.current_1s_bar:
+            self.current_1s_bar["high"] = max(self.current_1s_bar["high"], tick.ltp)
+            self.current_1s_bar["low"] = min(self.current_1s_bar["low"], tick.ltp)
+            self.current_1s_bar["close"] = tick.ltp
+        self.last_tick = tick
+
+    def _finalize_1s_bar(self, ts_sec):
+        bar = self.current_1s_bar
+        high, low, close = bar["high"], bar["low"], bar["close"]
+        prev_close = self.bricks[-1].close if self.bricks else close
+        tr = max(high - low, abs(high - prev_close), abs(low - prev_close))
+        self.true_ranges.append(tr)
+        if len(self.true_ranges) > self.atr_period:
+            self.true_ranges.pop(0)
+        if len(self.true_ranges) == self.atr_period:
+            if self.atr is None:
+                self.atr = np.mean(self.true_ranges)
+            else:
+                self.atr = (self.atr * (self.atr_smoothing - 1) + tr) / self.atr_smoothing
+        self._update_renko(close, ts_sec)
+        self.current_1s_bar = None
+
+    def _get_brick_size(self, close):
+        if self.brick_size_mode == 'fixed':
+            return self.brick_size_value
+        elif self.brick_size_mode == 'percentage':
+            return close * (self.brick_size_value / 100)
+        elif self.brick_size_mode == 'atr':
+            return self.atr * self.brick_size_value if self.atr else self.brick_size_value
+        return self.brick_size_value
+
+    def _update_renko(self, close, ts_sec):
+        if self.last_brick_price is None:
+            self.last_brick_price = close
+        brick_size = self._get_brick_size(close)
+        price_diff = close - self.last_brick_price
+        num_bricks = int(abs(price_diff) // brick_size)
+        if num_bricks == 0:
+            return
+        brick_direction = 1 if price_diff > 0 else -1
+        for i in range(num_bricks):
+            open_price = self.last_brick_price + (i * brick_size * brick_direction)
+            close_price = open_price + (brick_size * brick_direction)
+            brick = Candle(symbol=self.last_tick.symbol, open=open_price, high=max(open_price, close_price),
+                           low=min(open_price, close_price), close=close_price, volume=0, ts=ts_sec * 1000)
+            self.bricks.append(brick)
+            self.on_renko_brick(brick)
+        self.last_brick_price += num_bricks * brick_size * brick_direction
+
+
+def timed(fn):
+    start = time.perf_counter()
+    fn()
+    return time.perf_counter() - start
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark per-symbol / batch Renko vs the shared aggregator.")
+    parser.add_argument("--data-dir", default="data")
+    parser.add_argument("--pattern", default="*.json.gz")
+    parser.add_argument("--mode", default="atr", choices=("atr", "fixed", "percentage"))
+    parser.add_argument("--value", type=float, default=2.0)
+    parser.add_argument("--repeat", type=int, default=3)
+    args = parser.parse_args()
+
+    def noop(brick):
+        pass
+
+    totals = [0.0, 0.0, 0.0]
+    batches = {}
+    print(f"{'symbol':<24} {'ticks':>7} {'bricks':>7} {'shared':>10} {'on_tick':>10} {'on_ticks':>10}")
+    for path in sorted(glob.glob(os.path.join(args.data_dir, args.pattern))):
+        symbol = symbol_from_path(path)
+        batch, _ = load_cached_replay(symbol, ensure_cached(path))
+        batches[symbol] = batch
+        ticks = list(batch)
+
+        shared = SharedRenkoAggregator(noop, args.mode, args.value)
+        per_tick = RenkoAggregator(noop, args.mode, args.value)
+        batched = RenkoAggregator(noop, args.mode, args.value)
+        for tick in ticks:
+            shared.on_tick(tick)
+            per_tick.on_tick(tick)
+        batched.on_ticks(batch)
+        reference = [astuple(b) for b in shared.bricks]
+        if ([astuple(b) for b in per_tick.get_bricks(symbol)] != reference
+                or [astuple(b) for b in batched.get_bricks(symbol)] != reference):
+            print(f"MISMATCH for {symbol}")
+            return
+
+        def run_shared():
+            aggregator = SharedRenkoAggregator(noop, args.mode, args.value)
+            for tick in ticks:
+                aggregator.on_tick(tick)
+
+        def run_per_tick():
+            aggregator = RenkoAggregator(noop, args.mode, args.value)
+            for tick in ticks:
+                aggregator.on_tick(tick)
+
+        def run_batch():
+            RenkoAggregator(noop, args.mode, args.value).on_ticks(batch)
+
+        timings = [min(timed(fn) for _ in range(args.repeat)) for fn in (run_shared, run_per_tick, run_batch)]
+        totals = [t + x for t, x in zip(totals, timings)]
+        print(f"{symbol:<24} {len(batch):>7} {len(reference):>7} "
+              + " ".join(f"{x * 1000:8.1f}ms" for x in timings))
+
+    print(f"{'total':<24} {'':>7} {'':>7} " + " ".join(f"{x * 1000:8.1f}ms" for x in totals))
+    print(f"\non_ticks vs shared per-tick: {totals[0] / totals[2]:.2f}x")
+
+    # Two symbols interleaved by timestamp: each must get the bricks it gets alone
+    if len(batches) >= 2:
+        (a, first), (b, second) = list(batches.items())[:2]
+        order = np.argsort(np.concatenate([first.ts, second.ts]), kind="stable")
+        merged = TickBatch(np.concatenate([first.symbols(), second.symbols()])[order],
+                           np.concatenate([first.ltp, second.ltp])[order],
+                           np.concatenate([first.ts, second.ts])[order])
+        together = RenkoAggregator(noop, args.mode, args.value)
+        together.on_ticks(merged)
+        isolated = True
+        for symbol, batch in ((a, first), (b, second)):
+            alone = RenkoAggregator(noop, args.mode, args.value)
+            alone.on_ticks(batch)
+            isolated &= ([astuple(x) for x in together.get_bricks(symbol)]
+                         == [astuple(x) for x in alone.get_bricks(symbol)])
+        print(f"{a} + {b} interleaved: per-symbol bricks {'match' if isolated else 'DIFFER from'} separate runs")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,101 @@
+# scripts/bench_renko_endpoint.py
+# The /api/renko computation over a scratch DuckDB filled with the data/
+# files' ticks: the previous path (fetch every tick, build a TickBatch,
+# RenkoAggregator.on_ticks) versus DuckDB 1-second bars + on_bars
+# (compute_renko), and a RenkoCache hit. Bricks are checked equal first.
+#
+#   python scripts/bench_renko_endpoint.py
+#   python scripts/bench_renko_endpoint.py --mode fixed --value 0.5
+import sys
+import os
+import glob
+import time
+import argparse
+import tempfile
+from datetime import datetime, timedelta, timezone
+
+import numpy as np
+import pandas as pd
+
+# Add project root to path
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+from api.renko_cache import RenkoCache, compute_renko
+from scripts.batch_backtest import symbol_from_path
+from data_handling.tick_cache import ensure_cached, load_cached_replay
+from strategy.renko_aggregator import RenkoAggregator
+from trading_core.models import TickBatch
+from trading_core.persistence import DuckDBPersistence
+
+
+def previous_renko(persistence, symbol, from_date, to_date, brick_mode, brick_value):
+    """The endpoint before bar pushdown: every tick leaves DuckDB."""
+    tick_data = persistence.fetch_tick_data(symbol, from_date, to_date).dropna(subset=["ltp"])
+    batch = TickBatch(symbol, ltp=tick_data["ltp"].to_numpy(dtype=np.float64),
+                      ts=tick_data["ts"].to_numpy().astype("datetime64[ms]").astype(np.int64))
+    bricks = RenkoAggregator(brick_size_mode=brick_mode, brick_size_value=brick_value).on_ticks(batch)
+    return {"ts": [b.ts for b in bricks], "open": [b.open for b in bricks], "close": [b.close for b in bricks]}
+
+
+def day(ts_ms, offset=0):
+    return (datetime.fromtimestamp(ts_ms / 1000, timezone.utc).date() + timedelta(days=offset)).isoformat()
+
+
+def best_of(repeat, fn):
+    best, result = float('inf'), None
+    for _ in range(repeat):
+        start = time.perf_counter()
+        result = fn()
+        best = min(best, time.perf_counter() - start)
+    return best, result
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark the /api/renko computation and cache.")
+    parser.add_argument("--data-dir", default="data")
+    parser.add_argument("--pattern", default="*.json.gz")
+    parser.add_argument("--mode", default="atr", choices=("atr", "fixed", "percentage"))
+    parser.add_argument("--value", type=float, default=2.0)
+    parser.add_argument("--repeat", type=int, default=3)
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as tmp:
+        persistence = DuckDBPersistence(db_path=os.path.join(tmp, "renko.duckdb"))
+        conn = persistence._get_conn()
+        ranges = {}
+        for path in sorted(glob.glob(os.path.join(args.data_dir, args.pattern))):
+            symbol = symbol_from_path(path)
+            batch, _ = load_cached_replay(symbol, ensure_cached(path))
+            frame = pd.DataFrame({"timestamp": batch.ts.astype("datetime64[ms]"), "instrument_key": symbol,
+                                  "ltp": batch.ltp})
+            conn.register("ticks_df", frame)
+            conn.execute("INSERT INTO tick_data (timestamp, instrument_key, ltp) SELECT * FROM ticks_df")
+            conn.unregister("ticks_df")
+            ranges[symbol] = (len(batch), day(batch.ts.min()), day(batch.ts.max(), 1))
+
+        totals = [0.0, 0.0, 0.0]
+        print(f"{'symbol':<24} {'ticks':>7} {'bricks':>7} {'all ticks':>10} {'1s bars':>10} {'cached':>10}")
+        for symbol, (ticks, from_date, to_date) in ranges.items():
+            key = (symbol, from_date, to_date, args.mode, args.value)
+            previous, reference = best_of(args.repeat, lambda: previous_renko(persistence, *key))
+            pushdown, result = best_of(args.repeat, lambda: compute_renko(persistence, *key))
+            if any(result[k] != reference[k] for k in ("ts", "open", "close")):
+                print(f"MISMATCH for {symbol}")
+                return
+
+            cache = RenkoCache()
+            cache.get(persistence, *key)
+            cached, _ = best_of(args.repeat, lambda: cache.get(persistence, *key))
+
+            timings = (previous, pushdown, cached)
+            totals = [t + x for t, x in zip(totals, timings)]
+            print(f"{symbol:<24} {ticks:>7} {len(result['ts']):>7} "
+                  + " ".join(f"{x * 1000:8.2f}ms" for x in timings))
+
+        print(f"{'total':<24} {'':>7} {'':>7} " + " ".join(f"{x * 1000:8.2f}ms" for x in totals))
+        print(f"\n1s-bar pushdown {totals[0] / totals[1]:.2f}x, cache hit {totals[0] / totals[2]:.0f}x")
+        persistence.close_thread_connection()
+
+
+if __name__ == "__main__":
+    main()
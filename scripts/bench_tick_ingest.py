@@ -0,0 +1,103 @@
+# scripts/bench_tick_ingest.py
+# Throughput (rows/sec) of tick_data ingestion into DuckDB:
+#   legacy   : list of dicts -> pandas DataFrame -> reindex(28 cols) -> INSERT (previous flush_tick_buffer)
+#   dict rows: DuckDBPersistence.save_market_data(dict) into the columnar buffer
+#   values   : DuckDBPersistence.save_market_data_values(tuple), the feed processor's path
+# Synthetic rows follow scripts/stress_test_duckdb.py.
+import sys
+import os
+import time
+import random
+import argparse
+import tempfile
+from datetime import datetime
+
+import pandas as pd
+
+# Add project root to path
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+from trading_core.persistence import DuckDBPersistence
+from trading_core.tick_buffer import TICK_DATA_COLUMNS, pa
+
+SYMBOLS = ["NIFTY_FUT", "BANKNIFTY_FUT", "RELIANCE_EQ", "HDFCBANK_EQ"]
+COLUMN_NAMES = [name for name, _ in TICK_DATA_COLUMNS]
+
+
+def generate_mock_tick(instrument_key):
+    """Same shape as stress_test_duckdb.generate_mock_tick."""
+    now = datetime.now()
+    return {
+        'timestamp': now, 'instrument_key': instrument_key, 'feed_type': 'TICK_DATA',
+        'ltp': round(random.uniform(100.0, 500.0), 2), 'ltt': int(now.timestamp() * 1000),
+        'ltq': random.randint(1, 1000), 'vtt': random.randint(1000, 100000),
+        'atp': round(random.uniform(100.0, 500.0), 2), 'open': round(random.uniform(100.0, 500.0), 2),
+        'high': round(random.uniform(100.0, 500.0), 2), 'low': round(random.uniform(100.0, 500.0), 2),
+        'close': round(random.uniform(100.0, 500.0), 2), 'insertion_time': now, 'processed_time': now,
+    }
+
+
+def legacy_ingest(conn, rows, batch_size):
+    """The pre-columnar flush_tick_buffer, reproduced for comparison."""
+    buffer = []
+    for row in rows:
+        buffer.append(row)
+        if len(buffer) >= batch_size:
+            df = pd.DataFrame(buffer)
+            df = df.reindex(columns=COLUMN_NAMES, fill_value=None)
+            conn.register('tick_buffer', df)
+            conn.execute('INSERT INTO tick_data SELECT * FROM tick_buffer')
+            conn.unregister('tick_buffer')
+            buffer.clear()
+
+
+def columnar_dict_ingest(persistence, rows, batch_size):
+    for row in rows:
+        persistence.save_market_data(row)
+    persistence.flush_tick_buffer()
+
+
+def columnar_values_ingest(persistence, rows, batch_size):
+    for values in rows:
+        persistence.save_market_data_values(values)
+    persistence.flush_tick_buffer()
+
+
+def run(label, fn, target, rows, batch_size, conn):
+    conn.execute("DELETE FROM tick_data")
+    start = time.perf_counter()
+    fn(target, rows, batch_size)
+    elapsed = time.perf_counter() - start
+    count = conn.execute("SELECT COUNT(*) FROM tick_data").fetchone()[0]
+    print(f"{label:<12} {len(rows) / elapsed:12,.0f} rows/sec   ({elapsed:6.2f}s, {count} rows stored)")
+    return elapsed
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark tick_data ingestion paths.")
+    parser.add_argument("--rows", type=int, default=200_000)
+    parser.add_argument("--batch-size", type=int, default=1000)
+    args = parser.parse_args()
+
+    db_path = os.path.join(tempfile.mkdtemp(), "bench_tick_ingest.duckdb")
+    persistence = DuckDBPersistence(db_path=db_path)
+    persistence.buffer_limit = args.batch_size
+    conn = persistence._get_conn()
+
+    print(f"{args.rows:,} rows, batch {args.batch_size}, arrow={'yes' if pa is not None else 'no (pandas fallback)'}\n")
+    dict_rows = [generate_mock_tick(random.choice(SYMBOLS)) for _ in range(args.rows)]
+    value_rows = [tuple(row.get(name) for name in COLUMN_NAMES) for row in dict_rows]
+
+    t_legacy = run("legacy", legacy_ingest, conn, dict_rows, args.batch_size, conn)
+    t_dict = run("dict rows", columnar_dict_ingest, persistence, dict_rows, args.batch_size, conn)
+    t_values = run("values", columnar_values_ingest, persistence, value_rows, args.batch_size, conn)
+
+    print("\n===== Summary =====")
+    print(f"dict rows vs legacy : {t_legacy / t_dict:5.2f}x")
+    print(f"values vs legacy    : {t_legacy / t_values:5.2f}x")
+
+    persistence.shutdown()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,114 @@
+# scripts/bench_value_area.py
+# Compares the value-area computations of strategy.auction_theory on random
+# volume profiles: the level-by-level Python walk VolumeProfile used before
+# (on a pandas Series and on a list), value_area() per profile, and
+# value_area_batch() over all profiles in one call. Every method is checked
+# against the walk before timing.
+#
+#   python scripts/bench_value_area.py --levels 400 --profiles 2000
+import sys
+import os
+import time
+import argparse
+
+import numpy as np
+import pandas as pd
+
+# Add project root to path
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+from strategy.auction_theory import value_area, value_area_batch
+
+
+def walk_series(profile: pd.Series, pct: float):
+    """The previous VolumeProfile._calculate_value_area (positions instead of prices)."""
+    target = profile.sum() * pct
+    poc = int(profile.values.argmax())
+    upper = lower = poc
+    current = profile.iloc[poc]
+    while current < target:
+        up = profile.iloc[upper + 1] if upper + 1 < len(profile) else -1
+        down = profile.iloc[lower - 1] if lower - 1 >= 0 else -1
+        if up == -1 and down == -1:
+            break
+        if up > down:
+            upper += 1
+            current += up
+        else:
+            lower -= 1
+            current += down
+    return poc, upper, lower
+
+
+def walk_list(volumes: np.ndarray, pct: float):
+    target = volumes.sum() * pct
+    poc = int(volumes.argmax())
+    values = volumes.tolist()
+    upper = lower = poc
+    current = values[poc]
+    while current < target:
+        up = values[upper + 1] if upper + 1 < len(values) else -1
+        down = values[lower - 1] if lower - 1 >= 0 else -1
+        if up == -1 and down == -1:
+            break
+        if up > down:
+            upper += 1
+            current += up
+        else:
+            lower -= 1
+            current += down
+    return poc, upper, lower
+
+
+def make_profiles(count: int, levels: int, seed: int):
+    """Bell-shaped profiles with noise and plateaus (ties), lengths levels/2 .. levels."""
+    rng = np.random.default_rng(seed)
+    profiles = []
+    for _ in range(count):
+        n = int(rng.integers(max(levels // 2, 1), levels + 1))
+        x = np.linspace(-2, 2, n) - rng.normal(0, 0.5)
+        volumes = np.exp(-x * x) * 1000 + rng.integers(0, 200, n)
+        profiles.append(np.round(volumes, int(rng.integers(0, 3))))
+    return profiles
+
+
+def bench(label, fn, items, repeat):
+    best = float('inf')
+    for _ in range(repeat):
+        start = time.perf_counter()
+        fn(items)
+        best = min(best, time.perf_counter() - start)
+    per_item_us = best / len(items) * 1e6
+    print(f"{label:<28} {best * 1000:10.1f} ms   {per_item_us:8.1f} us/profile")
+    return best
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark value-area computation.")
+    parser.add_argument("--levels", type=int, default=400, help="Max price levels per profile.")
+    parser.add_argument("--profiles", type=int, default=2000)
+    parser.add_argument("--pct", type=float, default=0.70)
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--repeat", type=int, default=3)
+    args = parser.parse_args()
+
+    profiles = make_profiles(args.profiles, args.levels, args.seed)
+    series = [pd.Series(p) for p in profiles]
+    print(f"{len(profiles)} profiles, {args.levels // 2}-{args.levels} levels, value area {args.pct:.0%}\n")
+
+    expected = [walk_list(p, args.pct) for p in profiles]
+    single = [tuple(value_area(p, args.pct)) for p in profiles]
+    batch = [tuple(row) for row in value_area_batch(profiles, args.pct).tolist()]
+    if single != expected or batch != expected:
+        print("MISMATCH: vectorized value area differs from the walk")
+        return
+
+    pct = args.pct
+    bench("walk (pandas Series)", lambda items: [walk_series(s, pct) for s in items], series, args.repeat)
+    bench("walk (list)", lambda items: [walk_list(p, pct) for p in items], profiles, args.repeat)
+    bench("value_area", lambda items: [value_area(p, pct) for p in items], profiles, args.repeat)
+    bench("value_area_batch", lambda items: value_area_batch(items, pct), profiles, args.repeat)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,39 @@
+# scripts/build_tick_cache.py
+# One-time conversion of the data/*.json.gz feed files into the Parquet tick
+# cache (data_handling/tick_cache.py). Files whose content hash matches the
+# manifest are skipped, so re-running it is cheap.
+#
+#   python scripts/build_tick_cache.py            # data/*.json.gz -> data/cache
+#   python scripts/build_tick_cache.py --force    # rebuild everything
+import sys
+import os
+import time
+import argparse
+
+# Add project root to path
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+from data_handling.tick_cache import build_cache, default_cache_dir, list_sources
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Convert backtest feed files into the Parquet tick cache.")
+    parser.add_argument("--data-dir", default="data")
+    parser.add_argument("--pattern", default="*.json.gz")
+    parser.add_argument("--cache-dir", default=None, help=f"Default: {default_cache_dir()}")
+    parser.add_argument("--force", action="store_true", help="Rebuild even if the source is unchanged.")
+    args = parser.parse_args()
+
+    sources = list_sources(args.data_dir, args.pattern)
+    if not sources:
+        print(f"No files matching {args.pattern} in {args.data_dir}.")
+        return
+    start = time.perf_counter()
+    entries = build_cache(sources, args.cache_dir, force=args.force)
+    rows = sum(entry["rows"] for entry in entries.values())
+    print(f"{len(entries)} files, {rows} rows cached in {args.cache_dir or default_cache_dir()} "
+          f"({time.perf_counter() - start:.1f}s)")
+
+
+if __name__ == "__main__":
+    main()
@@ -1,16 +1,16 @@
 import zmq
 import threading
-import json
 import time
 import sys
 import os
 import logging
-from collections import deque
 
 import config
-from trading_core.persistence import QuestDBPersistence
+from trading_core.persistence import DuckDBPersistence
 from upstox_client import ApiClient, MarketDataStreamerV3, Configuration
-from data_handling.feed_processor import save_feed_data
+from data_handling.feed_codec import normalize_feeds, encode_frame, decode_frame, feed_topic, subscribe
+from data_handling.tick_journal import TickJournal, JournalReplayer
+from data_handling.feed_processor import save_feed_record
 
 # Configure logging
 logging.basicConfig(level=logging.INFO)
@@ -21,7 +21,13 @@ logger = logging.getLogger(__name__)
 def on_message_handler(data, zmq_socket):
     """Callback to handle incoming WebSocket messages and publish them."""
     try:
-        zmq_socket.send_multipart([config.ZMQ_TOPIC.encode('utf-8'), json.dumps(data).encode('utf-8')])
+        recv_us = time.time_ns() // 1000
+        feed_type = data.get("type", "live_feed")
+        current_ts = int(data.get("currentTs") or 0)
+        # One message per instrument on its own topic, so subscribers filter in ZeroMQ
+        for record in normalize_feeds(data):
+            frame = encode_frame([record], feed_type=feed_type, current_ts=current_ts, recv_us=recv_us)
+            zmq_socket.send_multipart([feed_topic(record.symbol), frame])
     except Exception as e:
         logger.error(f"Error publishing to ZeroMQ: {e}")
 
@@ -54,61 +60,47 @@ def start_websocket_publisher(access_token, instrument_keys, zmq_pub_url):
 
 # --- QuestDB Writer Thread ---
 
-def start_questdb_writer(zmq_sub_url):
+def start_questdb_writer(zmq_sub_url, journal_dir=None, db_path=None):
     """
-    Subscribes to the ZeroMQ feed, buffers messages in a deque, and writes
-    them to QuestDB in batches.
+    Subscribes to the ZeroMQ feed and appends every raw frame to the tick
+    journal (data_handling.tick_journal). A JournalReplayer drains the
+    journal into the database in adaptively sized batches and checkpoints
+    after each commit, so a slow or locked database only adds replay lag.
+    journal_dir / db_path default to config.JOURNAL_DIR / config.DUCKDB_PATH.
+    Returns (journal, replayer).
     """
-    logger.info("Starting QuestDB writer with batching...")
+    logger.info("Starting DB writer (journal + replayer)...")
 
-    message_queue = deque()
-    lock = threading.Lock()
-    BATCH_SIZE = 100
-    FLUSH_INTERVAL = 5  # seconds
+    persistence = DuckDBPersistence(db_path=db_path or config.DUCKDB_PATH)
+    journal = TickJournal(journal_dir)
+
+    def persist_batch(payloads):
+        """Sink: decode frames on the replayer thread and commit them."""
+        for payload in payloads:
+            for record in decode_frame(payload).records:
+                save_feed_record(persistence, record)
+        persistence.flush_tick_buffer()
+
+    replayer = JournalReplayer(sink=persist_batch, directory=journal.directory, name="ticks")
 
     def zmq_listener_thread():
-        """Listens to ZMQ and adds messages to the thread-safe deque."""
+        """Listens to ZMQ and journals raw frames; nothing here waits on the database."""
         context = zmq.Context()
         sub_socket = context.socket(zmq.SUB)
         sub_socket.connect(zmq_sub_url)
-        sub_socket.setsockopt(zmq.SUBSCRIBE, config.ZMQ_TOPIC.encode('utf-8'))
+        subscribe(sub_socket)
         while True:
             try:
                 topic, message = sub_socket.recv_multipart()
-                data = json.loads(message.decode('utf-8'))
-                with lock:
-                    message_queue.append(data)
+                journal.append(message)
             except Exception as e:
                 logger.error(f"Error in ZMQ listener thread: {e}")
 
-    def db_persister_thread():
-        """Persists messages from the deque to QuestDB in batches."""
-        persistence = QuestDBPersistence()
-        while True:
-            batch_to_persist = []
-            with lock:
-                while len(message_queue) > 0 and len(batch_to_persist) < BATCH_SIZE:
-                    batch_to_persist.append(message_queue.popleft())
-
-            if batch_to_persist:
-                try:
-                    for msg_data in batch_to_persist:
-                        feeds = msg_data.get("feeds", {})
-                        for symbol, feed in feeds.items():
-                            save_feed_data(persistence, symbol, feed)
-                    logger.info(f"Persisted batch of {len(batch_to_persist)} messages.")
-                except Exception as e:
-                    logger.error(f"Error persisting batch to QuestDB: {e}")
-
-            # Sleep to prevent busy-waiting
-            time.sleep(FLUSH_INTERVAL if not batch_to_persist else 0.1)
-
-    # Start the listener and persister threads
+    replayer.start()
     listener = threading.Thread(target=zmq_listener_thread, daemon=True)
-    persister = threading.Thread(target=db_persister_thread, daemon=True)
     listener.start()
-    persister.start()
-    logger.info("QuestDB writer threads (listener and persister) started.")
+    logger.info(f"DB writer started (journal at {journal.directory}, segment {journal.segment}).")
+    return journal, replayer
 
 
 # --- Main ---
@@ -122,7 +114,7 @@ if __name__ == "__main__":
         zmq_pub_url=config.ZMQ_PUB_URL
     )
 
-    start_questdb_writer(
+    journal, replayer = start_questdb_writer(
         zmq_sub_url=config.ZMQ_PUB_URL
     )
 
@@ -130,5 +122,9 @@ if __name__ == "__main__":
     try:
         while True:
             time.sleep(1)
+            journal.sync()
     except KeyboardInterrupt:
         logger.info("Shutting down ingestion service.")
+        journal.sync()
+        replayer.stop()
+        replayer.queue.log_metrics()
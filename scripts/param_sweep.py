@@ -0,0 +1,216 @@
+# scripts/param_sweep.py
+# Parameter sweep for LiveAuctionEngine over the data/ symbol files.
+#
+# Each symbol's tick stream is loaded once (from the Parquet tick cache) into
+# a shared memory block. Every (parameter combination, symbol) pair is one
+# task on a ProcessPoolExecutor; workers attach to the shared streams, run a
+# simulation-mode engine on an InMemoryPersistence and return trade count,
+# wins and PnL. Finished tasks are appended to --out as they complete, so a
+# rerun with the same arguments skips them and continues an interrupted sweep.
+#
+#   python scripts/param_sweep.py --param lookback=60,120,180 --param std_dev=1,1.5,2
+#   python scripts/param_sweep.py --grid sweep.json --sampler random --samples 20 --seed 7
+import sys
+import os
+import io
+import csv
+import json
+import time
+import random
+import argparse
+import itertools
+import contextlib
+from concurrent.futures import ProcessPoolExecutor, as_completed
+
+import pandas as pd
+
+# Add project root to path
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+from scripts.backtester_json import make_engine
+from scripts.batch_backtest import symbol_from_path
+from data_handling.tick_cache import SharedTickStream, build_cache, cache_path, list_sources
+from trading_core.persistence import InMemoryPersistence
+
+# Engine parameters a sweep may vary (LiveAuctionEngine config["parameters"])
+SWEEPABLE = {
+    "lookback": int,
+    "tick_size": float,
+    "sma_period": int,
+    "bias_confirm_candles": int,
+    "bias_timeframe_minutes": int,
+    "std_dev": float,
+    "trail_mult_trending": float,
+    "trail_mult_normal": float,
+    "imbalance_ratio": float,
+}
+
+RUN_FIELDS = ["combo", "symbol", "trades", "wins", "pnl", "elapsed"]
+
+
+def parse_grid(param_args, grid_file=None) -> dict:
+    grid = {}
+    if grid_file:
+        with open(grid_file) as f:
+            grid.update(json.load(f))
+    for arg in param_args or []:
+        name, _, values = arg.partition("=")
+        grid[name.strip()] = [v for v in values.split(",") if v.strip()]
+    for name in grid:
+        if name not in SWEEPABLE:
+            raise ValueError(f"Unknown parameter {name!r}; sweepable: {', '.join(SWEEPABLE)}")
+        grid[name] = [SWEEPABLE[name](v) for v in grid[name]]
+    return grid
+
+
+def combinations(grid: dict, sampler: str = "grid", samples: int = None, seed: int = 0) -> list:
+    """Parameter dicts in a stable order; the random sampler is seeded so reruns resume the same set."""
+    names = sorted(grid)
+    combos = [dict(zip(names, values)) for values in itertools.product(*(grid[n] for n in names))]
+    if sampler == "random" and samples and samples < len(combos):
+        combos = random.Random(seed).sample(combos, samples)
+    return combos
+
+
+def combo_key(params: dict) -> str:
+    return json.dumps(params, sort_keys=True)
+
+
+def load_done(out_path: str) -> set:
+    if not os.path.exists(out_path):
+        return set()
+    with open(out_path, newline="") as f:
+        return {(row["combo"], row["symbol"]) for row in csv.DictReader(f)}
+
+
+# ---------- worker side ----------
+
+_attached = {}  # shm name -> SharedTickStream, one attachment per worker process
+
+
+def run_task(key: str, symbol: str, handle) -> dict:
+    stream = _attached.get(handle[0])
+    if stream is None:
+        stream = _attached[handle[0]] = SharedTickStream.attach(handle)
+
+    start = time.perf_counter()
+    with contextlib.redirect_stdout(io.StringIO()):
+        engine = make_engine(InMemoryPersistence(), json.loads(key))
+        engine.on_ticks(*stream.replay(symbol))
+    pnls = []
+    for t in engine.trade_engine.closed_trades:
+        if t.pnl is not None:
+            pnls.append(t.pnl)
+        elif t.exit_price is not None:
+            pnls.append(t.exit_price - t.entry_price if t.side == "LONG" else t.entry_price - t.exit_price)
+    return {
+        "combo": key,
+        "symbol": symbol,
+        "trades": len(pnls),
+        "wins": sum(1 for p in pnls if p > 0),
+        "pnl": round(sum(pnls), 4),
+        "elapsed": round(time.perf_counter() - start, 2),
+    }
+
+
+# ---------- report ----------
+
+def summarize(out_path: str, keys: list) -> pd.DataFrame:
+    runs = pd.read_csv(out_path)
+    runs = runs[runs["combo"].isin(keys)]
+    if runs.empty:
+        return runs
+    summary = runs.groupby("combo").agg(symbols=("symbol", "count"), trades=("trades", "sum"),
+                                        wins=("wins", "sum"), pnl=("pnl", "sum")).reset_index()
+    summary["win_rate"] = (summary["wins"] / summary["trades"].where(summary["trades"] > 0)).fillna(0.0).round(3)
+    params = pd.DataFrame([json.loads(k) for k in summary["combo"]])
+    summary = pd.concat([params, summary.drop(columns="combo")], axis=1)
+    return summary.sort_values("pnl", ascending=False).reset_index(drop=True)
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Sweep LiveAuctionEngine parameters over the backtest data.")
+    parser.add_argument("--param", action="append", metavar="NAME=V1,V2,...",
+                        help=f"Values for one parameter (repeatable). Sweepable: {', '.join(SWEEPABLE)}")
+    parser.add_argument("--grid", default=None, help="JSON file {name: [values]} (merged with --param).")
+    parser.add_argument("--sampler", choices=("grid", "random"), default="grid")
+    parser.add_argument("--samples", type=int, default=None, help="Combinations to draw with --sampler random.")
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--data-dir", default="data")
+    parser.add_argument("--pattern", default="*.json.gz")
+    parser.add_argument("--workers", type=int, default=None, help="Default: CPU count.")
+    parser.add_argument("--out", default="sweep_runs.csv",
+                        help="Per (combination, symbol) results; existing rows are skipped (resume).")
+    parser.add_argument("--summary", default=None, help="Per-combination table (default: <out>_summary.csv).")
+    parser.add_argument("--fresh", action="store_true", help="Discard --out and start over.")
+    args = parser.parse_args()
+
+    grid = parse_grid(args.param, args.grid)
+    combos = combinations(grid, args.sampler, args.samples, args.seed)
+    keys = [combo_key(c) for c in combos]
+    sources = list_sources(args.data_dir, args.pattern)
+    if not sources:
+        print(f"No files matching {args.pattern} in {args.data_dir}.")
+        return
+
+    if args.fresh and os.path.exists(args.out):
+        os.remove(args.out)
+    done = load_done(args.out)
+    symbols = {symbol_from_path(path): path for path in sources}
+    tasks = [(key, symbol) for key in keys for symbol in symbols if (key, symbol) not in done]
+    print(f"{len(combos)} combinations x {len(symbols)} symbols: "
+          f"{len(tasks)} to run, {len(keys) * len(symbols) - len(tasks)} already done")
+
+    if tasks:
+        build_cache(sources)
+        needed = {symbol for _, symbol in tasks}
+        streams = {}
+        try:
+            for symbol in needed:
+                streams[symbol] = SharedTickStream.create(cache_path(symbols[symbol]))
+            run_tasks(tasks, streams, args.out, args.workers or os.cpu_count() or 1)
+        finally:
+            for stream in streams.values():
+                stream.close()
+
+    summary = summarize(args.out, keys)
+    if summary.empty:
+        print("No results yet.")
+        return
+    summary_path = args.summary or os.path.splitext(args.out)[0] + "_summary.csv"
+    summary.to_csv(summary_path, index=False)
+    print("\n===== Sweep Summary (best first) =====")
+    print(summary.head(20).to_string(index=False))
+    print(f"\nPer-combination table written to {summary_path}")
+
+
+def run_tasks(tasks, streams, out_path, workers):
+    new_file = not os.path.exists(out_path)
+    start = time.perf_counter()
+    with open(out_path, "a", newline="") as f:
+        writer = csv.DictWriter(f, fieldnames=RUN_FIELDS)
+        if new_file:
+            writer.writeheader()
+        with ProcessPoolExecutor(max_workers=workers) as pool:
+            futures = {pool.submit(run_task, key, symbol, streams[symbol].handle): (key, symbol)
+                       for key, symbol in tasks}
+            try:
+                for n, future in enumerate(as_completed(futures), 1):
+                    key, symbol = futures[future]
+                    try:
+                        row = future.result()
+                    except Exception as e:
+                        print(f"FAILED {symbol} {key}: {e}")
+                        continue
+                    writer.writerow(row)
+                    f.flush()
+                    print(f"  [{n}/{len(tasks)}] {symbol:<22} {key}  trades={row['trades']} pnl={row['pnl']}")
+            except KeyboardInterrupt:
+                print("Interrupted; finished tasks are saved, rerun to resume.")
+                pool.shutdown(wait=False, cancel_futures=True)
+                raise
+    print(f"Ran {len(tasks)} tasks in {time.perf_counter() - start:.1f}s")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,253 @@
+# scripts/replay_publisher.py
+# Offline stand-in for the Upstox side of scripts/ingestor.py: replays recorded
+# ticks onto the ZMQ bus (config.ZMQ_PUB_URL) exactly as the ingestor would
+# publish them, so LiveAuctionEngine.start_consuming, the DB writer and
+# api/server.py can be run and load-tested without a broker connection.
+#
+# Sources:
+#   data/*.json.gz files (raw Upstox feed messages, one file per symbol),
+#     merged across symbols in ltt order
+#   the DuckDB tick_data table (TICK + CANDLE_I1 rows), in event-time order
+#
+# Every message is rebuilt as an Upstox {"type", "feeds": {key: feed},
+# "currentTs"} payload and goes through the ingestor's normalize/encode path.
+# Frames are stamped with recv_us at publish time, so downstream stages can
+# measure tick-to-signal latency from it. Pacing uses trading_core.clock's
+# PacedClock; --speed max publishes as fast as possible.
+#
+#   python scripts/replay_publisher.py --speed 10
+#   python scripts/replay_publisher.py --source duckdb --symbols "NSE_FO|51414" --speed max
+#   python scripts/replay_publisher.py --speed max --with-writer \
+#       --writer-db-path replay.duckdb --writer-journal-dir data/replay_journal   # also run the DB writer
+#
+# The writer never targets the live database or journal (config.DUCKDB_PATH,
+# config.JOURNAL_DIR): replayed ticks would be mixed with real ones.
+import sys
+import os
+import time
+import heapq
+import argparse
+import logging
+
+import zmq
+
+# Add project root to path
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+import config
+from data_handling.feed_codec import normalize_feeds, encode_frame, feed_topic
+from data_handling.json_stream import iter_json_array
+from data_handling.tick_cache import list_sources
+from trading_core.clock import PacedClock
+from scripts.batch_backtest import symbol_from_path
+
+logging.basicConfig(level=logging.INFO)
+logger = logging.getLogger(__name__)
+
+# Recorder metadata, not part of a live feeds[key] entry
+_RECORDER_FIELDS = ("instrumentKey", "_insertion_time")
+
+
+# --- Sources: iterators of (ts_ms, symbol, feed) ---
+
+def iter_json_file(path: str):
+    symbol = symbol_from_path(path)
+    last_ts = 0
+    for feed in iter_json_array(path):
+        symbol = feed.get("instrumentKey", symbol)
+        ltt = feed.get("fullFeed", {}).get("marketFF", {}).get("ltpc", {}).get("ltt")
+        if ltt is not None:
+            last_ts = max(last_ts, int(ltt))
+        for field in _RECORDER_FIELDS:
+            feed.pop(field, None)
+        yield last_ts, symbol, feed
+
+
+def iter_json_sources(paths):
+    """All files merged in timestamp order (each file is read lazily)."""
+    return heapq.merge(*(iter_json_file(p) for p in paths), key=lambda event: event[0])
+
+
+_DUCKDB_QUERY = """
+SELECT * FROM (
+    SELECT instrument_key, feed_type, ltp, ltt, ltq, cp, oi, atp, vtt, tbq, tsq,
+           delta, theta, gamma, vega, rho, iv, bid_price_1, bid_qty_1, ask_price_1, ask_qty_1,
+           open, high, low, close, epoch_ms(insertion_time) AS insertion_ms, processed_time,
+           -- event time of the feed message the row came from (its tick's ltt)
+           coalesce(max(ltt) OVER (PARTITION BY processed_time, instrument_key),
+                    epoch_ms(insertion_time)) AS event_ms
+    FROM tick_data
+    WHERE feed_type IN ('TICK', 'CANDLE_I1') {symbol_filter}
+)
+ORDER BY event_ms, processed_time, instrument_key, feed_type DESC
+"""
+
+
+def _str(value):
+    return None if value is None else str(int(value))
+
+
+def iter_duckdb_source(db_path: str, symbols=None, fetch_size: int = 10000):
+    """
+    tick_data rows as Upstox feed entries, all symbols in event-time order.
+    Rows written from one feed message share processed_time, so a TICK row
+    and its CANDLE_I1 rows are regrouped into one message.
+    """
+    import duckdb
+
+    conn = duckdb.connect(database=db_path, read_only=True)
+    params = []
+    symbol_filter = ""
+    if symbols:
+        symbol_filter = f"AND instrument_key IN ({', '.join('?' for _ in symbols)})"
+        params = list(symbols)
+    cursor = conn.execute(_DUCKDB_QUERY.format(symbol_filter=symbol_filter), params)
+
+    group_key, market, ts = None, None, 0
+    try:
+        while True:
+            rows = cursor.fetchmany(fetch_size)
+            if not rows:
+                break
+            for (symbol, feed_type, ltp, ltt, ltq, cp, oi, atp, vtt, tbq, tsq, delta, theta, gamma, vega, rho, iv,
+                 bid_p, bid_q, ask_p, ask_q, o, h, l, c, insertion_ms, processed_time, event_ms) in rows:
+                key = (processed_time, symbol)
+                if key != group_key:
+                    if market:
+                        yield ts, group_key[1], {"fullFeed": {"marketFF": market}, "requestMode": "full_d5"}
+                    group_key, market = key, {}
+                ts = event_ms
+                if feed_type == 'TICK':
+                    market["ltpc"] = {"ltp": ltp, "ltt": _str(ltt), "ltq": _str(ltq), "cp": cp}
+                    if vtt is not None or atp is not None:
+                        market.update({"atp": atp, "vtt": _str(vtt), "tbq": tbq, "tsq": tsq, "oi": oi, "iv": iv})
+                    if bid_p is not None or ask_p is not None:
+                        market["marketLevel"] = {"bidAskQuote": [
+                            {"bidQ": _str(bid_q), "bidP": bid_p, "askQ": _str(ask_q), "askP": ask_p}]}
+                    if delta is not None:
+                        market["optionGreeks"] = {"delta": delta, "theta": theta, "gamma": gamma, "vega": vega, "rho": rho}
+                else:
+                    market.setdefault("marketOHLC", {"ohlc": []})["ohlc"].append({
+                        "interval": "I1", "open": o, "high": h, "low": l, "close": c,
+                        "vol": _str(vtt), "ts": _str(insertion_ms)})
+        if market:
+            yield ts, group_key[1], {"fullFeed": {"marketFF": market}, "requestMode": "full_d5"}
+    finally:
+        conn.close()
+
+
+# --- Publisher ---
+
+def publish(events, zmq_pub_url: str, speed=None, warmup: float = 1.0, limit: int = None,
+            report_interval: float = 5.0, feed_type: str = "live_feed"):
+    """
+    Publishes (ts_ms, symbol, feed) events. speed=None publishes as fast as
+    possible, otherwise event time is paced at speed x real time.
+    """
+    context = zmq.Context.instance()
+    pub_socket = context.socket(zmq.PUB)
+    pub_socket.setsockopt(zmq.SNDHWM, 100000)
+    pub_socket.bind(zmq_pub_url)
+    # Let subscribers (re)connect before the first frame, PUB drops until then
+    time.sleep(warmup)
+
+    clock = PacedClock(speed=speed) if speed else None
+    sent = 0
+    start = last_report = time.perf_counter()
+    last_ts = 0
+    try:
+        for ts, symbol, feed in events:
+            if clock:
+                clock.observe(ts)
+            data = {"type": feed_type, "feeds": {symbol: feed}, "currentTs": ts}
+            recv_us = time.time_ns() // 1000
+            for record in normalize_feeds(data):
+                frame = encode_frame([record], feed_type=feed_type, current_ts=ts, recv_us=recv_us)
+                pub_socket.send_multipart([feed_topic(record.symbol), frame])
+            sent += 1
+            last_ts = ts
+            if limit and sent >= limit:
+                break
+            now = time.perf_counter()
+            if now - last_report >= report_interval:
+                last_report = now
+                logger.info(f"Replayed {sent} messages ({sent / (now - start):,.0f}/s), event time {last_ts}")
+    finally:
+        elapsed = time.perf_counter() - start
+        logger.info(f"Replay finished: {sent} messages in {elapsed:.1f}s ({sent / max(elapsed, 1e-9):,.0f}/s)")
+        pub_socket.close(linger=1000)
+    return sent
+
+
+def parse_speed(value: str):
+    if value.lower() in ("max", "0"):
+        return None
+    speed = float(value.rstrip("xX"))
+    if speed <= 0:
+        raise argparse.ArgumentTypeError("speed must be > 0 or 'max'")
+    return speed
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Replay recorded ticks onto the ZMQ bus.")
+    parser.add_argument("--source", choices=("json", "duckdb"), default="json")
+    parser.add_argument("--data-dir", default="data")
+    parser.add_argument("--pattern", default="*.json.gz")
+    parser.add_argument("--db-path", default=config.DUCKDB_PATH)
+    parser.add_argument("--symbols", nargs="*", default=None, help="Instrument keys to replay (default: all).")
+    parser.add_argument("--speed", type=parse_speed, default=1.0, help="1, 10, 10x ... or 'max' (default 1).")
+    parser.add_argument("--url", default=config.ZMQ_PUB_URL)
+    parser.add_argument("--limit", type=int, default=None, help="Stop after this many messages.")
+    parser.add_argument("--warmup", type=float, default=1.0, help="Seconds to wait for subscribers.")
+    parser.add_argument("--with-writer", action="store_true",
+                        help="Also run the ingestor's journal/DB writer on the replayed bus.")
+    parser.add_argument("--writer-db-path", default=None,
+                        help="Database the --with-writer writer fills (required, not the live one).")
+    parser.add_argument("--writer-journal-dir", default=None,
+                        help="Journal directory of the --with-writer writer (required, not the live one).")
+    args = parser.parse_args()
+
+    if args.with_writer:
+        def same(a, b):
+            return os.path.abspath(a) == os.path.abspath(b)
+
+        if not args.writer_db_path or not args.writer_journal_dir:
+            parser.error("--with-writer needs --writer-db-path and --writer-journal-dir")
+        if same(args.writer_db_path, config.DUCKDB_PATH):
+            parser.error("--writer-db-path is the live database; replayed ticks would mix with real ones")
+        if same(args.writer_journal_dir, getattr(config, 'JOURNAL_DIR', os.path.join("data", "journal"))):
+            parser.error("--writer-journal-dir is the live journal; replayed ticks would mix with real ones")
+        if args.source == "duckdb" and same(args.writer_db_path, args.db_path):
+            parser.error("--writer-db-path would write the replay back into the source database")
+
+    if args.source == "json":
+        paths = list_sources(args.data_dir, args.pattern)
+        if args.symbols:
+            paths = [p for p in paths if symbol_from_path(p) in args.symbols]
+        if not paths:
+            print(f"No files matching {args.pattern} in {args.data_dir}.")
+            return
+        logger.info(f"Replaying {len(paths)} files at {'max' if args.speed is None else args.speed} x")
+        events = iter_json_sources(paths)
+    else:
+        events = iter_duckdb_source(args.db_path, args.symbols)
+
+    journal = replayer = None
+    if args.with_writer:
+        from scripts.ingestor import start_questdb_writer
+        journal, replayer = start_questdb_writer(zmq_sub_url=args.url, journal_dir=args.writer_journal_dir,
+                                                 db_path=args.writer_db_path)
+
+    try:
+        publish(events, args.url, speed=args.speed, warmup=args.warmup, limit=args.limit)
+    except KeyboardInterrupt:
+        logger.info("Replay interrupted.")
+    finally:
+        if replayer:
+            journal.sync()
+            replayer.stop()
+            replayer.queue.log_metrics()
+
+
+if __name__ == "__main__":
+    main()
@@ -5,8 +5,9 @@ import sys
 import os
 
 
-from trading_core.stage8_engine import LiveAuctionEngine
-from trading_core.persistence import QuestDBPersistence
+from trading_core.stage8_engine import LiveAuctionEngine, Monitor
+from trading_core.persistence import DuckDBPersistence
+from api.broadcaster import UiBusPublisher
 import config
 
 # --- Strategy Process ---
@@ -21,11 +22,16 @@ class StrategyProcess(multiprocessing.Process):
         """The main entry point for a strategy process."""
         print(f"Starting strategy process for {self.strategy_config['name']}...")
 
-        db_name = self.strategy_config.get("db_name", "auction_trading")
-        persistence = QuestDBPersistence(db_name=db_name)
+        db_path = self.strategy_config.get("db_path", config.DUCKDB_PATH)
+        persistence = DuckDBPersistence(db_path=db_path)
 
         engine = LiveAuctionEngine(self.strategy_config, persistence)
-        engine.start_consuming(config.ZMQ_PUB_URL)
+        # Footprint/DOM/renko updates go to the API server's websocket broadcaster
+        engine.set_broadcaster(UiBusPublisher())
+        # Trade counts and latency histograms (also sent to the API server's /api/latency)
+        Monitor(engine).start()
+        # Subscribe only to this strategy's instruments; ZeroMQ drops the rest
+        engine.start_consuming(config.ZMQ_PUB_URL, symbols=self.strategy_config.get("symbols", []))
 
 # --- Strategy Manager ---
 
@@ -1,7 +1,151 @@
+import numpy as np
 import pandas as pd
-from typing import List, Optional
+from typing import List, NamedTuple, Optional, Sequence, Tuple
 
-class VolumeProfile:
+
+# ---------- value area engine ----------
+#
+# The value area grows outward from the POC one level at a time, taking the
+# larger of the next level above / below (the lower one on a tie) until it
+# holds value_area_pct of the volume. That walk is a merge of two sequences
+# (levels above the POC going up, levels below going down) by comparing their
+# heads. Cut each sequence into blocks that start at a new running minimum:
+# every element of a block is >= its first element, so once a block's head
+# wins, the whole block is taken before the other side gets a turn, and the
+# merged order is simply the blocks sorted by head, descending (below-POC
+# blocks first on equal heads). Heads only fall along a side, so that order
+# is one stable argsort of [below..., above...] by -head; a cumsum over
+# it (the same left-to-right additions as the walk) finds where the target
+# is reached, and the number of levels taken on each side gives VAH / VAL.
+
+
+class ValueArea(NamedTuple):
+    """Level indices (positions in the volume array) of the POC and value area."""
+    poc: int
+    vah: int
+    val: int
+
+
+def _block_heads(seq: np.ndarray) -> np.ndarray:
+    """For each element, the first element of its block (blocks start at a new running minimum)."""
+    if seq.size == 0:
+        return seq
+    starts = np.empty(seq.size, dtype=bool)
+    starts[0] = True
+    np.less(seq[1:], np.minimum.accumulate(seq)[:-1], out=starts[1:])
+    return seq[np.maximum.accumulate(np.where(starts, np.arange(seq.size), 0))]
+
+
+def value_area(volumes, value_area_pct: float = 0.70) -> Optional[ValueArea]:
+    """POC / VAH / VAL indices of one volume-per-level array (low to high); None if empty."""
+    volumes = np.asarray(volumes, dtype=np.float64)
+    if volumes.size == 0:
+        return None
+    poc = int(volumes.argmax())
+    target = volumes.sum() * value_area_pct
+    lower = volumes[poc - 1::-1] if poc else volumes[:0]
+    upper = volumes[poc + 1:]
+
+    merged = np.concatenate((lower, upper))
+    order = np.argsort(-np.concatenate((_block_heads(lower), _block_heads(upper))), kind="stable")
+
+    filled = np.cumsum(np.concatenate((volumes[poc:poc + 1], merged[order])))
+    reached = np.flatnonzero(filled >= target)
+    taken = int(reached[0]) if reached.size else merged.size
+    n_upper = int(np.count_nonzero(order[:taken] >= lower.size))
+    return ValueArea(poc, poc + n_upper, poc - (taken - n_upper))
+
+
+def value_area_batch(profiles: Sequence, value_area_pct: float = 0.70) -> np.ndarray:
+    """
+    value_area() of many volume arrays (candle windows, symbols, ...) in one
+    call. Arrays may differ in length. Returns an int array of shape
+    (len(profiles), 3) with columns poc, vah, val; rows of empty arrays are -1.
+    """
+    rows = [np.asarray(p, dtype=np.float64) for p in profiles]
+    n = len(rows)
+    out = np.full((n, 3), -1, dtype=np.int64)
+    lengths = np.array([r.size for r in rows], dtype=np.int64)
+    live = np.flatnonzero(lengths)
+    if not live.size:
+        return out
+    rows = [rows[i] for i in live]
+    lengths = lengths[live]
+    width = int(lengths.max())
+
+    grid = np.full((live.size, width), -np.inf)
+    for i, r in enumerate(rows):
+        grid[i, :r.size] = r
+    poc = grid.argmax(axis=1)
+    # pandas/NumPy sum of each array on its own (padding would change the pairwise rounding)
+    target = np.array([r.sum() for r in rows]) * value_area_pct
+
+    # Both sides of every row as (rows, width - 1) grids, in walk order, +inf padded
+    step = np.arange(1, width)
+    sides = []
+    for direction in (-1, 1):
+        ix = poc[:, None] + direction * step
+        valid = (ix >= 0) & (ix < lengths[:, None])
+        seq = np.where(valid, np.take_along_axis(grid, np.clip(ix, 0, width - 1), axis=1), np.inf)
+        starts = np.empty(seq.shape, dtype=bool)
+        starts[:, 0] = True
+        np.less(seq[:, 1:], np.minimum.accumulate(seq, axis=1)[:, :-1], out=starts[:, 1:])
+        heads = np.take_along_axis(seq, np.maximum.accumulate(np.where(starts, step - 1, 0), axis=1), axis=1)
+        sides.append((np.where(valid, seq, 0.0), np.where(valid, -heads, np.inf)))
+
+    merged = np.concatenate([s[0] for s in sides], axis=1)
+    order = np.argsort(np.concatenate([s[1] for s in sides], axis=1), axis=1, kind="stable")
+
+    poc_volume = np.take_along_axis(grid, poc[:, None], axis=1)
+    filled = np.cumsum(np.concatenate((poc_volume, np.take_along_axis(merged, order, axis=1)), axis=1), axis=1)
+    reached = filled >= target[:, None]
+    available = lengths - 1
+    taken = np.where(reached.any(axis=1), reached.argmax(axis=1), available)
+    upper = (order >= width - 1) & (np.arange(merged.shape[1]) < taken[:, None])
+    n_upper = upper.sum(axis=1)
+
+    out[live, 0] = poc
+    out[live, 1] = poc + n_upper
+    out[live, 2] = poc - (taken - n_upper)
+    return out
+
+
+class ProfileShape:
+    """Regime heuristics shared by the profile classes (need poc, vah, val)."""
+    poc: Optional[float] = None
+    vah: Optional[float] = None
+    val: Optional[float] = None
+
+    @property
+    def is_balanced(self) -> bool:
+        """
+        Checks if the profile is balanced (bell-shaped).
+        A simple heuristic is if the POC is near the midpoint of the value area.
+        """
+        if not self.poc or not self.vah or not self.val:
+            return False
+
+        midpoint = self.val + (self.vah - self.val) / 2
+        # Check if POC is within, say, 20% of the VA range from the midpoint
+        tolerance = (self.vah - self.val) * 0.20
+        return abs(self.poc - midpoint) <= tolerance
+
+    @property
+    def dominant_side(self) -> Optional[str]:
+        """
+        Determines if there is a buying or selling dominance.
+        - 'BUYER' if POC is in the upper half of the value area.
+        - 'SELLER' if POC is in the lower half of the value area.
+        """
+        if not self.is_balanced:
+            if self.poc > self.val + (self.vah - self.val) / 2:
+                return "BUYER"
+            else:
+                return "SELLER"
+        return None
+
+
+class VolumeProfile(ProfileShape):
     """
     Calculates a simple volume profile from candle data.
     Provides Value Area (VA) and Point of Control (POC).
@@ -25,105 +169,186 @@ class VolumeProfile:
         self.val: Optional[float] = None
 
         if not self.profile.empty:
-            self.poc = self.profile.idxmax()
-            self.vah, self.val = self._calculate_value_area()
+            area = value_area(self.profile.values, self.value_area_pct)
+            index = self.profile.index
+            self.poc = index[area.poc]
+            self.vah, self.val = index[area.vah], index[area.val]
 
     def _calculate_profile(self) -> pd.Series:
         """
         Creates a price-volume distribution.
         """
-        min_low = min(c["low"] for c in self.candles)
-        max_high = max(c["high"] for c in self.candles)
-
-        price_levels = pd.Series(
-            index=pd.RangeIndex(
-                start=int(min_low / self.tick_size),
-                stop=int(max_high / self.tick_size) + 1
-            ) * self.tick_size,
-            dtype=float
-        ).fillna(0)
+        start = int(min(c["low"] for c in self.candles) / self.tick_size)
+        stop = int(max(c["high"] for c in self.candles) / self.tick_size) + 1
 
+        volumes = np.zeros(max(stop - start, 0), dtype=np.float64)
         for candle in self.candles:
-            low = int(candle["low"] / self.tick_size) * self.tick_size
-            high = int(candle["high"] / self.tick_size) * self.tick_size
+            low = int(candle["low"] / self.tick_size) - start
+            high = int(candle["high"] / self.tick_size) - start
+            if high >= low:
+                volumes[low:high + 1] += candle["volume"] / (high - low + 1)
+
+        return pd.Series(volumes, index=pd.RangeIndex(start=start, stop=stop) * self.tick_size)
 
-            levels_in_range = price_levels.loc[low:high].index
 
-            if not levels_in_range.empty:
-                volume_per_level = candle["volume"] / len(levels_in_range)
-                price_levels.loc[levels_in_range] += volume_per_level
+class RollingVolumeProfile(ProfileShape):
+    """
+    Volume profile of the last `window` candles, kept up to date incrementally.
 
-        return price_levels
+    Levels are integer tick indices (int(price / tick_size), as in
+    VolumeProfile). push() spreads the new candle's volume evenly over its
+    levels with one NumPy slice add, O(levels of that candle). The evicted
+    candle's levels are re-summed from the remaining window in candle order
+    (a cumsum over a window x candle-levels block) rather than subtracted, so
+    every level holds exactly the sum VolumeProfile would compute and no
+    rounding residue builds up. A coverage count per level gives the window's
+    price range (min low .. max high). POC/VAH/VAL are recomputed lazily
+    after a change with value_area() on the window's slice of the level array.
+    """
 
-    def _calculate_value_area(self) -> (Optional[float], Optional[float]):
-        """
-        Finds the price range with the highest X% of volume.
-        """
-        if self.profile.empty or self.poc is None:
-            return None, None
+    MARGIN = 64  # spare levels allocated on each side when the arrays grow
+
+    def __init__(self, window: int, tick_size: float = 0.05, value_area_pct: float = 0.70):
+        self.window = window
+        self.tick_size = tick_size
+        self.value_area_pct = value_area_pct
+        # Ring buffer of the window's candles: tick index span and volume per level
+        self._lo = np.zeros(window, dtype=np.int64)
+        self._hi = np.zeros(window, dtype=np.int64)
+        self._per_level = np.zeros(window, dtype=np.float64)
+        self._head = 0  # slot of the oldest candle
+        self._count = 0
+        self._base = 0  # tick index of element 0 of the level arrays
+        self._volume = np.zeros(0, dtype=np.float64)
+        self._coverage = np.zeros(0, dtype=np.int32)
+        self._dirty = False
+        self._levels: Tuple[Optional[float], Optional[float], Optional[float]] = (None, None, None)
 
-        total_volume = self.profile.sum()
-        target_volume = total_volume * self.value_area_pct
+    def __len__(self) -> int:
+        return self._count
 
-        poc_ix = self.profile.index.get_loc(self.poc)
+    def push(self, candle: dict):
+        """Adds a candle ({"low", "high", "volume", ...}), evicting the oldest when full."""
+        if self.window <= 0:
+            return
+        lo, hi = int(candle["low"] / self.tick_size), int(candle["high"] / self.tick_size)
+        per_level = candle["volume"] / (hi - lo + 1) if hi >= lo else 0.0
 
-        upper_prices = self.profile.iloc[poc_ix:]
-        lower_prices = self.profile.iloc[:poc_ix]
+        evicted = None
+        if self._count == self.window:
+            slot = self._head
+            evicted = (int(self._lo[slot]), int(self._hi[slot]), self._per_level[slot])
+            self._head = (self._head + 1) % self.window
+        else:
+            slot = (self._head + self._count) % self.window
+            self._count += 1
+        self._lo[slot], self._hi[slot], self._per_level[slot] = lo, hi, per_level
 
-        value_area_volume = self.profile.at[self.poc]
+        if hi >= lo:
+            self._ensure(lo, hi)
+            a, b = lo - self._base, hi - self._base + 1
+            self._coverage[a:b] += 1
+            self._volume[a:b] += per_level
+        if evicted is not None and evicted[1] >= evicted[0]:
+            a, b = evicted[0] - self._base, evicted[1] - self._base + 1
+            self._coverage[a:b] -= 1
+            if evicted[2]:
+                self._volume[a:b] = self._resum(evicted[0], evicted[1])
+        self._dirty = True
 
-        vah = self.poc
-        val = self.poc
+    def _resum(self, lo: int, hi: int) -> np.ndarray:
+        """Volume of tick indices lo..hi summed over the window in candle order."""
+        order = (self._head + np.arange(self._count)) % self.window
+        levels = np.arange(lo, hi + 1)
+        covers = (self._lo[order, None] <= levels) & (self._hi[order, None] >= levels)
+        block = np.where(covers, self._per_level[order, None], 0.0)
+        # cumsum adds row by row (as VolumeProfile does candle by candle); sum() would pair rows
+        return np.cumsum(block, axis=0)[-1] if self._count else np.zeros(levels.size)
 
-        upper_ix = poc_ix + 1
-        lower_ix = poc_ix - 1
+    def _ensure(self, lo: int, hi: int):
+        """Grows the arrays to cover tick indices lo..hi, keeping the occupied levels."""
+        if self._volume.size and lo >= self._base and hi < self._base + self._volume.size:
+            return
+        occupied = np.flatnonzero(self._coverage)
+        if occupied.size:
+            lo = min(lo, self._base + int(occupied[0]))
+            hi = max(hi, self._base + int(occupied[-1]))
+        margin = max(self.MARGIN, (hi - lo) // 2)
+        base = lo - margin
+        volume = np.zeros(hi - lo + 1 + 2 * margin, dtype=np.float64)
+        coverage = np.zeros(volume.size, dtype=np.int32)
+        if occupied.size:
+            first, last = int(occupied[0]), int(occupied[-1]) + 1
+            offset = self._base + first - base
+            volume[offset:offset + last - first] = self._volume[first:last]
+            coverage[offset:offset + last - first] = self._coverage[first:last]
+        self._base, self._volume, self._coverage = base, volume, coverage
 
-        while value_area_volume < target_volume:
-            take_upper = False
-            if upper_ix < len(self.profile) and lower_ix >= 0:
-                take_upper = self.profile.iloc[upper_ix] > self.profile.iloc[lower_ix]
-            elif upper_ix < len(self.profile):
-                take_upper = True
-            elif lower_ix < 0:
-                break
+    # ---------- levels ----------
 
-            if take_upper:
-                value_area_volume += self.profile.iloc[upper_ix]
-                vah = self.profile.index[upper_ix]
-                upper_ix += 1
-            else:
-                value_area_volume += self.profile.iloc[lower_ix]
-                val = self.profile.index[lower_ix]
-                lower_ix -= 1
+    def _range(self) -> Tuple[Optional[int], Optional[int]]:
+        occupied = np.flatnonzero(self._coverage)
+        if not occupied.size:
+            return None, None
+        return int(occupied[0]), int(occupied[-1])
+
+    @property
+    def profile(self) -> pd.Series:
+        """Volume per price level over the window's range (like VolumeProfile.profile)."""
+        first, last = self._range()
+        if first is None:
+            return pd.Series(dtype=float)
+        prices = pd.RangeIndex(self._base + first, self._base + last + 1) * self.tick_size
+        return pd.Series(self._volume[first:last + 1], index=prices)
 
-        return vah, val
+    def levels(self) -> Tuple[int, np.ndarray]:
+        """(level number of the lowest price, volume per level) over the window's range."""
+        first, last = self._range()
+        if first is None:
+            return 0, self._volume[:0]
+        return self._base + first, self._volume[first:last + 1]
 
+    def _prices(self, base: int, poc: int, vah: int, val: int):
+        return (base + poc) * self.tick_size, (base + vah) * self.tick_size, (base + val) * self.tick_size
 
+    def _compute(self):
+        base, volumes = self.levels()
+        if not volumes.size:
+            return None, None, None
+        return self._prices(base, *value_area(volumes, self.value_area_pct))
+
+    def _refresh(self):
+        if self._dirty:
+            self._levels = self._compute()
+            self._dirty = False
+        return self._levels
 
     @property
-    def is_balanced(self) -> bool:
-        """
-        Checks if the profile is balanced (bell-shaped).
-        A simple heuristic is if the POC is near the midpoint of the value area.
-        """
-        if not self.poc or not self.vah or not self.val:
-            return False
+    def poc(self) -> Optional[float]:
+        return self._refresh()[0]
 
-        midpoint = self.val + (self.vah - self.val) / 2
-        # Check if POC is within, say, 20% of the VA range from the midpoint
-        tolerance = (self.vah - self.val) * 0.20
-        return abs(self.poc - midpoint) <= tolerance
+    @property
+    def vah(self) -> Optional[float]:
+        return self._refresh()[1]
 
     @property
-    def dominant_side(self) -> Optional[str]:
-        """
-        Determines if there is a buying or selling dominance.
-        - 'BUYER' if POC is in the upper half of the value area.
-        - 'SELLER' if POC is in the lower half of the value area.
-        """
-        if not self.is_balanced:
-            if self.poc > self.val + (self.vah - self.val) / 2:
-                return "BUYER"
-            else:
-                return "SELLER"
-        return None
+    def val(self) -> Optional[float]:
+        return self._refresh()[2]
+
+
+def rolling_value_areas(profiles: dict, value_area_pct: float = 0.70) -> dict:
+    """
+    {key: (poc, vah, val)} prices of many RollingVolumeProfiles (e.g. one per
+    symbol) with a single value_area_batch() call; the results are also cached
+    on each profile. Empty profiles map to (None, None, None).
+    """
+    keys = list(profiles)
+    bases, volumes = zip(*(profiles[k].levels() for k in keys)) if keys else ((), ())
+    areas = value_area_batch(volumes, value_area_pct)
+    out = {}
+    for key, base, (poc, vah, val) in zip(keys, bases, areas.tolist()):
+        vp = profiles[key]
+        vp._levels = (None, None, None) if poc < 0 else vp._prices(base, poc, vah, val)
+        vp._dirty = False
+        out[key] = vp._levels
+    return out
@@ -1,6 +1,6 @@
-import time
-from collections import defaultdict
-from typing import Dict, Optional
+from typing import Dict, Optional, Set, Tuple
+
+import numpy as np
 
 
 import os
@@ -8,28 +8,64 @@ import sys
 # Ensure root module can be imported
 sys.path.append(os.path.join( "D:\\newFootprintChart\\"))
 import config
+from trading_core.clock import WALL_CLOCK
 
 class FootprintBuilder:
-    def __init__(self, tf_sec=60, vol_threshold=None, tick_threshold=None):
+    """
+    Builds one footprint bar at a time.
+
+    Prices are mapped to integer tick indexes (price / tick_size) and the
+    bid/ask/absorption volume per level lives in NumPy arrays that grow in
+    either direction as price explores. Delta, POC and the largest level
+    volume are maintained on every trade, and `self.levels` (price -> dict)
+    is patched only for the level that traded, so `snapshot()` never has to
+    rebuild or re-sum the bar.
+
+    For live UIs, `patch()` turns the builder into a stream: a full
+    "footprint" message when a bar opens, then "footprint_delta" messages
+    holding only the levels and aggregate fields changed since the last
+    message. Every message carries `seq`; a delta also carries `base` (the
+    seq it applies on top of) so clients can detect a gap and ask for
+    `full_snapshot()`. Level values are absolute, so re-applying is harmless.
+
+    Bar start times come from `clock` (trading_core.clock) when no explicit
+    timestamp is given; replays pass an event clock so bars start at tick time.
+    """
+
+    INITIAL_LEVELS = 64
+    AGGREGATE_FIELDS = ("open", "high", "low", "close", "volume", "delta", "poc", "vwap", "ticks")
+
+    def __init__(self, tf_sec=60, vol_threshold=None, tick_threshold=None, tick_size=None, clock=None):
         self.tf_sec = tf_sec
-        
+        self.clock = clock or WALL_CLOCK
+
         # Hybrid Thresholds (Argument -> Config -> Default)
         if vol_threshold is not None:
              self.vol_threshold = vol_threshold
         else:
              self.vol_threshold = getattr(config, 'FOOTPRINT_VOL_THRESHOLD', 5000)
-             
+
         if tick_threshold is not None:
              self.tick_threshold = tick_threshold
         else:
              self.tick_threshold = getattr(config, 'FOOTPRINT_TICK_THRESHOLD', 300)
-        
-        self.start_ts = int(time.time()) # Start immediately
-        
-        # levels: price -> {bid_vol, ask_vol, absorption_flag}
-        self.levels = defaultdict(lambda: {"bid": 0, "ask": 0, "abs": 0})
+
+        self.tick_size = tick_size if tick_size is not None else getattr(config, 'TICK_SIZE', 0.05)
+        # Decimals needed to print a tick-aligned price without float noise (0.05 -> 2)
+        self._price_decimals = max(0, len(f"{self.tick_size:.10f}".rstrip("0").split(".")[1]))
+
+        self.start_ts = int(self.clock.time()) # Start immediately
+
+        # Level storage: slot i holds tick index (self._base + i)
+        self._bid = np.zeros(self.INITIAL_LEVELS, dtype=np.int64)
+        self._ask = np.zeros(self.INITIAL_LEVELS, dtype=np.int64)
+        self._abs = np.zeros(self.INITIAL_LEVELS, dtype=np.int8)
+        self._reset_levels()
         self.last_ltp = 0
-        
+
+        # Patch stream state; seq keeps counting across bars
+        self.seq = 0
+
         # Candle Stats
         self.open = 0.0
         self.high = 0.0
@@ -39,14 +75,34 @@ class FootprintBuilder:
         self.tick_count = 0
         self.is_first_tick = True
 
+    def _reset_levels(self):
+        if getattr(self, "_base", None) is not None:
+            # Only the touched slot range needs clearing; the buffers are reused
+            self._bid[self._lo:self._hi + 1] = 0
+            self._ask[self._lo:self._hi + 1] = 0
+            self._abs[self._lo:self._hi + 1] = 0
+        self._base: Optional[int] = None
+        self._lo = 0  # lowest occupied slot
+        self._hi = -1  # highest occupied slot
+
+        # levels: price -> {bid, ask, abs}, patched per trade
+        self.levels: Dict[float, Dict[str, int]] = {}
+        self.delta = 0
+        self.poc: Optional[float] = None
+        self.max_level_volume = 0
+
+        self._dirty: Set[float] = set()  # prices changed since the last patch
+        self._sent: Dict[str, float] = {}  # aggregate values as of the last patch
+        self._announced = False  # full message for this bar sent yet?
+
     def reset(self, ts=None):
         if ts:
             self.start_ts = int(ts) # Use exact TS provided
         else:
-            self.start_ts = int(time.time())
-            
-        self.levels = defaultdict(lambda: {"bid": 0, "ask": 0, "abs": 0})
-        
+            self.start_ts = int(self.clock.time())
+
+        self._reset_levels()
+
         self.open = 0.0
         self.high = 0.0
         self.low = float('inf')
@@ -55,64 +111,123 @@ class FootprintBuilder:
         self.tick_count = 0
         self.is_first_tick = True
 
+    def _slot(self, price: float) -> Tuple[int, float]:
+        """Returns (array slot, tick-aligned price) for a price, growing the arrays if needed."""
+        idx = int(round(price / self.tick_size))
+        if self._base is None:
+            self._base = idx - len(self._bid) // 2
+        slot = idx - self._base
+        if slot < 0 or slot >= len(self._bid):
+            self._grow(idx)
+            slot = idx - self._base
+        return slot, round(idx * self.tick_size, self._price_decimals)
+
+    def _grow(self, idx: int):
+        size = len(self._bid)
+        lo = min(self._base, idx)
+        hi = max(self._base + size - 1, idx)
+        new_size = max(size * 2, (hi - lo + 1) * 2)
+        # Centre the occupied range so growth in either direction stays amortized O(1)
+        new_base = lo - (new_size - (hi - lo + 1)) // 2
+        shift = self._base - new_base
+        for name, dtype in (("_bid", np.int64), ("_ask", np.int64), ("_abs", np.int8)):
+            grown = np.zeros(new_size, dtype=dtype)
+            grown[shift:shift + size] = getattr(self, name)
+            setattr(self, name, grown)
+        self._base = new_base
+        self._lo += shift
+        self._hi += shift
+
     def check_rotation(self, current_ts_sec):
         # 1. Check Time Duration
         time_elapsed = current_ts_sec - self.start_ts
         time_rotated = time_elapsed >= self.tf_sec
-        
+
         # 2. Check Volume
         vol_rotated = self.volume >= self.vol_threshold
-        
+
         # 3. Check Ticks
         tick_rotated = self.tick_count >= self.tick_threshold
-        
+
         if time_rotated or vol_rotated or tick_rotated:
             snapshot = self.snapshot()
-            
+
             # Reset for NEXT bar starts NOW (or at current_ts_sec)
             # This creates a "Hybrid" series where bars are sequential but variable duration
             self.reset(ts=current_ts_sec)
-            
+
             # Debug log if needed (optional)
             # reason = "TIME" if time_rotated else ("VOL" if vol_rotated else "TICK")
             # print(f"Rotate [{reason}] Vol:{snapshot['volume']} Ticks:{self.tick_count} Dur:{time_elapsed}s")
-            
-            return snapshot, True 
-            
+
+            return snapshot, True
+
         return None, False
 
     def on_tick(self, ltp: float, ltq: int, side: str, absorption: bool = False):
-        if ltq <= 0: return 
-        
+        if ltq <= 0: return
+
         # OHLC Logic
         if self.is_first_tick:
             self.open = ltp
             self.high = ltp
             self.low = ltp
             self.is_first_tick = False
-        
+
         self.high = max(self.high, ltp)
         self.low = min(self.low, ltp)
         self.close = ltp
         self.volume += ltq
         self.tick_count += 1
 
-        lvl = self.levels[ltp]
+        slot, price = self._slot(ltp)
+        if self._hi < self._lo:
+            self._lo = self._hi = slot
+        elif slot < self._lo:
+            self._lo = slot
+        elif slot > self._hi:
+            self._hi = slot
+
         if side == "BUY":
-            lvl["ask"] += ltq
+            self._ask[slot] += ltq
+            self.delta += ltq
         elif side == "SELL":
-            lvl["bid"] += ltq
-        
+            self._bid[slot] += ltq
+            self.delta -= ltq
+
         if absorption:
-            lvl["abs"] = 1 
+            self._abs[slot] = 1
+
+        bid = int(self._bid[slot])
+        ask = int(self._ask[slot])
+        # Fresh dict per update: snapshots already handed out keep their values
+        self.levels[price] = {"bid": bid, "ask": ask, "abs": int(self._abs[slot])}
+        self._dirty.add(price)
+
+        if bid + ask > self.max_level_volume:
+            self.max_level_volume = bid + ask
+            self.poc = price
+
+    def level_arrays(self) -> Tuple[np.ndarray, np.ndarray, np.ndarray]:
+        """Returns (prices, bid, ask) for the occupied price range, lowest price first."""
+        if self._hi < self._lo:
+            empty = np.zeros(0)
+            return empty, empty.astype(np.int64), empty.astype(np.int64)
+        ticks = np.arange(self._base + self._lo, self._base + self._hi + 1)
+        prices = np.round(ticks * self.tick_size, self._price_decimals)
+        return prices, self._bid[self._lo:self._hi + 1].copy(), self._ask[self._lo:self._hi + 1].copy()
 
     def snapshot(self, atp=0):
-        delta = sum(v["ask"] - v["bid"] for v in self.levels.values())
+        """
+        Current bar as a dict. `levels` is the builder's own mapping (not a
+        copy): serialize or store it before the next on_tick.
+        """
         return {
             "type": "footprint",
             "ts": self.start_ts * 1000, # Convert back to ms for compatibility
-            "levels": dict(self.levels),
-            "delta": delta,
+            "levels": self.levels,
+            "delta": self.delta,
+            "poc": self.poc,
             "vwap": atp,
             "open": self.open,
             "high": self.high,
@@ -121,3 +236,47 @@ class FootprintBuilder:
             "volume": self.volume,
             "ticks": self.tick_count
         }
+
+    def full_snapshot(self, atp=None):
+        """
+        Full bar stamped with the current seq, for a client that just
+        connected or lost a delta. Does not advance the stream.
+        """
+        snap = self.snapshot(atp=self._sent.get("vwap", 0) if atp is None else atp)
+        snap["levels"] = dict(self.levels)
+        snap["seq"] = self.seq
+        return snap
+
+    def patch(self, atp=0):
+        """
+        Next message for the live stream: the full bar if it has not been
+        announced yet, otherwise a footprint_delta with the changes since the
+        previous message. Returns None when nothing changed.
+        """
+        snap = self.snapshot(atp=atp)
+        if not self._announced:
+            self._announced = True
+            self.seq += 1
+            self._dirty.clear()
+            self._sent = {f: snap[f] for f in self.AGGREGATE_FIELDS}
+            snap["levels"] = dict(self.levels)
+            snap["seq"] = self.seq
+            return snap
+
+        if not self._dirty:
+            return None
+
+        self.seq += 1
+        msg = {
+            "type": "footprint_delta",
+            "ts": snap["ts"],
+            "seq": self.seq,
+            "base": self.seq - 1,
+            "levels": {p: self.levels[p] for p in self._dirty},
+        }
+        for field in self.AGGREGATE_FIELDS:
+            if snap[field] != self._sent.get(field):
+                msg[field] = snap[field]
+                self._sent[field] = snap[field]
+        self._dirty.clear()
+        return msg
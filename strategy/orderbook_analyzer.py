@@ -78,6 +78,22 @@ class OrderBookAnalyzer:
         tbq = int(market_ff.get("tbq", 0))
         tsq = int(market_ff.get("tsq", 0))
         
+        self._store_snapshot(symbol, ts, bids, asks, tbq, tsq)
+    
+    def update_depth(self, symbol: str, depth: List[Tuple[float, int, float, int]], tbq: float, tsq: float, ts: int):
+        """
+        Update order book from a decoded bus record (see data_handling.feed_codec).
+        
+        depth: [(bidP, bidQ, askP, askQ), ...] best level first
+        """
+        if not depth:
+            return
+        
+        bids = [(bp, bq) for bp, bq, _, _ in depth if bp and bq]
+        asks = [(ap, aq) for _, _, ap, aq in depth if ap and aq]
+        self._store_snapshot(symbol, ts, bids, asks, int(tbq), int(tsq))
+    
+    def _store_snapshot(self, symbol: str, ts: int, bids: List[Tuple[float, int]], asks: List[Tuple[float, int]], tbq: int, tsq: int):
         snapshot = OrderBookSnapshot(
             symbol=symbol,
             ts=ts,
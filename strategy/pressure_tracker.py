@@ -3,13 +3,23 @@
 # =========================
 # Stage-15: Delta/Pressure Tracker for Trend Detection
 # Uses TBQ/TSQ changes over rolling window to detect trending conditions
+#
+# Each symbol's last `window` snapshots live in a PressureRing: fixed-size
+# arrays (struct of arrays) written in place, so a tick allocates no Python
+# objects. Every query only needs the endpoints of the window or of its two
+# halves (TBQ/TSQ are running totals, so a delta is last - first), which are
+# read by index: all queries are O(1). The whole-window pressure ratio, read
+# several times per tick by the exit logic, is cached until the next append.
+# update_batch() takes a columnar TickBatch and writes only what survives.
 
-from collections import deque
-from typing import Dict, Optional, Tuple
+from array import array
+from typing import Dict, List, Optional, Tuple
 from dataclasses import dataclass
 
+import numpy as np
 
-@dataclass
+
+@dataclass(slots=True)
 class PressureSnapshot:
     """Single point-in-time pressure reading"""
     ts: int
@@ -18,6 +28,70 @@ class PressureSnapshot:
     ltp: float
 
 
+class PressureRing:
+    """Last `capacity` (ts, tbq, tsq, ltp) readings of one symbol, oldest first."""
+
+    __slots__ = ("capacity", "ts", "tbq", "tsq", "ltp", "head", "count", "_ratio")
+
+    def __init__(self, capacity: int):
+        self.capacity = capacity
+        self.ts = array('q', bytes(8 * capacity))
+        # 'd': live frames carry TBQ/TSQ as doubles, backtests as ints (exact below 2**53)
+        self.tbq = array('d', bytes(8 * capacity))
+        self.tsq = array('d', bytes(8 * capacity))
+        self.ltp = array('d', bytes(8 * capacity))
+        self.head = 0   # slot of the next write
+        self.count = 0
+        self._ratio: Optional[float] = 0.0  # whole-window pressure ratio, None = stale
+
+    def __len__(self) -> int:
+        return self.count
+
+    def append(self, ts: int, tbq, tsq, ltp: float):
+        i = self.head
+        self.ts[i] = ts
+        self.tbq[i] = tbq
+        self.tsq[i] = tsq
+        self.ltp[i] = ltp
+        self.head = i + 1 if i + 1 < self.capacity else 0
+        if self.count < self.capacity:
+            self.count += 1
+        self._ratio = None
+
+    @property
+    def ratio(self) -> float:
+        """Pressure ratio over the whole window (0.0 below 2 readings)."""
+        if self._ratio is None:
+            self._ratio = _ratio(*self.deltas(0, -1)) if self.count >= 2 else 0.0
+        return self._ratio
+
+    def slot(self, i: int) -> int:
+        """Array index of the i-th reading (0 = oldest, -1 = newest); may be negative."""
+        # head - count .. head - 1 are the readings oldest..newest, all within
+        # [-capacity, capacity), where arrays wrap negative indices themselves
+        return self.head - self.count + i if i >= 0 else self.head + i
+
+    def deltas(self, first: int, last: int) -> Tuple[float, float]:
+        """(TBQ change, TSQ change) from reading `first` to reading `last`."""
+        a, b = self.slot(first), self.slot(last)
+        return self.tbq[b] - self.tbq[a], self.tsq[b] - self.tsq[a]
+
+    def clear(self):
+        self.head = self.count = 0
+        self._ratio = 0.0
+
+    def snapshots(self) -> List[PressureSnapshot]:
+        slots = [self.slot(i) for i in range(self.count)]
+        return [PressureSnapshot(ts=self.ts[k], tbq=self.tbq[k], tsq=self.tsq[k], ltp=self.ltp[k]) for k in slots]
+
+
+def _ratio(tbq_delta: float, tsq_delta: float) -> float:
+    total = abs(tbq_delta) + abs(tsq_delta)
+    if total == 0:
+        return 0.0
+    return (tbq_delta - tsq_delta) / total
+
+
 class PressureTracker:
     """
     Tracks delta pressure from TBQ/TSQ over 20-50 ticks.
@@ -35,17 +109,14 @@ class PressureTracker:
             window: Number of ticks to track (20-50 recommended)
         """
         self.window = window
-        # symbol -> deque of PressureSnapshot
-        self.history: Dict[str, deque] = {}
-        
-        # Cache last known values to detect changes
-        self.last_tbq: Dict[str, int] = {}
-        self.last_tsq: Dict[str, int] = {}
+        # symbol -> ring of the last `window` snapshots
+        self.history: Dict[str, PressureRing] = {}
 
-    def _get_history(self, symbol: str) -> deque:
-        if symbol not in self.history:
-            self.history[symbol] = deque(maxlen=self.window)
-        return self.history[symbol]
+    def _get_history(self, symbol: str) -> PressureRing:
+        ring = self.history.get(symbol)
+        if ring is None:
+            ring = self.history[symbol] = PressureRing(self.window)
+        return ring
 
     def update(self, tick) -> None:
         """
@@ -54,25 +125,43 @@ class PressureTracker:
         Args:
             tick: Tick object with symbol, ts, total_buy_qty, total_sell_qty, ltp
         """
-        symbol = tick.symbol
-        history = self._get_history(symbol)
+        history = self._get_history(tick.symbol)
         
         # Only add if TBQ/TSQ actually changed (avoid duplicate snapshots)
-        if symbol in self.last_tbq:
-            if (tick.total_buy_qty == self.last_tbq[symbol] and 
-                tick.total_sell_qty == self.last_tsq[symbol]):
+        if history.count:
+            last = history.head - 1
+            if (tick.total_buy_qty == history.tbq[last] and
+                tick.total_sell_qty == history.tsq[last]):
                 return
         
-        snapshot = PressureSnapshot(
-            ts=tick.ts,
-            tbq=tick.total_buy_qty,
-            tsq=tick.total_sell_qty,
-            ltp=tick.ltp
-        )
-        history.append(snapshot)
-        
-        self.last_tbq[symbol] = tick.total_buy_qty
-        self.last_tsq[symbol] = tick.total_sell_qty
+        history.append(tick.ts, tick.total_buy_qty, tick.total_sell_qty, tick.ltp)
+
+    def update_batch(self, batch) -> None:
+        """
+        Same state as update() for every row of a TickBatch, in row order.
+        Unchanged TBQ/TSQ rows are dropped with array compares and only the
+        last `window` remaining rows of each symbol are written.
+        """
+        for symbol, rows in batch.split().items():
+            if not len(rows):
+                continue
+            history = self._get_history(symbol)
+            tbq, tsq = rows.total_buy_qty, rows.total_sell_qty
+            changed = np.empty(len(rows), dtype=bool)
+            changed[1:] = (tbq[1:] != tbq[:-1]) | (tsq[1:] != tsq[:-1])
+            if history.count:
+                last = history.head - 1
+                changed[0] = tbq[0] != history.tbq[last] or tsq[0] != history.tsq[last]
+            else:
+                changed[0] = True
+            keep = np.flatnonzero(changed)[-self.window:]
+            for ts, buy, sell, ltp in zip(rows.ts[keep].tolist(), tbq[keep].tolist(),
+                                          tsq[keep].tolist(), rows.ltp[keep].tolist()):
+                history.append(ts, buy, sell, ltp)
+
+    def snapshots(self, symbol: str) -> List[PressureSnapshot]:
+        """The symbol's window as PressureSnapshot objects, oldest first (debugging / UI)."""
+        return self._get_history(symbol).snapshots()
 
     def get_pressure_ratio(self, symbol: str) -> float:
         """
@@ -83,22 +172,8 @@ class PressureTracker:
         - TSQ_delta = change in Total Sell Qty over window
         - ratio = (TBQ_delta - TSQ_delta) / (|TBQ_delta| + |TSQ_delta|)
         """
-        history = self._get_history(symbol)
-        
-        if len(history) < 2:
-            return 0.0
-        
-        first = history[0]
-        last = history[-1]
-        
-        tbq_delta = last.tbq - first.tbq
-        tsq_delta = last.tsq - first.tsq
-        
-        total = abs(tbq_delta) + abs(tsq_delta)
-        if total == 0:
-            return 0.0
-        
-        return (tbq_delta - tsq_delta) / total
+        history = self.history.get(symbol)
+        return history.ratio if history is not None else 0.0
 
     def is_trending(self, symbol: str, threshold: float = 0.5) -> bool:
         """
@@ -167,15 +242,12 @@ class PressureTracker:
         Returns:
             True if opposing side is aggressively winning → EXIT signal
         """
-        history = self._get_history(symbol)
+        history = self.history.get(symbol)
         
-        if len(history) < tick_count:
+        if history is None or history.count < tick_count:
             return False
         
-        recent = list(history)[-tick_count:]
-        
-        tbq_delta = recent[-1].tbq - recent[0].tbq
-        tsq_delta = recent[-1].tsq - recent[0].tsq
+        tbq_delta, tsq_delta = history.deltas(-tick_count, -1)
         
         # Require significant opposing pressure (1.5x)
         if side == "LONG":
@@ -196,26 +268,14 @@ class PressureTracker:
         """
         history = self._get_history(symbol)
         
-        if len(history) < 10:
+        if history.count < 10:
             return 0.0
         
-        # Compare first half vs second half
-        mid = len(history) // 2
-        
-        first_half = list(history)[:mid]
-        second_half = list(history)[mid:]
-        
-        # First half pressure
-        tbq1 = first_half[-1].tbq - first_half[0].tbq
-        tsq1 = first_half[-1].tsq - first_half[0].tsq
-        total1 = abs(tbq1) + abs(tsq1)
-        ratio1 = (tbq1 - tsq1) / total1 if total1 > 0 else 0
+        # Compare first half [0, mid) vs second half [mid, count)
+        mid = history.count // 2
         
-        # Second half pressure
-        tbq2 = second_half[-1].tbq - second_half[0].tbq
-        tsq2 = second_half[-1].tsq - second_half[0].tsq
-        total2 = abs(tbq2) + abs(tsq2)
-        ratio2 = (tbq2 - tsq2) / total2 if total2 > 0 else 0
+        ratio1 = _ratio(*history.deltas(0, mid - 1))
+        ratio2 = _ratio(*history.deltas(mid, -1))
         
         return ratio2 - ratio1
 
@@ -223,7 +283,3 @@ class PressureTracker:
         """Clear history for a symbol (e.g., after trade exit)"""
         if symbol in self.history:
             self.history[symbol].clear()
-        if symbol in self.last_tbq:
-            del self.last_tbq[symbol]
-        if symbol in self.last_tsq:
-            del self.last_tsq[symbol]
@@ -1,113 +1,223 @@
 # =========================
 # FILE: renko_aggregator.py
 # =========================
+# Ticks -> 1-second bars -> ATR-sized Renko bricks, per instrument.
+#
+# Every symbol has its own RenkoSeries (open 1-second bar, last true ranges,
+# ATR, brick state), so interleaved symbols never share a bar or an ATR.
+# on_tick takes one Tick; on_ticks a TickBatch (backtests, replays) with the
+# same bricks: the batch's 1-second bars are cut and reduced with NumPy
+# (reduceat over the rows where the second changes), then one loop on plain
+# floats runs the ATR / brick recurrence over the completed bars. That part
+# stays sequential - a bar's true range uses the last brick's close and the
+# brick size uses the ATR - but it runs once per bar, not per tick. on_bars
+# enters that loop directly with bars built elsewhere (the /api/renko
+# endpoint has DuckDB bucket them).
+
+from collections import deque
+from typing import Callable, Deque, Dict, Iterable, List, Optional, Tuple
 
-from trading_core.models import Tick, Candle
-from typing import List, Optional, Callable
 import numpy as np
 
+from trading_core.models import Tick, Candle
+
+
+class RenkoSeries:
+    """Renko state of one symbol."""
+
+    __slots__ = ("symbol", "last_sec", "bar", "true_ranges", "atr", "last_brick_price", "bricks")
+
+    def __init__(self, symbol: str, atr_period: int):
+        self.symbol = symbol
+        self.last_sec: Optional[int] = None   # second of the last tick
+        self.bar: Optional[List[float]] = None  # open 1-second bar [open, high, low, close]
+        self.true_ranges: Deque[float] = deque(maxlen=atr_period)
+        self.atr: Optional[float] = None
+        self.last_brick_price: Optional[float] = None
+        self.bricks: List[Candle] = []
+
+
 class RenkoAggregator:
-    def __init__(self, on_renko_brick: Callable, brick_size_mode: str = 'atr', brick_size_value: float = 2.0):
+    def __init__(self, on_renko_brick: Optional[Callable] = None, brick_size_mode: str = 'atr',
+                 brick_size_value: float = 2.0):
         self.on_renko_brick = on_renko_brick
         self.brick_size_mode = brick_size_mode
         self.brick_size_value = brick_size_value
 
-        # 1-second bar aggregation
-        self.last_tick: Optional[Tick] = None
-        self.current_1s_bar: Optional[dict] = None
-
         # ATR Calculation
         self.atr_period = 14
         self.atr_smoothing = 14
-        self.true_ranges: List[float] = []
-        self.atr: Optional[float] = None
 
-        # Renko Calculation
-        self.bricks: List[Candle] = []
-        self.last_brick_price: Optional[float] = None
+        # symbol -> 1-second bar, ATR and brick state
+        self.series: Dict[str, RenkoSeries] = {}
 
-    def on_tick(self, tick: Tick):
-        if self.last_tick is None:
-            self.last_tick = tick
+    def _get_series(self, symbol: str) -> RenkoSeries:
+        series = self.series.get(symbol)
+        if series is None:
+            series = self.series[symbol] = RenkoSeries(symbol, self.atr_period)
+        return series
 
-        # Aggregate ticks into 1-second bars
-        tick_ts_sec = tick.ts // 1000
-        last_tick_ts_sec = self.last_tick.ts // 1000
-
-        if tick_ts_sec > last_tick_ts_sec:
-            if self.current_1s_bar:
-                self._finalize_1s_bar(last_tick_ts_sec)
-            self.current_1s_bar = {
-                "open": tick.ltp, "high": tick.ltp, "low": tick.ltp, "close": tick.ltp, "volume": 0
-            }
-        else:
-            if self.current_1s_bar:
-                self.current_1s_bar["high"] = max(self.current_1s_bar["high"], tick.ltp)
-                self.current_1s_bar["low"] = min(self.current_1s_bar["low"], tick.ltp)
-                self.current_1s_bar["close"] = tick.ltp
-
-        self.last_tick = tick
-
-    def _finalize_1s_bar(self, ts_sec: int):
-        bar = self.current_1s_bar
-        # Update ATR
-        high = bar["high"]
-        low = bar["low"]
-        close = bar["close"]
-        prev_close = self.bricks[-1].close if self.bricks else close
-
-        tr = max(high - low, abs(high - prev_close), abs(low - prev_close))
-        self.true_ranges.append(tr)
-        if len(self.true_ranges) > self.atr_period:
-            self.true_ranges.pop(0)
-
-        if len(self.true_ranges) == self.atr_period:
-            if self.atr is None:
-                self.atr = np.mean(self.true_ranges)
-            else:
-                self.atr = (self.atr * (self.atr_smoothing - 1) + tr) / self.atr_smoothing
+    def get_bricks(self, symbol: str) -> List[Candle]:
+        series = self.series.get(symbol)
+        return series.bricks if series is not None else []
+
+    def get_atr(self, symbol: str) -> Optional[float]:
+        series = self.series.get(symbol)
+        return series.atr if series is not None else None
 
-        # Update Renko
-        self._update_renko(close, ts_sec)
-        self.current_1s_bar = None
+    def reset(self, symbol: str):
+        self.series.pop(symbol, None)
 
-    def _get_brick_size(self, close: float) -> float:
+    def on_tick(self, tick: Tick) -> List[Candle]:
+        """Adds one tick; returns the bricks it completed."""
+        series = self._get_series(tick.symbol)
+        ltp = tick.ltp
+        sec = tick.ts // 1000
+        if series.last_sec is None:
+            series.last_sec = sec
+
+        # Aggregate ticks into 1-second bars
+        new = []
+        if sec > series.last_sec:
+            bar = series.bar
+            if bar is not None:
+                new = self._close_bars(series, ((bar[1], bar[2], bar[3], series.last_sec),))
+            series.bar = [ltp, ltp, ltp, ltp]
+        elif series.bar is not None:
+            bar = series.bar
+            bar[1] = max(bar[1], ltp)
+            bar[2] = min(bar[2], ltp)
+            bar[3] = ltp
+
+        series.last_sec = sec
+        return new
+
+    def on_ticks(self, batch) -> List[Candle]:
+        """
+        Same bars, ATR and bricks as on_tick for every row of a TickBatch.
+        Returns the bricks completed, per symbol in row order.
+        """
+        new = []
+        for symbol, rows in batch.split().items():
+            new.extend(self._add_rows(self._get_series(symbol), rows.ts, rows.ltp))
+        return new
+
+    def on_bars(self, symbol: str, sec, high, low, close) -> List[Candle]:
+        """
+        Feeds completed 1-second bars (e.g. bucketed by DuckDB) straight into
+        the ATR / brick recurrence; sec is each bar's epoch second. Returns
+        the bricks completed.
+        """
+        series = self._get_series(symbol)
+        new = self._close_bars(series, zip(np.asarray(high, dtype=np.float64).tolist(),
+                                           np.asarray(low, dtype=np.float64).tolist(),
+                                           np.asarray(close, dtype=np.float64).tolist(),
+                                           np.asarray(sec, dtype=np.int64).tolist()))
+        if len(sec):
+            series.last_sec = int(sec[-1])
+        return new
+
+    def _add_rows(self, series: RenkoSeries, ts: np.ndarray, ltp: np.ndarray) -> List[Candle]:
+        n = len(ltp)
+        if not n:
+            return []
+        sec = ts // 1000
+        # A row opens a new bar when its second is past the previous row's
+        prev = np.empty(n, dtype=sec.dtype)
+        prev[1:] = sec[:-1]
+        prev[0] = sec[0] if series.last_sec is None else series.last_sec
+        starts = np.flatnonzero(sec > prev)
+
+        # Rows before the first new second extend the open bar (if any)
+        head = int(starts[0]) if len(starts) else n
+        bar = series.bar
+        if head and bar is not None:
+            bar[1] = max(bar[1], float(ltp[:head].max()))
+            bar[2] = min(bar[2], float(ltp[:head].min()))
+            bar[3] = float(ltp[head - 1])
+
+        new = []
+        if len(starts):
+            highs = np.maximum.reduceat(ltp, starts).tolist()
+            lows = np.minimum.reduceat(ltp, starts).tolist()
+            closes = ltp[np.append(starts[1:], n) - 1].tolist()
+            # A bar closes with the second of its last row, i.e. prev at the next bar's start
+            close_secs = prev[starts].tolist()
+            completed = zip(highs[:-1], lows[:-1], closes[:-1], close_secs[1:])
+            if bar is not None:
+                completed = [(bar[1], bar[2], bar[3], close_secs[0]), *completed]
+            new = self._close_bars(series, completed)
+            series.bar = [float(ltp[starts[-1]]), highs[-1], lows[-1], closes[-1]]
+
+        series.last_sec = int(sec[-1])
+        return new
+
+    def _get_brick_size(self, close: float, atr: Optional[float]) -> float:
         if self.brick_size_mode == 'fixed':
             return self.brick_size_value
         elif self.brick_size_mode == 'percentage':
             return close * (self.brick_size_value / 100)
         elif self.brick_size_mode == 'atr':
-            return self.atr * self.brick_size_value if self.atr else self.brick_size_value
+            return atr * self.brick_size_value if atr else self.brick_size_value
         return self.brick_size_value
 
-    def _update_renko(self, close: float, ts_sec: int):
-        if self.last_brick_price is None:
-            self.last_brick_price = close
-
-        brick_size = self._get_brick_size(close)
-        price_diff = close - self.last_brick_price
-
-        num_bricks = int(abs(price_diff) // brick_size)
-
-        if num_bricks == 0:
-            return
-
-        brick_direction = 1 if price_diff > 0 else -1
-
-        for i in range(num_bricks):
-            open_price = self.last_brick_price + (i * brick_size * brick_direction)
-            close_price = open_price + (brick_size * brick_direction)
-
-            brick = Candle(
-                symbol=self.last_tick.symbol,
-                open=open_price,
-                high=max(open_price, close_price),
-                low=min(open_price, close_price),
-                close=close_price,
-                volume=0,  # Renko bricks don't have volume
-                ts=ts_sec * 1000
-            )
-            self.bricks.append(brick)
-            self.on_renko_brick(brick)
-
-        self.last_brick_price += num_bricks * brick_size * brick_direction
+    def _close_bars(self, series: RenkoSeries, bars: Iterable[Tuple[float, float, float, int]]) -> List[Candle]:
+        """ATR and bricks for completed (high, low, close, second) bars, in order."""
+        symbol = series.symbol
+        true_ranges = series.true_ranges
+        period = self.atr_period
+        smoothing = self.atr_smoothing
+        atr = series.atr
+        last_price = series.last_brick_price
+        last_close = series.bricks[-1].close if series.bricks else None
+        atr_sized = self.brick_size_mode == 'atr'
+        new = []
+
+        for high, low, close, sec in bars:
+            # Update ATR (previous close = last brick's close)
+            prev_close = close if last_close is None else last_close
+            tr = max(high - low, abs(high - prev_close), abs(low - prev_close))
+            true_ranges.append(tr)
+            if len(true_ranges) == period:
+                if atr is None:
+                    # Python float: the same value, and much cheaper arithmetic than np.float64
+                    atr = float(np.mean(true_ranges))
+                else:
+                    atr = (atr * (smoothing - 1) + tr) / smoothing
+
+            # Update Renko
+            if last_price is None:
+                last_price = close
+            if atr_sized:
+                brick_size = atr * self.brick_size_value if atr else self.brick_size_value
+            else:
+                brick_size = self._get_brick_size(close, atr)
+            price_diff = close - last_price
+            num_bricks = int(abs(price_diff) // brick_size)
+            if num_bricks == 0:
+                continue
+
+            brick_direction = 1 if price_diff > 0 else -1
+            for i in range(num_bricks):
+                open_price = last_price + (i * brick_size * brick_direction)
+                close_price = open_price + (brick_size * brick_direction)
+                new.append(Candle(
+                    symbol=symbol,
+                    open=open_price,
+                    high=max(open_price, close_price),
+                    low=min(open_price, close_price),
+                    close=close_price,
+                    volume=0,  # Renko bricks don't have volume
+                    ts=sec * 1000
+                ))
+            last_close = close_price
+            last_price += num_bricks * brick_size * brick_direction
+
+        series.atr = atr
+        series.last_brick_price = last_price
+        if new:
+            series.bricks.extend(new)
+            if self.on_renko_brick is not None:
+                for brick in new:
+                    self.on_renko_brick(brick)
+        return new
@@ -0,0 +1,94 @@
+# =========================
+# FILE: rolling_stats.py
+# =========================
+# Mean / population standard deviation over the last `capacity` values of a
+# stream in O(1) per value.
+#
+# Values live in a fixed ring; a push into a full ring replaces the oldest
+# value, adding the new value (and its square) to the running sums and
+# subtracting the evicted one instead of re-reducing the window. The sums are
+# exact: every float is an integer multiple of some 2**-k, so values are held
+# as Python ints in units of 2**-bits, where bits is the largest k seen so far
+# (0 while all values are integers; raising it rescales the ring and sums,
+# at most once per new k), and there is no drift from eviction. Python's
+# int / int is correctly rounded, so mean and variance are the correctly
+# rounded values of the window's exact mean and population variance. That
+# matters for the thresholds built on them: volumes are mostly integers, and
+# a bar volume exactly equal to mean + k*std must compare the same way
+# np.mean / np.std of the window does.
+
+import math
+from typing import List
+
+
+class RollingStats:
+    __slots__ = ("capacity", "_values", "_head", "_count", "_bits", "_sum", "_sumsq", "_stats")
+
+    def __init__(self, capacity: int):
+        self.capacity = max(int(capacity), 0)
+        self._values: List[int] = [0] * self.capacity
+        self._head = 0  # slot of the oldest value once full
+        self._count = 0
+        self._bits = 0  # values are ints in units of 2**-_bits
+        self._sum = 0
+        self._sumsq = 0
+        self._stats = None  # (mean, var) cache, dropped on push
+
+    def __len__(self) -> int:
+        return self._count
+
+    def push(self, value: float):
+        if not self.capacity:
+            return
+        numerator, denominator = float(value).as_integer_ratio()
+        bits = denominator.bit_length() - 1
+        if bits > self._bits:
+            self._rescale(bits)
+        value = numerator << (self._bits - bits)
+        if self._count < self.capacity:
+            self._values[self._count] = value
+            self._count += 1
+        else:
+            old = self._values[self._head]
+            self._values[self._head] = value
+            self._head = (self._head + 1) % self.capacity
+            self._sum -= old
+            self._sumsq -= old * old
+        self._sum += value
+        self._sumsq += value * value
+        self._stats = None
+
+    def _rescale(self, bits: int):
+        shift = bits - self._bits
+        self._values = [v << shift for v in self._values]
+        self._sum <<= shift
+        self._sumsq <<= 2 * shift
+        self._bits = bits
+
+    def _refresh(self):
+        if self._stats is None:
+            n = self._count
+            if not n:
+                self._stats = (0.0, 0.0)
+            else:
+                total = self._sum
+                self._stats = (total / (n << self._bits),
+                               (n * self._sumsq - total * total) / ((n * n) << (2 * self._bits)))
+        return self._stats
+
+    @property
+    def mean(self) -> float:
+        return self._refresh()[0]
+
+    @property
+    def var(self) -> float:
+        return self._refresh()[1]
+
+    @property
+    def std(self) -> float:
+        return math.sqrt(self.var)
+
+    def clear(self):
+        self._head = self._count = self._bits = 0
+        self._sum = self._sumsq = 0
+        self._stats = None
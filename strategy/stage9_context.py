@@ -1,8 +1,12 @@
 from collections import deque
 from typing import Dict, Deque, List, Optional
-from strategy.auction_theory import VolumeProfile
-import numpy as np
+from strategy.auction_theory import RollingVolumeProfile, rolling_value_areas
+from strategy.rolling_stats import RollingStats
 import config
+
+# Igniting-bar statistics cover the (up to) 50 bars before the newest one
+IGNITING_HISTORY = 50
+
 class AuctionContext:
     """
     Determines market context using a rolling volume profile.
@@ -14,12 +18,23 @@ class AuctionContext:
         self,
         lookback: int = 10,
         tick_size: float = 0.05,
-        value_area_pct: float = 0.50
+        value_area_pct: float = 0.50,
+        std_dev: float = None
     ):
         self.lookback = lookback
         self.tick_size = tick_size
         self.value_area_pct = value_area_pct
+        # Igniting-bar threshold in standard deviations (default config.STD_DEV)
+        self.std_dev = std_dev if std_dev is not None else config.STD_DEV
         self.candles: Dict[str, Deque[dict]] = {}
+        # Volume profile of each symbol's candle window, updated as candles enter/leave it
+        self.profiles: Dict[str, RollingVolumeProfile] = {}
+        # Flow rate (vol/sec) and volume of the bars before the newest one in each window,
+        # kept up to date by _update_candles for the igniting check
+        self.igniting_history = max(min(IGNITING_HISTORY, lookback - 1), 0)
+        self.flow_stats: Dict[str, RollingStats] = {}
+        self.volume_stats: Dict[str, RollingStats] = {}
+        self._last_stat_ts: Dict[str, int] = {}
 
     def _calculate_vwap(self, symbol: str, slice_idx: int = 0) -> Optional[float]:
         """
@@ -57,63 +72,32 @@ class AuctionContext:
         Checks if current Flow Rate (Vol/Sec) is > 4 std dev of last 50 bars.
         Includes backward compatibility for Time-based bars.
         """
-        candles = list(self.candles.get(symbol, []))
-        if len(candles) < 20: # Need some history
+        candles = self.candles.get(symbol)
+        if candles is None or len(candles) < 20: # Need some history
             return False
-            
-        # Get last 50
-        subset = candles[-51:-1] 
-        if not subset:
+
+        # Rolling stats of the last 50 bars before the newest (see _update_candles)
+        flow = self.flow_stats[symbol]
+        volume = self.volume_stats[symbol]
+        if not len(flow):
             return False
-            
-        # Calculate Flow Rates
-        flow_rates = []
-        prev_ts = subset[0]['ts']
-        
-        for i in range(1, len(subset)):
-            c = subset[i]
-            duration = (c['ts'] - prev_ts) / 1000 # seconds
-            if duration <= 0: duration = 1 # Safety
-            rate = c['volume'] / duration
-            flow_rates.append(rate)
-            prev_ts = c['ts']
-            
-        if not flow_rates:
-             return False
-             
-        mean_rate = np.mean(flow_rates)
-        std_rate = np.std(flow_rates)
-        
-        # Current Rate
-        last_history_ts = candles[-1]['ts']
-        # If current_ts not provided (live check before close?), we might assume it's "now" vs last close?
-        # Typically this is called with a completed 'candle' object.
-        # But 'candles' deque has the history without current?
-        # The logic in 'classify' calls this.
-        
-        # Logic fix: pass 'candle' object with ts to this func?
-        # Caller passes 'current_vol'. We need 'duration' of current bar?
-        # If we are checking "is this candle igniting", we need its duration.
-        # We passed 'current_vol' but not duration. 
-        # Refactor: We need duration of the candle being checked.
-        # Approximation: if we don't have start_ts of 'candle', we can't get duration accurately 
-        # unless we know the previous candle ts.
-        
+
+        # The candle being checked needs its own duration: time since the last close
         if current_ts <= 0: return False
-        
+
         prev_close_ts = candles[-1]['ts']
         cur_duration = (current_ts - prev_close_ts) / 1000
         if cur_duration <= 0: cur_duration = 1
-        
+
         current_rate = current_vol / cur_duration
-        
+
         # Threshold: Mean + 4 Std Dev
-        if current_rate > (mean_rate +  config.STD_DEV * std_rate):
+        if current_rate > (flow.mean + self.std_dev * flow.std):
             return True
-        elif current_vol > (np.mean([x['volume'] for x in subset]) + config.STD_DEV * np.std([x['volume'] for x in subset])):
+        elif current_vol > (volume.mean + self.std_dev * volume.std):
              # Fallback: Also trigger if RAW Volume is huge (e.g. extremely high volume in slow time)
              return True
-             
+
         return False
 
     def classify_high_volume_bar(self, candle) -> str:
@@ -206,15 +190,17 @@ class AuctionContext:
             
         return zone
 
-    def _get_volume_profile(self, symbol: str) -> Optional[VolumeProfile]:
-        """Returns a VolumeProfile for the current candle window."""
+    def _get_volume_profile(self, symbol: str) -> Optional[RollingVolumeProfile]:
+        """Returns the rolling volume profile of the current candle window."""
         if symbol not in self.candles or len(self.candles[symbol]) < self.lookback:
             return None
-        return VolumeProfile(
-            candles=list(self.candles[symbol]),
-            tick_size=self.tick_size,
-            value_area_pct=self.value_area_pct
-        )
+        return self.profiles[symbol]
+
+    def value_areas(self, symbols: List[str] = None) -> Dict[str, tuple]:
+        """{symbol: (poc, vah, val)} of every warmed-up symbol (or `symbols`), in one batch."""
+        ready = {sym: self.profiles[sym] for sym in (symbols if symbols is not None else self.profiles)
+                 if self._get_volume_profile(sym) is not None}
+        return rolling_value_areas(ready, self.value_area_pct)
 
     def allow_trade(self, candle, side: str) -> bool:
         self._update_candles(candle)
@@ -295,7 +281,14 @@ class AuctionContext:
         """Maintains a rolling window of recent candles."""
         if candle.symbol not in self.candles:
             self.candles[candle.symbol] = deque(maxlen=self.lookback)
-        self.candles[candle.symbol].append({
+            self.profiles[candle.symbol] = RollingVolumeProfile(self.lookback, self.tick_size, self.value_area_pct)
+            self.volume_stats[candle.symbol] = RollingStats(self.igniting_history)
+            # One rate per consecutive pair of those bars
+            self.flow_stats[candle.symbol] = RollingStats(self.igniting_history - 1)
+        window = self.candles[candle.symbol]
+        if window:
+            self._push_igniting_history(candle.symbol, window[-1])
+        window.append({
             "open": candle.open, # Added Open
             "low": candle.low,
             "high": candle.high,
@@ -305,3 +298,14 @@ class AuctionContext:
             "volume": candle.volume,
             "ts": candle.ts # Added Timestamp
         })
+        self.profiles[candle.symbol].push(window[-1])
+
+    def _push_igniting_history(self, symbol: str, bar: dict):
+        """The previous newest bar joins the igniting history as a new one arrives."""
+        self.volume_stats[symbol].push(bar['volume'])
+        prev_ts = self._last_stat_ts.get(symbol)
+        if prev_ts is not None:
+            duration = (bar['ts'] - prev_ts) / 1000 # seconds
+            if duration <= 0: duration = 1 # Safety
+            self.flow_stats[symbol].push(bar['volume'] / duration)
+        self._last_stat_ts[symbol] = bar['ts']
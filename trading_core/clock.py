@@ -0,0 +1,127 @@
+# =========================
+# FILE: clock.py
+# =========================
+# Pluggable time source for the engine, its aggregators and persistence.
+#
+#   WallClock   live trading: the system clock
+#   EventClock  replays/backtests: time is the latest event timestamp seen
+#               (tick ltt), so a replay is reproducible and runs at full speed
+#   PacedClock  EventClock that sleeps so event time advances at `speed` x
+#               real time (UI demos of recorded sessions)
+#
+# Components ask the clock instead of time.time()/datetime.now(); the engine
+# calls observe(ts_ms) for every tick/candle it processes (observe_batch for
+# a TickBatch), which is a no-op on the wall clock.
+
+import time
+from datetime import datetime
+
+
+class Clock:
+    def time(self) -> float:
+        """Current time as epoch seconds."""
+        raise NotImplementedError
+
+    def now_ms(self) -> int:
+        return int(self.time() * 1000)
+
+    def now(self) -> datetime:
+        """Current time as a naive local datetime (like datetime.now())."""
+        return datetime.fromtimestamp(self.time())
+
+    def started(self) -> bool:
+        """False while the clock has no real time yet (event clock before its first event)."""
+        return True
+
+    def observe(self, ts_ms: int):
+        """An event stamped ts_ms (epoch ms) is being processed."""
+        pass
+
+    def observe_batch(self, ts_ms):
+        """observe() for every timestamp of an int64 array (e.g. TickBatch.ts), in order."""
+        for ts in ts_ms:
+            self.observe(int(ts))
+
+
+class WallClock(Clock):
+    def time(self) -> float:
+        return time.time()
+
+
+class EventClock(Clock):
+    """
+    Time is the largest event timestamp observed so far (never moves back,
+    so out-of-order candles stamped with their bar start do not rewind it).
+    Before the first event it reads start_ms.
+    """
+
+    def __init__(self, start_ms: int = 0):
+        self._now_ms = int(start_ms)
+
+    def time(self) -> float:
+        return self._now_ms / 1000.0
+
+    def now_ms(self) -> int:
+        return self._now_ms
+
+    def started(self) -> bool:
+        return self._now_ms > 0
+
+    def observe(self, ts_ms: int):
+        if ts_ms is not None and ts_ms > self._now_ms:
+            self._now_ms = int(ts_ms)
+
+    def observe_batch(self, ts_ms):
+        if len(ts_ms):
+            self.observe(int(ts_ms.max()))
+
+
+class PacedClock(EventClock):
+    """
+    Replays at `speed` x real time: observe() blocks until the wall clock has
+    caught up with the event's scaled offset. Gaps longer than max_pause_s of
+    wall time (market closed, missing data) are skipped rather than waited out.
+    """
+
+    def __init__(self, speed: float = 1.0, max_pause_s: float = 2.0, start_ms: int = 0):
+        super().__init__(start_ms)
+        if speed <= 0:
+            raise ValueError("speed must be > 0")
+        self.speed = speed
+        self.max_pause_s = max_pause_s
+        self._anchor_event_ms = None
+        self._anchor_wall = 0.0
+
+    def observe(self, ts_ms: int):
+        if ts_ms is None:
+            return
+        if self._anchor_event_ms is None:
+            self._anchor_event_ms, self._anchor_wall = ts_ms, time.monotonic()
+        elif ts_ms > self._now_ms:
+            due = self._anchor_wall + (ts_ms - self._anchor_event_ms) / 1000.0 / self.speed
+            wait = due - time.monotonic()
+            if wait > self.max_pause_s:
+                # Re-anchor after a long gap instead of stalling the replay
+                self._anchor_event_ms, self._anchor_wall = ts_ms, time.monotonic()
+            elif wait > 0:
+                time.sleep(wait)
+        super().observe(ts_ms)
+
+    # Paced replays wait for every event
+    observe_batch = Clock.observe_batch
+
+
+WALL_CLOCK = WallClock()
+
+CLOCK_MODES = ("wall", "event", "paced")
+
+
+def make_clock(mode: str = "wall", speed: float = 1.0) -> Clock:
+    """Clock for a config value: "wall", "event" or "paced" (at speed x)."""
+    if mode == "wall":
+        return WALL_CLOCK
+    if mode == "event":
+        return EventClock()
+    if mode == "paced":
+        return PacedClock(speed=speed)
+    raise ValueError(f"Unknown clock mode {mode!r} (expected one of {CLOCK_MODES})")
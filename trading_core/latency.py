@@ -0,0 +1,200 @@
+# =========================
+# FILE: latency.py
+# =========================
+# Tick-to-decision latency histograms for the hot path.
+#
+# Every bus frame carries the broker receive time (recv_us, stamped by the
+# ingestor's websocket handler) and the publish time (sent_us, stamped by
+# encode_frame). The strategy process adds its own stamps when it decodes the
+# frame, when on_tick returns and when on_candle_close has made its decision.
+# The interval between consecutive stamps is one stage:
+#
+#   publish     broker receive  -> ZMQ publish       (ingestor normalize + encode)
+#   transport   ZMQ publish     -> strategy decode   (bus + subscriber queueing)
+#   on_tick     strategy decode -> on_tick done      (incl. earlier records of the frame)
+#   decision    previous stamp  -> on_candle_close done (depth/footprint + candle logic)
+#   tick_total / decision_total  broker receive -> on_tick done / decision
+#
+# Values are recorded in microseconds into HDR-style log-linear histograms
+# (fixed memory, ~1.5% relative precision, O(1) record), one per
+# (symbol, stage). All stamps are epoch wall-clock microseconds, so stages
+# that cross processes assume the processes share a host clock; negative
+# intervals (clock skew) are recorded as 0.
+
+import threading
+import time
+from typing import Dict, Iterable, List, Optional, Tuple
+
+STAGES = ("publish", "transport", "on_tick", "decision", "tick_total", "decision_total")
+
+ALL_SYMBOLS = "*"
+
+# UI bus topic of the periodic snapshots the strategy Monitor sends to api/server.py
+LATENCY_TOPIC = "_latency"
+
+# 2**SUB_BITS linear sub-buckets per power of two -> relative error 2**-(SUB_BITS-1)
+SUB_BITS = 7
+_SUB_COUNT = 1 << SUB_BITS
+_HALF_COUNT = _SUB_COUNT >> 1
+MAX_VALUE_US = (1 << 36) - 1  # ~19 hours; larger values are clamped
+
+PERCENTILES = (50.0, 90.0, 99.0, 99.9)
+
+
+def now_us() -> int:
+    return time.time_ns() // 1000
+
+
+def _bucket_index(value: int) -> int:
+    if value < _SUB_COUNT:
+        return value
+    shift = value.bit_length() - SUB_BITS
+    return _SUB_COUNT + (shift - 1) * _HALF_COUNT + ((value >> shift) - _HALF_COUNT)
+
+
+def _bucket_range(index: int) -> Tuple[int, int]:
+    """Lowest and highest value counted in bucket `index`."""
+    if index < _SUB_COUNT:
+        return index, index
+    shift = (index - _SUB_COUNT) // _HALF_COUNT + 1
+    sub = (index - _SUB_COUNT) % _HALF_COUNT + _HALF_COUNT
+    return sub << shift, ((sub + 1) << shift) - 1
+
+
+_BUCKETS = _bucket_index(MAX_VALUE_US) + 1
+
+
+class LatencyHistogram:
+    """Log-linear histogram of microsecond values (HdrHistogram layout)."""
+
+    __slots__ = ("counts", "count", "total", "min", "max")
+
+    def __init__(self):
+        self.counts = [0] * _BUCKETS
+        self.count = 0
+        self.total = 0
+        self.min = 0
+        self.max = 0
+
+    def record(self, value_us: int):
+        value = int(value_us)
+        if value < 0:
+            value = 0
+        elif value > MAX_VALUE_US:
+            value = MAX_VALUE_US
+        self.counts[_bucket_index(value)] += 1
+        if self.count == 0 or value < self.min:
+            self.min = value
+        if value > self.max:
+            self.max = value
+        self.count += 1
+        self.total += value
+
+    def merge(self, other: "LatencyHistogram"):
+        if other.count == 0:
+            return
+        self.counts = [a + b for a, b in zip(self.counts, other.counts)]
+        self.min = other.min if self.count == 0 else min(self.min, other.min)
+        self.max = max(self.max, other.max)
+        self.count += other.count
+        self.total += other.total
+
+    def percentiles(self, ps: Iterable[float] = PERCENTILES) -> List[int]:
+        """Values at the given percentiles (bucket midpoints, clamped to min/max)."""
+        ps = list(ps)
+        if self.count == 0:
+            return [0] * len(ps)
+        targets = [max(1, -(-self.count * p // 100)) for p in ps]
+        order = sorted(range(len(ps)), key=lambda i: targets[i])
+        out = [0] * len(ps)
+        seen, pos = 0, 0
+        for index, n in enumerate(self.counts):
+            if not n:
+                continue
+            seen += n
+            while pos < len(order) and seen >= targets[order[pos]]:
+                low, high = _bucket_range(index)
+                out[order[pos]] = min(max((low + high) // 2, self.min), self.max)
+                pos += 1
+            if pos == len(order):
+                break
+        return out
+
+    def percentile(self, p: float) -> int:
+        return self.percentiles((p,))[0]
+
+    def summary(self) -> dict:
+        p50, p90, p99, p999 = self.percentiles(PERCENTILES)
+        return {
+            "count": self.count,
+            "min_us": self.min,
+            "mean_us": round(self.total / self.count, 1) if self.count else 0.0,
+            "p50_us": p50,
+            "p90_us": p90,
+            "p99_us": p99,
+            "p999_us": p999,
+            "max_us": self.max,
+        }
+
+
+class LatencyRecorder:
+    """
+    Per-(symbol, stage) histograms. record() is called from the consumer
+    thread; snapshot()/format_table() may run on another thread (Monitor,
+    API handlers).
+    """
+
+    def __init__(self):
+        self._hists: Dict[Tuple[str, str], LatencyHistogram] = {}
+        self._lock = threading.Lock()
+        self.started = time.time()
+
+    def record(self, symbol: str, stage: str, value_us: int):
+        hist = self._hists.get((symbol, stage))
+        with self._lock:
+            if hist is None:
+                hist = self._hists.setdefault((symbol, stage), LatencyHistogram())
+            hist.record(value_us)
+
+    def record_frame(self, symbol: str, recv_us: int, sent_us: int, decoded_us: int):
+        """Bus stages of one record: broker receive -> publish -> decode."""
+        if recv_us and sent_us:
+            self.record(symbol, "publish", sent_us - recv_us)
+        if sent_us:
+            self.record(symbol, "transport", decoded_us - sent_us)
+
+    def reset(self):
+        with self._lock:
+            self._hists.clear()
+            self.started = time.time()
+
+    def snapshot(self, symbol: Optional[str] = None) -> Dict[str, Dict[str, dict]]:
+        """{symbol: {stage: summary}}, plus ALL_SYMBOLS merged over every symbol."""
+        with self._lock:
+            items = [(key, hist) for key, hist in self._hists.items()
+                     if symbol is None or key[0] == symbol]
+            merged: Dict[str, LatencyHistogram] = {}
+            out: Dict[str, Dict[str, dict]] = {}
+            for (sym, stage), hist in items:
+                out.setdefault(sym, {})[stage] = hist.summary()
+                merged.setdefault(stage, LatencyHistogram()).merge(hist)
+        if symbol is None and merged:
+            out[ALL_SYMBOLS] = {stage: hist.summary() for stage, hist in merged.items()}
+        return {sym: dict(sorted(stages.items(), key=lambda kv: _stage_order(kv[0])))
+                for sym, stages in sorted(out.items())}
+
+    def format_table(self, per_symbol: bool = False) -> str:
+        snap = self.snapshot()
+        symbols = sorted(snap) if per_symbol else [ALL_SYMBOLS]
+        lines = [f"{'symbol':<22} {'stage':<15} {'count':>8} {'p50':>9} {'p90':>9} {'p99':>9} {'p99.9':>9} {'max':>9}  (ms)"]
+        for sym in symbols:
+            for stage, s in snap.get(sym, {}).items():
+                lines.append(
+                    f"{sym:<22} {stage:<15} {s['count']:>8} {s['p50_us'] / 1000:>9.3f} {s['p90_us'] / 1000:>9.3f} "
+                    f"{s['p99_us'] / 1000:>9.3f} {s['p999_us'] / 1000:>9.3f} {s['max_us'] / 1000:>9.3f}"
+                )
+        return "\n".join(lines)
+
+
+def _stage_order(stage: str) -> int:
+    return STAGES.index(stage) if stage in STAGES else len(STAGES)
@@ -1,67 +1,162 @@
-from dataclasses import dataclass
-
-
-
-
-# -------------------------
-# Data Models
-# -------------------------
-
-@dataclass
-class Candle:
-    symbol: str
-    open: float
-    high: float
-    low: float
-    close: float
-    volume: float
-    ts: int  # candle close timestamp (ms)
-
-
-@dataclass
-class Tick:
-    symbol: str
-    ltp: float
-    ts: int  # ltt (ms)
-    volume: int = 0
-    total_buy_qty: int = 0
-    total_sell_qty: int = 0
-    side: str = ""
-
-
-from dataclasses import dataclass
-from typing import Optional
-
-@dataclass
-class StructureLevel:
-    symbol: str            # <-- REQUIRED, missing earlier
-    price: float
-    side: str              # "LONG" or "SHORT"
-    created_ts: int
-    last_used_ts: Optional[int] = None
-
-
-# @dataclass
-# class Trade:
-#     symbol: str
-#     side: str
-#     entry_price: float
-#     entry_ts: int
-#     exit_price: Optional[float] = None
-#     exit_ts: Optional[int] = None
-#     reason: Optional[str] = None
-#     pnl :Optional[float] = None
-#     status : Optional[str] = "Unknown"
-@dataclass
-class Trade:
-    symbol: str
-    side: str
-    entry_price: float
-    entry_ts: int
-    stop_price: float        #Optional[float] = None
-    tp_price: Optional[float] = None
-    exit_price: float | None = None
-    exit_ts: int | None = None
-    reason: str | None = None
-    pnl: float | None = None
-    status : Optional[str] = "OPEN"
\ No newline at end of file
+from dataclasses import dataclass
+from typing import Dict, Iterable, Iterator, Optional, Union
+
+import numpy as np
+
+
+# -------------------------
+# Data Models
+# -------------------------
+# Slotted dataclasses: a Tick / Candle is created per feed message on the hot
+# path, and slots drop the per-instance __dict__ (smaller objects, one
+# allocation each, faster attribute access). Instances cannot take attributes
+# that are not fields.
+
+@dataclass(slots=True)
+class Candle:
+    symbol: str
+    open: float
+    high: float
+    low: float
+    close: float
+    volume: float
+    ts: int  # candle close timestamp (ms)
+
+
+@dataclass(slots=True)
+class Tick:
+    symbol: str
+    ltp: float
+    ts: int  # ltt (ms)
+    volume: int = 0
+    total_buy_qty: int = 0
+    total_sell_qty: int = 0
+    side: str = ""
+
+
+@dataclass(slots=True)
+class StructureLevel:
+    symbol: str            # <-- REQUIRED, missing earlier
+    price: float
+    side: str              # "LONG" or "SHORT"
+    created_ts: int
+    last_used_ts: Optional[int] = None
+
+
+# @dataclass
+# class Trade:
+#     symbol: str
+#     side: str
+#     entry_price: float
+#     entry_ts: int
+#     exit_price: Optional[float] = None
+#     exit_ts: Optional[int] = None
+#     reason: Optional[str] = None
+#     pnl :Optional[float] = None
+#     status : Optional[str] = "Unknown"
+@dataclass(slots=True)
+class Trade:
+    symbol: str
+    side: str
+    entry_price: float
+    entry_ts: int
+    stop_price: float        #Optional[float] = None
+    tp_price: Optional[float] = None
+    exit_price: float | None = None
+    exit_ts: int | None = None
+    reason: str | None = None
+    pnl: float | None = None
+    status : Optional[str] = "OPEN"
+
+
+# -------------------------
+# Columnar ticks
+# -------------------------
+
+class TickBatch:
+    """
+    Ticks as columns: one NumPy array per Tick field (side excepted), row i
+    is one tick. Components with a batch path (e.g. PressureTracker.
+    update_batch) read the arrays directly; iterating yields Tick objects for
+    everything else. symbol is a str when every row has the same symbol,
+    otherwise an object array; split() gives single-symbol batches.
+    """
+
+    __slots__ = ("symbol", "ltp", "ts", "volume", "total_buy_qty", "total_sell_qty")
+
+    def __init__(self, symbol: Union[str, np.ndarray], ltp, ts, volume=None,
+                 total_buy_qty=None, total_sell_qty=None):
+        self.ltp = np.asarray(ltp, dtype=np.float64)
+        n = len(self.ltp)
+        self.ts = np.asarray(ts, dtype=np.int64)
+        self.volume = np.zeros(n, np.int64) if volume is None else np.asarray(volume, dtype=np.int64)
+        # float64: live frames carry TBQ/TSQ as doubles (integers are exact below 2**53)
+        self.total_buy_qty = np.zeros(n) if total_buy_qty is None else np.asarray(total_buy_qty, dtype=np.float64)
+        self.total_sell_qty = np.zeros(n) if total_sell_qty is None else np.asarray(total_sell_qty, dtype=np.float64)
+        if not isinstance(symbol, str):
+            symbol = np.asarray(symbol, dtype=object)
+            if n and (symbol == symbol[0]).all():
+                symbol = symbol[0]
+        self.symbol = symbol
+
+    @classmethod
+    def from_ticks(cls, ticks: Iterable[Tick]) -> "TickBatch":
+        ticks = list(ticks)
+        return cls(
+            symbol=[t.symbol for t in ticks],
+            ltp=[t.ltp for t in ticks],
+            ts=[t.ts for t in ticks],
+            volume=[t.volume for t in ticks],
+            total_buy_qty=[t.total_buy_qty for t in ticks],
+            total_sell_qty=[t.total_sell_qty for t in ticks],
+        )
+
+    def __len__(self) -> int:
+        return len(self.ltp)
+
+    def symbols(self) -> np.ndarray:
+        """Symbol of every row."""
+        if isinstance(self.symbol, str):
+            return np.full(len(self), self.symbol, dtype=object)
+        return self.symbol
+
+    def __getitem__(self, index) -> Union[Tick, "TickBatch"]:
+        """A Tick for an integer index, a TickBatch for a slice / mask / index array."""
+        if isinstance(index, (int, np.integer)):
+            symbol = self.symbol if isinstance(self.symbol, str) else self.symbol[index]
+            return Tick(symbol=symbol, ltp=float(self.ltp[index]), ts=int(self.ts[index]),
+                        volume=int(self.volume[index]), total_buy_qty=int(self.total_buy_qty[index]),
+                        total_sell_qty=int(self.total_sell_qty[index]))
+        symbol = self.symbol if isinstance(self.symbol, str) else self.symbol[index]
+        return TickBatch(symbol, self.ltp[index], self.ts[index], self.volume[index],
+                         self.total_buy_qty[index], self.total_sell_qty[index])
+
+    def __iter__(self) -> Iterator[Tick]:
+        symbols = [self.symbol] * len(self) if isinstance(self.symbol, str) else self.symbol.tolist()
+        for symbol, ltp, ts, volume, tbq, tsq in zip(
+                symbols, self.ltp.tolist(), self.ts.tolist(), self.volume.tolist(),
+                self.total_buy_qty.tolist(), self.total_sell_qty.tolist()):
+            yield Tick(symbol=symbol, ltp=ltp, ts=ts, volume=volume,
+                       total_buy_qty=int(tbq), total_sell_qty=int(tsq))
+
+    def split(self) -> Dict[str, "TickBatch"]:
+        """Single-symbol batches, rows in their original order, symbols in order of first row."""
+        if isinstance(self.symbol, str):
+            return {self.symbol: self} if len(self) else {}
+        codes: Dict[str, int] = {}
+        inverse = np.fromiter((codes.setdefault(s, len(codes)) for s in self.symbol.tolist()),
+                              dtype=np.intp, count=len(self))
+        order = np.argsort(inverse, kind="stable")
+        ends = np.cumsum(np.bincount(inverse, minlength=len(codes)))
+        out: Dict[str, TickBatch] = {}
+        start = 0
+        for name, end in zip(codes, ends.tolist()):
+            rows = order[start:end]
+            out[name] = TickBatch(name, self.ltp[rows], self.ts[rows], self.volume[rows],
+                                  self.total_buy_qty[rows], self.total_sell_qty[rows])
+            start = end
+        return out
+
+    def __repr__(self) -> str:
+        symbol = self.symbol if isinstance(self.symbol, str) else f"{len(set(self.symbol.tolist()))} symbols"
+        return f"TickBatch({symbol}, {len(self)} ticks)"
@@ -6,6 +6,7 @@ import pandas as pd
 from datetime import datetime
 import json
 from trading_core.models import StructureLevel, Trade
+from trading_core.tick_buffer import TickColumnBuffer
 import config
 
 class DuckDBPersistence:
@@ -31,13 +32,15 @@ class DuckDBPersistence:
         # Create tables using the main thread's connection
         self._create_tables(self._get_conn())
         self._initialized = True
-        self.tick_buffer = []
-        self.buffer_lock = threading.Lock()
         self.buffer_limit = 1000
+        # Columnar staging for tick_data; flushed as one Arrow batch
+        self.tick_buffer = TickColumnBuffer(capacity=self.buffer_limit)
+        # Re-entrant: the save_* methods flush while already holding it
+        self.buffer_lock = threading.RLock()
 
     def _get_conn(self):
         # Each thread gets its own connection
-        if not hasattr(self._thread_local, 'conn') or self._thread_local.conn.isclosed():
+        if not hasattr(self._thread_local, 'conn'):
             self._thread_local.conn = duckdb.connect(database=self.db_path, read_only=False)
         return self._thread_local.conn
 
@@ -115,28 +118,52 @@ class DuckDBPersistence:
         query = "SELECT timestamp as ts, instrument_key as symbol, ltp, vtt as volume, tbq as total_buy_qty, tsq as total_sell_qty FROM tick_data WHERE instrument_key = ? AND timestamp BETWEEN ? AND ? ORDER BY timestamp;"
         return self._get_conn().execute(query, (symbol, from_date, to_date)).fetchdf()
 
+    def fetch_second_bars(self, symbol: str, from_date: str, to_date: str) -> pd.DataFrame:
+        """
+        The ticks of fetch_tick_data bucketed into 1-second bars inside DuckDB:
+        one row per second that has a tick (sec = epoch seconds), in order.
+        """
+        query = """
+        SELECT epoch_ms(timestamp) // 1000 AS sec, max(ltp) AS high, min(ltp) AS low,
+               arg_max(ltp, timestamp) AS close
+        FROM tick_data
+        WHERE instrument_key = ? AND timestamp BETWEEN ? AND ? AND ltp IS NOT NULL
+        GROUP BY sec ORDER BY sec;"""
+        return self._get_conn().execute(query, (symbol, from_date, to_date)).fetchdf()
+
     def save_market_data(self, data: Dict):
         with self.buffer_lock:
-            self.tick_buffer.append(data)
-            if len(self.tick_buffer) >= self.buffer_limit:
+            self.tick_buffer.append_row(data)
+            if self.tick_buffer.full:
+                self.flush_tick_buffer()
+
+    def save_market_data_values(self, values):
+        """Fast path: one tick_data row as a sequence in TICK_DATA_COLUMNS order (None = NULL)."""
+        with self.buffer_lock:
+            self.tick_buffer.append(values)
+            if self.tick_buffer.full:
                 self.flush_tick_buffer()
 
     def save_market_data_batch(self, data: List[Dict]):
         if not data: return
         with self.buffer_lock:
-            self.tick_buffer.extend(data)
-            if len(self.tick_buffer) >= self.buffer_limit:
-                self.flush_tick_buffer()
+            for row in data:
+                self.tick_buffer.append_row(row)
+                if self.tick_buffer.full:
+                    self.flush_tick_buffer()
 
     def flush_tick_buffer(self):
         with self.buffer_lock:
-            if not self.tick_buffer: return
-            df = pd.DataFrame(self.tick_buffer)
-            df = df.reindex(columns=['timestamp', 'instrument_key', 'feed_type', 'ltp', 'ltt', 'ltq', 'cp', 'oi', 'atp', 'vtt', 'tbq', 'tsq', 'delta', 'theta', 'gamma', 'vega', 'rho', 'iv', 'bid_price_1', 'bid_qty_1', 'ask_price_1', 'ask_qty_1', 'open', 'high', 'low', 'close', 'insertion_time', 'processed_time'], fill_value=None)
+            if not len(self.tick_buffer): return
             conn = self._get_conn()
-            conn.register('tick_buffer', df)
-            conn.execute('INSERT INTO tick_data SELECT * FROM tick_buffer')
-            self.tick_buffer.clear()
+            conn.register('tick_buffer', self.tick_buffer.to_relation_source())
+            try:
+                conn.execute('INSERT INTO tick_data SELECT * FROM tick_buffer')
+            finally:
+                conn.unregister('tick_buffer')
+                # Arrays are reused: only safe once DuckDB has copied them in.
+                # A failed batch is dropped rather than wedging the buffer full.
+                self.tick_buffer.clear()
 
     def get_all_symbols(self) -> List[str]:
         result = self._get_conn().execute("SELECT DISTINCT instrument_key FROM tick_data;").fetchall()
@@ -156,3 +183,118 @@ class DuckDBPersistence:
         """Performs a final flush and closes the calling thread's connection."""
         self.flush_tick_buffer()
         self.close_thread_connection()
+
+
+def _ms_to_datetime(ts):
+    """Epoch ms -> naive datetime, the way a DuckDB TIMESTAMP column hands it back."""
+    if ts is None or isinstance(ts, datetime):
+        return ts
+    return datetime.fromtimestamp(int(ts) / 1000)
+
+
+class InMemoryPersistence:
+    """
+    Process-local stand-in for DuckDBPersistence, for backtests.
+
+    Same interface and record shapes (timestamps come back as datetimes),
+    but state lives in plain dicts/lists, so every backtest worker is
+    isolated and nothing is written to disk. Market data is not written
+    back unless keep_market_data is set (then rows are kept in a list).
+    """
+
+    def __init__(self, keep_market_data: bool = False):
+        self.keep_market_data = keep_market_data
+        self.levels: List[Dict] = []
+        self.open_trades: Dict[str, Dict] = {}
+        self.closed_trades: List[Dict] = []
+        self.last_candle_ts: Dict[str, datetime] = {}
+        self.context_candles: Dict[tuple, List[Dict]] = {}
+        self.footprints: List[Dict] = []
+        self.market_data: List = []
+
+    def upsert_level(self, level: StructureLevel):
+        self.levels.append({"symbol": level.symbol, "price": level.price, "side": level.side,
+                            "created_ts": level.created_ts, "last_used_ts": level.last_used_ts})
+
+    def load_levels(self, symbol: str) -> List[Dict]:
+        return [lvl for lvl in self.levels if lvl["symbol"] == symbol]
+
+    def load_levels_forAll(self) -> List[Dict]:
+        return list(self.levels)
+
+    def _trade_record(self, tradeObj: Trade) -> Dict:
+        return {"symbol": tradeObj.symbol, "side": tradeObj.side, "entry_price": tradeObj.entry_price,
+                "entry_ts": _ms_to_datetime(tradeObj.entry_ts), "stop_price": tradeObj.stop_price,
+                "tp_price": tradeObj.tp_price, "status": tradeObj.status}
+
+    def save_open_trade(self, tradeObj: Trade):
+        self.open_trades[tradeObj.symbol] = self._trade_record(tradeObj)
+
+    def update_open_trade(self, tradeObj: Trade):
+        self.open_trades[tradeObj.symbol] = self._trade_record(tradeObj)
+
+    def close_trade(self, symbol: str, exit_price: float, exit_ts: int, reason: str, pnl: float):
+        trade = self.open_trades.pop(symbol, None)
+        if trade:
+            self.closed_trades.append(dict(trade, exit_price=exit_price, exit_ts=_ms_to_datetime(exit_ts),
+                                           reason=reason, pnl=pnl, status='CLOSED'))
+
+    def load_open_trades(self) -> List[Dict]:
+        return list(self.open_trades.values())
+
+    def load_closed_trades(self) -> List[Dict]:
+        return list(self.closed_trades)
+
+    def get_open_trade(self, symbol) -> Dict:
+        return self.open_trades.get(symbol)
+
+    def get_last_candle_ts(self, symbol: str):
+        return self.last_candle_ts.get(symbol)
+
+    def update_last_candle_ts(self, symbol: str, ts: int):
+        self.last_candle_ts[symbol] = _ms_to_datetime(ts)
+
+    def save_context_candles(self, symbol: str, candles: List[Dict], timeframe_minutes: int):
+        if not candles: return 0
+        self.context_candles.setdefault((symbol, timeframe_minutes), []).extend(dict(c, symbol=symbol) for c in candles)
+        return len(candles)
+
+    def load_context_candles(self, symbol: str, timeframe_minutes: int, limit: int) -> List[Dict]:
+        candles = self.context_candles.get((symbol, timeframe_minutes), [])
+        return sorted(candles, key=lambda c: c["ts"], reverse=True)[:limit]
+
+    def save_footprint(self, symbol: str, footprint: Dict):
+        self.footprints.append(dict(footprint, symbol=symbol))
+
+    def fetch_tick_data(self, symbol: str, from_date: str, to_date: str) -> pd.DataFrame:
+        return pd.DataFrame(columns=["ts", "symbol", "ltp", "volume", "total_buy_qty", "total_sell_qty"])
+
+    def fetch_second_bars(self, symbol: str, from_date: str, to_date: str) -> pd.DataFrame:
+        return pd.DataFrame(columns=["sec", "high", "low", "close"])
+
+    def save_market_data(self, data: Dict):
+        if self.keep_market_data:
+            self.market_data.append(data)
+
+    def save_market_data_values(self, values):
+        if self.keep_market_data:
+            self.market_data.append(values)
+
+    def save_market_data_batch(self, data: List[Dict]):
+        if self.keep_market_data:
+            self.market_data.extend(data)
+
+    def flush_tick_buffer(self):
+        pass
+
+    def get_all_symbols(self) -> List[str]:
+        return sorted({trade["symbol"] for trade in self.closed_trades} | set(self.open_trades))
+
+    def get_recent_candles(self, symbol: str, limit: int) -> List[Dict]:
+        return []
+
+    def close_thread_connection(self):
+        pass
+
+    def shutdown(self):
+        pass
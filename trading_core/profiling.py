@@ -0,0 +1,235 @@
+# =========================
+# FILE: profiling.py
+# =========================
+# Opt-in profiling of the strategy stages.
+#
+# StageProfiler.instrument(engine) replaces the bound methods of the engine's
+# components (AuctionContext, H1Aggregator, SignalGenerator, OrderBookAnalyzer,
+# bias guards, Stage12, ...) with timing wrappers on those instances only, and
+# records per (symbol, stage) call counts and cumulative / max time. The engine
+# reports rejections (the stage that stopped a candle from becoming a trade)
+# through LiveAuctionEngine._reject. Nothing is wrapped unless profiling is
+# enabled, so the disabled cost is one `is None` check per rejection.
+#
+# StackSampler is a sampling profiler for whole replay runs: a daemon thread
+# snapshots the profiled thread's Python stack every `interval` seconds and
+# writes the counts in the folded-stack format ("a;b;c 42") read by
+# flamegraph.pl, speedscope and inferno. Use cProfile (profile_call) when exact
+# call counts matter more than overhead.
+
+import cProfile
+import os
+import sys
+import threading
+import time
+from collections import Counter
+from typing import Callable, Dict, List, Optional, Tuple
+
+ALL_SYMBOLS = "*"
+
+# (component attribute on the engine or None for the engine itself, method, stage)
+ENGINE_STAGES: List[Tuple[Optional[str], str, str]] = [
+    # tick path
+    (None, "on_tick", "on_tick"),
+    ("pressure_tracker", "update", "pressure"),
+    ("renko_aggregator", "on_tick", "renko"),
+    # batched tick path (on_ticks)
+    (None, "on_ticks", "on_ticks"),
+    ("pressure_tracker", "update_batch", "pressure_batch"),
+    ("renko_aggregator", "on_ticks", "renko_batch"),
+    ("orderbook", "update_depth", "orderbook_depth"),
+    (None, "update_footprint", "footprint"),
+    ("stage12", "evaluate_exit", "stage12_exit"),
+    ("stage12", "check_trailing_stop", "stage12_trailing"),
+    # candle path
+    (None, "on_candle_close", "on_candle_close"),
+    ("stage12", "on_candle_close", "stage12"),
+    ("h1_aggregator", "on_1min_candle", "h1_aggregate"),
+    ("context_filter", "_check_igniting_candle", "igniting"),
+    ("context_filter", "allow_trade", "context"),
+    ("h1_aggregator", "allows_trade", "h1_bias"),
+    ("signal_generator", "get_signal", "signal"),
+    ("orderbook", "check_entry_imbalance", "orderbook"),
+    ("bias_guard", "allow_trade", "bias_guard"),
+    ("directionaBias_guard", "allow_trade", "directional_bias"),
+    ("cooldown", "in_cooldown", "cooldown"),
+]
+
+
+def _symbol_of(args, kwargs) -> str:
+    """Symbol of a hooked call: its first argument (a symbol, or a Tick/Candle/Trade/TickBatch)."""
+    first = args[0] if args else next(iter(kwargs.values()), None)
+    if isinstance(first, str):
+        return first
+    symbol = getattr(first, "symbol", ALL_SYMBOLS)
+    # a multi-symbol TickBatch carries an array of symbols
+    return symbol if isinstance(symbol, str) else ALL_SYMBOLS
+
+
+class StageStats:
+    __slots__ = ("calls", "total_ns", "max_ns", "rejections")
+
+    def __init__(self):
+        self.calls = 0
+        self.total_ns = 0
+        self.max_ns = 0
+        self.rejections = 0
+
+    def merge(self, other: "StageStats"):
+        self.calls += other.calls
+        self.total_ns += other.total_ns
+        self.max_ns = max(self.max_ns, other.max_ns)
+        self.rejections += other.rejections
+
+    def summary(self) -> dict:
+        return {
+            "calls": self.calls,
+            "total_ms": round(self.total_ns / 1e6, 3),
+            "mean_us": round(self.total_ns / self.calls / 1e3, 2) if self.calls else 0.0,
+            "max_us": round(self.max_ns / 1e3, 1),
+            "rejections": self.rejections,
+        }
+
+
+class StageProfiler:
+    """Call counts, cumulative time and rejections per (symbol, stage)."""
+
+    def __init__(self):
+        self.stats: Dict[Tuple[str, str], StageStats] = {}
+        self._hooks: List[Tuple[object, str]] = []
+        self.started = time.time()
+
+    def _get(self, symbol: str, stage: str) -> StageStats:
+        stats = self.stats.get((symbol, stage))
+        if stats is None:
+            stats = self.stats[(symbol, stage)] = StageStats()
+        return stats
+
+    def record(self, symbol: str, stage: str, elapsed_ns: int):
+        stats = self._get(symbol, stage)
+        stats.calls += 1
+        stats.total_ns += elapsed_ns
+        if elapsed_ns > stats.max_ns:
+            stats.max_ns = elapsed_ns
+
+    def reject(self, symbol: str, stage: str):
+        self._get(symbol, stage).rejections += 1
+
+    # ---------- hooks ----------
+
+    def wrap(self, obj, method: str, stage: str, symbol_of: Callable = _symbol_of):
+        """Times every call of obj.<method> (this instance only) as `stage`."""
+        original = getattr(obj, method)
+        record = self.record
+        perf_ns = time.perf_counter_ns
+
+        def timed(*args, **kwargs):
+            start = perf_ns()
+            try:
+                return original(*args, **kwargs)
+            finally:
+                record(symbol_of(args, kwargs), stage, perf_ns() - start)
+
+        timed.__wrapped__ = original
+        setattr(obj, method, timed)
+        self._hooks.append((obj, method))
+
+    def instrument(self, engine, stages=ENGINE_STAGES):
+        for component, method, stage in stages:
+            obj = engine if component is None else getattr(engine, component, None)
+            if obj is not None and hasattr(obj, method):
+                self.wrap(obj, method, stage)
+
+    def uninstrument(self):
+        """Removes the instance-level wrappers, restoring the class methods."""
+        for obj, method in reversed(self._hooks):
+            obj.__dict__.pop(method, None)
+        self._hooks.clear()
+
+    # ---------- report ----------
+
+    def reset(self):
+        self.stats.clear()
+        self.started = time.time()
+
+    def snapshot(self) -> Dict[str, Dict[str, dict]]:
+        """{symbol: {stage: summary}}, plus ALL_SYMBOLS merged over every symbol."""
+        out: Dict[str, Dict[str, dict]] = {}
+        merged: Dict[str, StageStats] = {}
+        for (symbol, stage), stats in list(self.stats.items()):
+            out.setdefault(symbol, {})[stage] = stats.summary()
+            merged.setdefault(stage, StageStats()).merge(stats)
+        if merged:
+            out[ALL_SYMBOLS] = {stage: stats.summary() for stage, stats in merged.items()}
+        return out
+
+    def format_table(self, per_symbol: bool = False) -> str:
+        snap = self.snapshot()
+        symbols = sorted(snap) if per_symbol else [ALL_SYMBOLS]
+        lines = [f"{'symbol':<22} {'stage':<18} {'calls':>9} {'total ms':>10} {'mean us':>9} {'max us':>9} {'rejects':>8}"]
+        for symbol in symbols:
+            stages = snap.get(symbol, {})
+            for stage, s in sorted(stages.items(), key=lambda kv: -kv[1]["total_ms"]):
+                lines.append(f"{symbol:<22} {stage:<18} {s['calls']:>9} {s['total_ms']:>10.1f} "
+                             f"{s['mean_us']:>9.1f} {s['max_us']:>9.1f} {s['rejections']:>8}")
+        return "\n".join(lines)
+
+
+class StackSampler:
+    """
+    Samples one thread's Python stack every `interval` seconds (default: the
+    thread that calls start()) and aggregates identical stacks.
+    """
+
+    def __init__(self, interval: float = 0.005, thread_id: int = None):
+        self.interval = interval
+        self.thread_id = thread_id
+        self.samples: Counter = Counter()
+        self._stop = threading.Event()
+        self._thread = None
+
+    def start(self):
+        if self.thread_id is None:
+            self.thread_id = threading.get_ident()
+        self._stop.clear()
+        self._thread = threading.Thread(target=self._run, name="stack-sampler", daemon=True)
+        self._thread.start()
+        return self
+
+    def stop(self):
+        self._stop.set()
+        if self._thread:
+            self._thread.join()
+
+    def __enter__(self):
+        return self.start()
+
+    def __exit__(self, *exc):
+        self.stop()
+
+    def _run(self):
+        while not self._stop.wait(self.interval):
+            frame = sys._current_frames().get(self.thread_id)
+            stack = []
+            while frame is not None:
+                code = frame.f_code
+                stack.append(f"{code.co_name} ({os.path.basename(code.co_filename)}:{code.co_firstlineno})")
+                frame = frame.f_back
+            if stack:
+                self.samples[";".join(reversed(stack))] += 1
+
+    def write_folded(self, path: str) -> int:
+        """Writes "frame;frame;frame count" lines; returns the number of samples."""
+        with open(path, "w") as f:
+            for stack, count in self.samples.most_common():
+                f.write(f"{stack} {count}\n")
+        return sum(self.samples.values())
+
+
+def profile_call(fn: Callable, out_path: str, *args, **kwargs):
+    """Runs fn under cProfile and dumps the stats to out_path (pstats / snakeviz)."""
+    profiler = cProfile.Profile()
+    try:
+        return profiler.runcall(fn, *args, **kwargs)
+    finally:
+        profiler.dump_stats(out_path)
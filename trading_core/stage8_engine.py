@@ -3,16 +3,23 @@
 # =========================
 
 from dataclasses import dataclass, field
-from typing import Dict, List, Optional
+from typing import Dict, Iterable, List, Optional, Tuple
+import itertools
 import time
 import threading
 from datetime import datetime
 from concurrent.futures import ThreadPoolExecutor
-from trading_core.persistence import QuestDBPersistence
+from trading_core.persistence import DuckDBPersistence
+from trading_core.clock import Clock, make_clock
+from trading_core.latency import LATENCY_TOPIC, LatencyRecorder, now_us
+from trading_core.profiling import StageProfiler
 from trading_core.models import *
+from data_handling.feed_codec import FeedRecord, decode_frame, subscribe
 import json
 from dataclasses import asdict
 
+import numpy as np
+
 from strategy.footprint_engine import FootprintBuilder
 
 import os
@@ -105,9 +112,15 @@ class LiveAuctionEngine:
     The LiveAuctionEngine is the core of the trading bot. It integrates market
     data, trading logic, and persistence to make real-time trading decisions.
     """
-    def __init__(self, config: dict, persistence: QuestDBPersistence):
+    def __init__(self, config: dict, persistence: DuckDBPersistence, clock: Clock = None):
         self.config = config
         self.simulation_mode = config.get("simulation_mode", False)
+        # Time source for every component: event time (tick ltt) in simulation,
+        # config "clock" = "wall" | "event" | "paced" (at config "replay_speed" x) overrides
+        self.clock = clock or make_clock(
+            config.get("clock", "event" if self.simulation_mode else "wall"),
+            config.get("replay_speed", 1.0)
+        )
         self.trade_engine = TradeEngine()
         self.structure: Dict[str, List[StructureLevel]] = {}
         self.last_candle_ts: Dict[str, int] = {}
@@ -120,7 +133,8 @@ class LiveAuctionEngine:
         # The AuctionContext provides the primary market structure analysis.
         self.context_filter = AuctionContext(
             lookback=config.get("parameters", {}).get("lookback", 120),
-            tick_size=config.get("parameters", {}).get("tick_size", 0.05)
+            tick_size=config.get("parameters", {}).get("tick_size", 0.05),
+            std_dev=config.get("parameters", {}).get("std_dev")
         )
 
         # The Stage10AddLogic determines when to add to an existing position.
@@ -163,11 +177,18 @@ class LiveAuctionEngine:
         self.h1_aggregator = H1Aggregator(
             sma_period=self.config.get("parameters", {}).get("sma_period", 20),
             bias_confirm_candles=self.config.get("parameters", {}).get("bias_confirm_candles", 3),
-            timeframe_minutes=self.config.get("parameters", {}).get("bias_timeframe_minutes", 60)
+            timeframe_minutes=self.config.get("parameters", {}).get("bias_timeframe_minutes", 60),
+            clock=self.clock
         )
 
         # The OrderBookAnalyzer scans Level 2 data for liquidity and imbalances.
-        self.orderbook = OrderBookAnalyzer(imbalance_ratio=1.5)
+        self.orderbook = OrderBookAnalyzer(
+            imbalance_ratio=self.config.get("parameters", {}).get("imbalance_ratio", 1.5)
+        )
+
+        # ATR multipliers for the Chandelier trailing stop (trending / normal conditions)
+        self.trail_mult_trending = self.config.get("parameters", {}).get("trail_mult_trending", 4.0)
+        self.trail_mult_normal = self.config.get("parameters", {}).get("trail_mult_normal", 3.0)
         
         # The SignalGenerator identifies specific trade setups based on price action and technical indicators.
         self.signal_generator = SignalGenerator()
@@ -180,100 +201,126 @@ class LiveAuctionEngine:
         self.last_vols: Dict[str, float] = {}
         self.broadcaster = None
 
-        # The RenkoAggregator builds Renko charts from tick data to filter out market noise.
+        # Tick-to-decision latency per (symbol, stage); fed from bus frames in start_consuming
+        self.latency = LatencyRecorder()
+        self._frame_stamps = None  # (recv_us, decoded_us) of the frame being processed
+
+        # The RenkoAggregator builds per-symbol Renko charts from tick data to filter out market noise.
         self.renko_aggregator = RenkoAggregator(on_renko_brick=self.on_renko_brick)
 
-    def start_consuming(self, zmq_sub_url: str):
-        """Subscribes to the ZeroMQ feed and processes incoming market data."""
+        # Per-stage call/time/rejection counters; None unless enable_profiling() (config "profile").
+        # Last: instrumenting wraps the components above, so all of them must exist.
+        self.profiler: Optional[StageProfiler] = None
+        if config.get("profile"):
+            self.enable_profiling()
+
+    def start_consuming(self, zmq_sub_url: str, symbols: Optional[List[str]] = None):
+        """
+        Subscribes to the ZeroMQ feed and processes incoming market data.
+        Only the per-symbol topics of `symbols` (default: config['symbols'])
+        are subscribed, so other instruments never reach this process.
+        """
         import zmq
-        import json
+
+        if symbols is None:
+            symbols = self.config['symbols']
 
         context = zmq.Context()
         sub_socket = context.socket(zmq.SUB)
         sub_socket.connect(zmq_sub_url)
-        sub_socket.setsockopt(zmq.SUBSCRIBE, config.ZMQ_TOPIC.encode('utf-8'))
+        subscribe(sub_socket, symbols)
 
-        print(f"Strategy {self.config['name']} is consuming from {zmq_sub_url}")
+        print(f"Strategy {self.config['name']} is consuming {len(symbols)} symbols from {zmq_sub_url}")
 
         while True:
             try:
                 topic, message = sub_socket.recv_multipart()
-                data = json.loads(message.decode('utf-8'))
-
-                feeds = data.get("feeds", {})
-                for symbol, feed in feeds.items():
-                    if symbol not in self.config['symbols']:
-                        continue
-
-                    # Replicate the data parsing logic here
-                    full_feed = feed.get("fullFeed", {})
-                    market = full_feed.get("marketFF") or full_feed.get("indexFF")
-
-                    if not market:
-                        continue
-
-                    # Process Tick data
-                    ltpc = market.get('ltpc')
-                    if ltpc and 'ltp' in ltpc and 'ltt' in ltpc:
-                        tick = Tick(
-                            symbol=symbol,
-                            ltp=ltpc['ltp'],
-                            ts=int(ltpc['ltt']),
-                            volume=market.get('vtt', 0),
-                            total_buy_qty=market.get('tbq', 0),
-                            total_sell_qty=market.get('tsq', 0)
-                        )
-                        self.on_tick(tick)
-
-                        # WARMUP CHECK
-                        if not self.simulation_mode and symbol not in self.h1_aggregator.h1_candles:
-                            try:
-                                self.h1_aggregator.initialize_symbol(symbol)
-                            except Exception as e:
-                                print(f"Warmup failed for {symbol}: {e}")
-
-                        # Update order book and footprint
-                        if market:
-                            self.orderbook.update(symbol, market, tick.ts)
-                            last_vol = self.last_vols.get(symbol, tick.volume)
-                            trade_vol = int(tick.volume) - int(last_vol)
-                            if trade_vol < 0: trade_vol = 0
-                            self.last_vols[symbol] = tick.volume
-                            ltq = int(ltpc.get('ltq', 0))
-                            if trade_vol <= 0 and ltq > 0:
-                                trade_vol = ltq
-                            if trade_vol > 0:
-                                self.update_footprint(symbol, tick.ltp, trade_vol, tick.ts)
-
-                            # Broadcast DOM
-                            if self.broadcaster:
-                                ml = market.get("marketLevel", {})
-                                quotes = ml.get("bidAskQuote", [])
-                                bids, asks = {}, {}
-                                for q in quotes:
-                                    if "bidP" in q and q["bidP"]: bids[str(q["bidP"])] = q.get("bidQ", 0)
-                                    if "askP" in q and q["askP"]: asks[str(q["askP"])] = q.get("askQ", 0)
-
-                                dom_msg = {"type": "dom", "symbol": symbol, "bids": bids, "asks": asks, "ts": tick.ts}
-                                self.broadcaster(symbol, dom_msg)
-
-                    # Process Candle Data
-                    ohlc_list = market.get("marketOHLC", {}).get("ohlc", [])
-                    for ohlc in ohlc_list:
-                        if ohlc.get("interval") == "I1":
-                            candle = Candle(
-                                symbol=symbol,
-                                open=float(ohlc["open"]),
-                                high=float(ohlc["high"]),
-                                low=float(ohlc["low"]),
-                                close=float(ohlc["close"]),
-                                volume=int(ohlc.get("vol", 0)),
-                                ts=int(ohlc["ts"]),
-                            )
-                            self.on_candle_close(candle)
+                frame = decode_frame(message)
+                decoded_us = now_us()
+
+                self._frame_stamps = (frame.recv_us, decoded_us)
+                for record in frame.records:
+                    self.latency.record_frame(record.symbol, frame.recv_us, frame.sent_us, decoded_us)
+                    self.on_feed_record(record)
 
             except Exception as e:
                 print(f"Error in strategy consumer: {e}")
+            finally:
+                self._frame_stamps = None
+
+    def on_feed_record(self, record: FeedRecord):
+        """Processes one decoded bus record (tick, depth and OHLC for a symbol)."""
+        symbol = record.symbol
+        stamps = self._frame_stamps
+        if stamps:
+            recv_us, last_us = stamps
+
+        # Process Tick data
+        if record.has_tick:
+            tick = Tick(
+                symbol=symbol,
+                ltp=record.ltp,
+                ts=record.ltt,
+                volume=record.vtt,
+                total_buy_qty=record.tbq,
+                total_sell_qty=record.tsq
+            )
+            self.on_tick(tick)
+            if stamps:
+                done_us = now_us()
+                self.latency.record(symbol, "on_tick", done_us - last_us)
+                if recv_us:
+                    self.latency.record(symbol, "tick_total", done_us - recv_us)
+                last_us = done_us
+
+            # WARMUP CHECK
+            if not self.simulation_mode and symbol not in self.h1_aggregator.h1_candles:
+                try:
+                    self.h1_aggregator.initialize_symbol(symbol)
+                except Exception as e:
+                    print(f"Warmup failed for {symbol}: {e}")
+
+            # Update order book and footprint
+            self.orderbook.update_depth(symbol, record.depth, record.tbq, record.tsq, tick.ts)
+            last_vol = self.last_vols.get(symbol, tick.volume)
+            trade_vol = int(tick.volume) - int(last_vol)
+            if trade_vol < 0: trade_vol = 0
+            self.last_vols[symbol] = tick.volume
+            ltq = record.ltq
+            if trade_vol <= 0 and ltq > 0:
+                trade_vol = ltq
+            if trade_vol > 0:
+                self.update_footprint(symbol, tick.ltp, trade_vol, tick.ts)
+
+            # Broadcast DOM
+            if self.broadcaster:
+                bids, asks = {}, {}
+                for bid_p, bid_q, ask_p, ask_q in record.depth:
+                    if bid_p: bids[str(bid_p)] = bid_q
+                    if ask_p: asks[str(ask_p)] = ask_q
+
+                dom_msg = {"type": "dom", "symbol": symbol, "bids": bids, "asks": asks, "ts": tick.ts}
+                self.broadcaster(symbol, dom_msg)
+
+        # Process Candle Data
+        for ohlc in record.ohlc:
+            if ohlc.interval == "I1":
+                candle = Candle(
+                    symbol=symbol,
+                    open=ohlc.open,
+                    high=ohlc.high,
+                    low=ohlc.low,
+                    close=ohlc.close,
+                    volume=ohlc.vol,
+                    ts=ohlc.ts,
+                )
+                self.on_candle_close(candle)
+                if stamps:
+                    done_us = now_us()
+                    self.latency.record(symbol, "decision", done_us - last_us)
+                    if recv_us:
+                        self.latency.record(symbol, "decision_total", done_us - recv_us)
+                    last_us = done_us
 
     def on_renko_brick(self, brick: Candle):
         # This method will be called by the RenkoAggregator when a new brick is formed.
@@ -287,6 +334,22 @@ class LiveAuctionEngine:
     def set_broadcaster(self, fn):
         self.broadcaster = fn
 
+    def enable_profiling(self, profiler: StageProfiler = None) -> StageProfiler:
+        """Hooks a StageProfiler around the strategy stages (see trading_core/profiling.py)."""
+        if self.profiler is None:
+            self.profiler = profiler or StageProfiler()
+            self.profiler.instrument(self)
+        return self.profiler
+
+    def disable_profiling(self):
+        if self.profiler is not None:
+            self.profiler.uninstrument()
+            self.profiler = None
+
+    def _reject(self, symbol: str, stage: str):
+        if self.profiler is not None:
+            self.profiler.reject(symbol, stage)
+
     def update_footprint(self, symbol: str, price: float, qty: float, ts: int):
         if symbol not in self.footprints:
             # Auto-Calibrate Threshold based on History
@@ -300,7 +363,7 @@ class LiveAuctionEngine:
                     dynamic_vol = int(avg * 1.0) # 1.0x Avg Vol
                     print(f"[Auto-Calibrate] {symbol} Vol Threshold: {dynamic_vol} (Avg: {int(avg)})")
             
-            self.footprints[symbol] = FootprintBuilder(vol_threshold=dynamic_vol)
+            self.footprints[symbol] = FootprintBuilder(vol_threshold=dynamic_vol, clock=self.clock)
         
         fp = self.footprints[symbol]
         
@@ -327,25 +390,23 @@ class LiveAuctionEngine:
              side = "BUY" 
 
         fp.on_tick(price, qty, side)
-        
+
+        # Live UI: stream only what changed (full bar when a bar opens).
+        # Sent before the rotation check so clients get the last trade of a closing bar.
+        if self.broadcaster:
+            msg = fp.patch(atp=price) # Using price as ATP proxy for now
+            if msg:
+                msg["symbol"] = symbol
+                self.broadcaster(symbol, msg)
+
         # Check for rotation (New Bar)
         # Timestamp is in ms, Builder expects seconds for check_rotation?
         # Builder uses seconds.
         snap, rotated = fp.check_rotation(ts / 1000)
-        
-        # Always broadcast the update? Or only on change?
-        # Broadcasting every tick might be heavy. 
-        # But frontend expects "live" updates.
-        # Let's broadcast the current snapshot (or partial)
-        
-        # If rotated, we might want to send the FINAL of previous bar and START of new.
+
         if rotated and snap:
              # This snapshot is the CLOSED bar
-             # 1. Broadcaster (Live UI)
-             if self.broadcaster:
-                 self.broadcaster(symbol, snap)
-             
-             # 2. Persistence (DB Consistency)
+             # 1. Persistence (DB Consistency)
              # Use the same 'auction_trading' DB as everything else
              # We can access raw db handle via self.persistence.db or add a method.
              # Accessing internal db handle is quick fix.
@@ -358,7 +419,7 @@ class LiveAuctionEngine:
              except Exception as e:
                  print(f"Footprint Save Error: {e}")
              
-             # 3. SYNTHETIC STRATEGY TRIGGER
+             # 2. SYNTHETIC STRATEGY TRIGGER
              # If WSS doesn't send OHLC, we build it here.
              try:
                  syn_candle = Candle(
@@ -374,18 +435,24 @@ class LiveAuctionEngine:
                  self.on_candle_close(syn_candle)
              except Exception as e:
                  print(f"Synthetic Candle Error: {e}")
-             
-        # Send current incomplete bar
-        current_snap = fp.snapshot(atp=price) # Using price as ATP proxy for now
-        current_snap["type"] = "footprint"
-        current_snap["symbol"] = symbol
-        
-        if self.broadcaster:
-            self.broadcaster(symbol, current_snap)
-
-
 
+             # 3. Open the new bar on the UI (full message, seq continues)
+             if self.broadcaster:
+                 msg = fp.patch(atp=price)
+                 msg["symbol"] = symbol
+                 self.broadcaster(symbol, msg)
 
+    def footprint_snapshot(self, symbol: str) -> Optional[dict]:
+        """
+        Full current footprint bar for a UI client that just connected or
+        sent {"action": "resync"} after detecting a seq gap.
+        """
+        fp = self.footprints.get(symbol)
+        if fp is None:
+            return None
+        msg = fp.full_snapshot()
+        msg["symbol"] = symbol
+        return msg
 
     def loadFromDb(self):
         print("-------- REHYDRATE --------")
@@ -394,9 +461,32 @@ class LiveAuctionEngine:
         self.trade_engine.open_trades = {}
         self.trade_engine.closed_trades = [] # Ensure clean slate
         
+        self._rehydrate_pending = not self.clock.started()
+        if self._rehydrate_pending:
+            # Event clock before its first event (reads 1970): "today" is not
+            # known yet, so trades are rehydrated on the first observed event
+            print("Rehydrating trades on the first event")
+        else:
+            self._rehydrate_trades()
+
+        # ---- STRUCTURE LEVELS ----
+        self.structure = {}
+        for doc in self.persistence.load_levels_forAll():
+            lvl = StructureLevel(
+                symbol=doc["symbol"],
+                price=doc["price"],
+                side=doc["side"],
+                created_ts=doc["created_ts"],
+                last_used_ts=doc.get("last_used_ts")
+            )
+            self.structure.setdefault(lvl.symbol, []).append(lvl)
+
+    def _rehydrate_trades(self, now_ms: int = None):
+        """Loads today's open and closed trades; today is the clock's (or now_ms's) day."""
+        self._rehydrate_pending = False
+
         # Calculate Start of Day to filter stale trades
-        from datetime import datetime
-        now = datetime.now()
+        now = self.clock.now() if now_ms is None else datetime.fromtimestamp(now_ms / 1000)
         today_start_dt = now.replace(hour=0, minute=0, second=0, microsecond=0)
         today_start = today_start_dt.timestamp() * 1000
         
@@ -451,19 +541,6 @@ class LiveAuctionEngine:
             
         print(f"Rehydration All Claims: OPEN {open_loaded} (Skipped {open_skipped}), CLOSED {closed_loaded} (Skipped {closed_skipped})")
 
-
-        # ---- STRUCTURE LEVELS ----
-        self.structure = {}
-        for doc in self.persistence.load_levels_forAll():
-            lvl = StructureLevel(
-                symbol=doc["symbol"],
-                price=doc["price"],
-                side=doc["side"],
-                created_ts=doc["created_ts"],
-                last_used_ts=doc.get("last_used_ts")
-            )
-            self.structure.setdefault(lvl.symbol, []).append(lvl)
-
     # -------- ticks --------
 
     def on_tick(self, tick: Tick):
@@ -472,10 +549,10 @@ class LiveAuctionEngine:
         for real-time market data and is responsible for managing the lifecycle
         of open trades.
         """
-        # Constants for early trade protection
-        MIN_HOLD_SECONDS = 180    # 3 minutes minimum hold
-        MIN_PROFIT_PCT = 0.003    # 0.3% minimum profit before discretionary exits
-        
+        self.clock.observe(tick.ts)
+        if self._rehydrate_pending:
+            self._rehydrate_trades()
+
         # 1. Always update pressure tracker (even without open trade)
         self.pressure_tracker.update(tick)
         
@@ -485,7 +562,67 @@ class LiveAuctionEngine:
         if not self.trade_engine.has_open_trade(tick.symbol):
             return
 
-        trade = self.trade_engine.open_trades[tick.symbol]
+        self._manage_open_trade(self.trade_engine.open_trades[tick.symbol], tick)
+
+    def on_ticks(self, batch: TickBatch, candles: Iterable[Tuple[int, Candle]] = ()):
+        """
+        Batch form of on_tick / on_candle_close for data known upfront
+        (backtests, replays). Same trades and state as calling on_tick for
+        every row of the batch, with on_candle_close(candle) for each
+        (row, candle) of `candles` (ascending rows) once the first `row` rows
+        are in.
+
+        While a row's symbol has no open trade the tick only feeds the clock,
+        the pressure tracker and renko, none of which the candle logic reads
+        in simulation mode, so such rows are deferred and applied in one
+        vectorized call (_advance_ticks) when a row with an open trade comes
+        up or at the end. Trades open on candle close, so without trades the
+        whole batch takes one call. Rows of a symbol with an open trade go
+        through on_tick one by one, until the trade closes.
+        """
+        n = len(batch)
+        if self._rehydrate_pending and n:
+            # Before _first_live_row reads open_trades
+            self._rehydrate_trades(int(batch.ts[0]))
+        done = 0  # rows [0, done) applied
+        pos = 0   # rows [0, pos) applied or deferred
+        for row, candle in itertools.chain(candles, ((n, None),)):
+            while pos < row:
+                live = self._first_live_row(batch, pos, row)
+                if live == row:
+                    pos = row
+                    break
+                if live > done:
+                    self._advance_ticks(batch[done:live])
+                self.on_tick(batch[live])
+                pos = done = live + 1
+            if candle is not None:
+                self.on_candle_close(candle)
+        if done < n:
+            self._advance_ticks(batch[done:] if done else batch)
+
+    def _first_live_row(self, batch: TickBatch, start: int, stop: int) -> int:
+        """First row in [start, stop) whose symbol has an open trade, else stop."""
+        open_trades = self.trade_engine.open_trades
+        if isinstance(batch.symbol, str):
+            return start if batch.symbol in open_trades else stop
+        if not open_trades:
+            return stop
+        live = np.flatnonzero(np.isin(batch.symbol[start:stop], list(open_trades)))
+        return start + int(live[0]) if len(live) else stop
+
+    def _advance_ticks(self, rows: TickBatch):
+        """The no-open-trade part of on_tick for every row: clock, pressure, renko."""
+        self.clock.observe_batch(rows.ts)
+        self.pressure_tracker.update_batch(rows)
+        self.renko_aggregator.on_ticks(rows)
+
+    def _manage_open_trade(self, trade: Trade, tick: Tick):
+        """SL, trailing and discretionary exits of the symbol's open trade for one tick."""
+        # Constants for early trade protection
+        MIN_HOLD_SECONDS = 180    # 3 minutes minimum hold
+        MIN_PROFIT_PCT = 0.003    # 0.3% minimum profit before discretionary exits
+
         symbol = tick.symbol
         
         # Calculate hold time and current profit %
@@ -518,9 +655,9 @@ class LiveAuctionEngine:
         if hold_time_sec < MIN_HOLD_SECONDS or pnl_pct < MIN_PROFIT_PCT:
             # Trade needs time to develop - only trailing allowed
             if self.pressure_tracker.is_trending(symbol):
-                self.stage12.check_trailing_stop(trade, tick.ltp, multiplier=4.0)
+                self.stage12.check_trailing_stop(trade, tick.ltp, multiplier=self.trail_mult_trending)
             else:
-                self.stage12.check_trailing_stop(trade, tick.ltp, multiplier=3.0)
+                self.stage12.check_trailing_stop(trade, tick.ltp, multiplier=self.trail_mult_normal)
             return
         
         # ========================================
@@ -561,9 +698,9 @@ class LiveAuctionEngine:
         # TRAILING STOP (dynamic based on trend)
         # ========================================
         if self.pressure_tracker.is_trending(symbol):
-            self.stage12.check_trailing_stop(trade, tick.ltp, multiplier=4.0)
+            self.stage12.check_trailing_stop(trade, tick.ltp, multiplier=self.trail_mult_trending)
         else:
-            self.stage12.check_trailing_stop(trade, tick.ltp, multiplier=3.0)
+            self.stage12.check_trailing_stop(trade, tick.ltp, multiplier=self.trail_mult_normal)
     
     def _check_candle_hl_broken(self, trade: Trade, tick: Tick) -> bool:
         """
@@ -648,6 +785,9 @@ class LiveAuctionEngine:
         the core trading logic, where the system evaluates market structure and
         identifies potential trade entries.
         """
+        self.clock.observe(candle.ts)
+        if self._rehydrate_pending:
+            self._rehydrate_trades()
         self.stage12.on_candle_close(candle)
         self.last_candle_ts[candle.symbol] = candle.ts
         
@@ -692,6 +832,7 @@ class LiveAuctionEngine:
              pass
         elif candle.volume < entry_thresh:
              print(f"[REJECT] {candle.symbol} Vol {candle.volume} < {entry_thresh} (Dynamic)")
+             self._reject(candle.symbol, "volume")
              return
 
              
@@ -705,6 +846,7 @@ class LiveAuctionEngine:
                 side = "SHORT"
                 is_igniting = True
             else:
+                self._reject(candle.symbol, "igniting")
                 return # Doji igniting? Skip.
         
         if not is_igniting:
@@ -714,6 +856,7 @@ class LiveAuctionEngine:
                 side = "SHORT"
             else:
                 print(f"[REJECT] {candle.symbol} not igniting  Context Filter blocked")
+                self._reject(candle.symbol, "context")
                 return #  REMOVE RETURN CONTINUE Aother logic
                  
 
@@ -728,6 +871,7 @@ class LiveAuctionEngine:
                 pass # Allow
             else:
                 print(f"[REJECT] {candle.symbol} H1 Bias Agreement blocked (Side: {side})")
+                self._reject(candle.symbol, "h1_bias")
                 return
             
         # ============================
@@ -755,6 +899,7 @@ class LiveAuctionEngine:
             # In simulation, if we lack H1 levels, we might miss signals. 
             if not is_igniting and not self.simulation_mode: 
                  print(f"[REJECT] {candle.symbol} No Signal Pattern (Pullback/Reversal)")
+                 self._reject(candle.symbol, "signal")
                  return 
         
         # ============================
@@ -770,6 +915,7 @@ class LiveAuctionEngine:
             else:
                 # Real rejection
                 print(f"[REJECT] {candle.symbol} OrderBook Imbalance blocked")
+                self._reject(candle.symbol, "orderbook")
                 return
 
         # Check bias guards and cooldowns
@@ -777,12 +923,14 @@ class LiveAuctionEngine:
            not self.directionaBias_guard.allow_trade(candle.symbol, side) or \
            not self._allow_entry(candle, side):
             print(f"[REJECT] {candle.symbol} Bias/Cooldown/Guard blocked")
+            self._reject(candle.symbol, "guards")
             return
 
         # Get ATR for stop placement
         last_atr = self.stage12.atr_tracker.get_atr(candle.symbol)
         if last_atr is None:
             print(f"[REJECT] {candle.symbol} ATR not ready")
+            self._reject(candle.symbol, "atr")
             return  # Do not trade until ATR is ready
 
         # Execute trade
@@ -847,17 +995,47 @@ class LiveAuctionEngine:
 # -------------------------
 
 class Monitor:
-    def __init__(self, engine: LiveAuctionEngine):
+    """
+    Prints trade counts every `interval` seconds and, every `latency_interval`
+    seconds, the engine's latency histograms (and stage profile, if enabled). The latency snapshot is also sent
+    through the engine's broadcaster (type "latency") so api/server.py can
+    serve it from /api/latency.
+    """
+
+    def __init__(self, engine: LiveAuctionEngine, interval: float = 5.0, latency_interval: float = None):
         self.engine = engine
+        self.interval = interval
+        self.latency_interval = latency_interval or getattr(config, 'LATENCY_DUMP_INTERVAL', 30)
 
     def start(self):
         t = threading.Thread(target=self._run, daemon=True)
         t.start()
 
     def _run(self):
+        last_latency = time.monotonic()
         while True:
             print(
                 f"[MONITOR] open_trades={self.engine.trade_engine.get_open_trade_count()} "
                 f"closed_trades={len(self.engine.trade_engine.closed_trades)}"
             )
-            time.sleep(5)
+            if time.monotonic() - last_latency >= self.latency_interval:
+                last_latency = time.monotonic()
+                self.dump_latency()
+                if self.engine.profiler is not None:
+                    print(f"[MONITOR] stage profile:\n{self.engine.profiler.format_table()}")
+            time.sleep(self.interval)
+
+    def dump_latency(self):
+        snapshot = self.engine.latency.snapshot()
+        if not snapshot:
+            return
+        print(f"[MONITOR] latency ({self.engine.config.get('name', 'engine')}):\n"
+              f"{self.engine.latency.format_table(per_symbol=True)}")
+        if self.engine.broadcaster:
+            self.engine.broadcaster(LATENCY_TOPIC, {
+                "type": "latency",
+                "strategy": self.engine.config.get("name", "engine"),
+                "ts": int(time.time() * 1000),
+                "since": int(self.engine.latency.started * 1000),
+                "symbols": snapshot,
+            })
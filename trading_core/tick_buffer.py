@@ -0,0 +1,151 @@
+# =========================
+# FILE: tick_buffer.py
+# =========================
+# Columnar staging buffer for tick_data inserts.
+#
+# Rows are staged as tuples in a preallocated slot list (one list store per
+# tick, no per-tick dict and no per-field Python work). On flush the slots are
+# transposed column-wise in C (zip) and each column is built as a typed Arrow
+# array, so DuckDB scans one RecordBatch instead of converting a DataFrame of
+# Python objects. Without pyarrow the columns become a typed pandas frame.
+# (Per-field writes into NumPy column arrays from Python were slower than the
+# whole insert; the C-level transpose is cheaper.)
+
+from datetime import datetime, timedelta
+from typing import Dict, List, Sequence, Tuple
+
+import pandas as pd
+
+try:
+    import pyarrow as pa
+except ImportError:  # optional; pandas fallback below
+    pa = None
+
+# tick_data column order (must match the CREATE TABLE in persistence.py).
+# Kinds: "str", "f8", "i8", or "ts_<unit>" for TIMESTAMP columns. Integer
+# values for a TIMESTAMP column are epoch counts in that unit, which is what
+# the feed processor writes (timestamp = ltt * 1e6 ns, insertion_time = ltt ms).
+TICK_DATA_COLUMNS: List[Tuple[str, str]] = [
+    ('timestamp', 'ts_ns'), ('instrument_key', 'str'), ('feed_type', 'str'),
+    ('ltp', 'f8'), ('ltt', 'i8'), ('ltq', 'i8'), ('cp', 'f8'), ('oi', 'i8'),
+    ('atp', 'f8'), ('vtt', 'i8'), ('tbq', 'f8'), ('tsq', 'f8'),
+    ('delta', 'f8'), ('theta', 'f8'), ('gamma', 'f8'), ('vega', 'f8'), ('rho', 'f8'), ('iv', 'f8'),
+    ('bid_price_1', 'f8'), ('bid_qty_1', 'i8'), ('ask_price_1', 'f8'), ('ask_qty_1', 'i8'),
+    ('open', 'f8'), ('high', 'f8'), ('low', 'f8'), ('close', 'f8'),
+    ('insertion_time', 'ts_ms'), ('processed_time', 'ts_us'),
+]
+TICK_DATA_INDEX: Dict[str, int] = {name: i for i, (name, _) in enumerate(TICK_DATA_COLUMNS)}
+
+_EPOCH = datetime(1970, 1, 1)
+_UNIT_DELTA = {
+    'us': timedelta(microseconds=1),
+    'ms': timedelta(milliseconds=1),
+    's': timedelta(seconds=1),
+}
+
+
+def _to_epoch(value, unit: str) -> int:
+    """datetime/Timestamp -> epoch count in unit (naive wall-clock, as DuckDB TIMESTAMP stores it)."""
+    if isinstance(value, pd.Timestamp):
+        return int(value.tz_localize(None).as_unit(unit).value) if value.tzinfo else int(value.as_unit(unit).value)
+    if isinstance(value, datetime):
+        if value.tzinfo is not None:
+            value = value.replace(tzinfo=None)
+        if unit == 'ns':
+            return (value - _EPOCH) // _UNIT_DELTA['us'] * 1000
+        return (value - _EPOCH) // _UNIT_DELTA[unit]
+    return int(value)
+
+
+class TickColumnBuffer:
+    """
+    Fixed-capacity staging buffer for tick_data rows.
+
+        buf = TickColumnBuffer(capacity=1000)
+        buf.append(values)          # values in TICK_DATA_COLUMNS order, None = NULL
+        buf.append_row(row_dict)    # legacy dict rows, missing keys = NULL
+        if buf.full: conn.register('t', buf.to_arrow()) ...; buf.clear()
+
+    TIMESTAMP columns accept datetimes or integer epoch counts in the
+    column's unit (see TICK_DATA_COLUMNS).
+    """
+
+    def __init__(self, capacity: int = 1000, columns: List[Tuple[str, str]] = TICK_DATA_COLUMNS):
+        self.capacity = capacity
+        self.columns = columns
+        self.names = [name for name, _ in columns]
+        self.size = 0
+        self._slots: List = [None] * capacity
+        if pa is not None:
+            self._arrow_types = [self._arrow_type(kind) for _, kind in columns]
+
+    @staticmethod
+    def _arrow_type(kind: str):
+        if kind == 'str':
+            return pa.string()
+        if kind == 'f8':
+            return pa.float64()
+        if kind == 'i8':
+            return pa.int64()
+        return pa.timestamp(kind[3:])
+
+    def __len__(self):
+        return self.size
+
+    @property
+    def full(self) -> bool:
+        return self.size >= self.capacity
+
+    def append(self, values: Sequence):
+        """Appends one row given as a sequence in column order (None for NULL)."""
+        n = self.size
+        if n >= self.capacity:
+            raise OverflowError("TickColumnBuffer is full; flush before appending")
+        self._slots[n] = values
+        self.size = n + 1
+
+    def append_row(self, row: Dict):
+        """Appends one legacy dict row; unknown keys are ignored, missing ones are NULL."""
+        self.append(tuple([row.get(name) for name in self.names]))
+
+    def clear(self):
+        self.size = 0
+
+    def _columns(self):
+        if self.size == 0:
+            return [() for _ in self.columns]
+        return list(zip(*self._slots[:self.size]))
+
+    def to_arrow(self):
+        """Filled rows as a pyarrow RecordBatch."""
+        arrays = []
+        for (name, kind), atype, values in zip(self.columns, self._arrow_types, self._columns()):
+            try:
+                arrays.append(pa.array(values, type=atype))
+            except (pa.ArrowInvalid, pa.ArrowTypeError, TypeError):
+                if not kind.startswith('ts_'):
+                    raise
+                # Mixed datetimes and epoch ints in one column
+                unit = kind[3:]
+                arrays.append(pa.array([None if v is None else _to_epoch(v, unit) for v in values], type=atype))
+        return pa.RecordBatch.from_arrays(arrays, names=self.names)
+
+    def to_frame(self) -> pd.DataFrame:
+        """Filled rows as a typed DataFrame (used when pyarrow is unavailable)."""
+        frame = {}
+        for (name, kind), values in zip(self.columns, self._columns()):
+            if kind == 'str':
+                frame[name] = pd.array(values, dtype="string")
+            elif kind == 'f8':
+                frame[name] = pd.array(values, dtype="Float64")
+            elif kind == 'i8':
+                frame[name] = pd.array(values, dtype="Int64")
+            else:
+                unit = kind[3:]
+                epochs = [None if v is None else _to_epoch(v, unit) for v in values]
+                frame[name] = pd.to_datetime(pd.array(epochs, dtype="Int64"), unit=unit)
+        return pd.DataFrame(frame)
+
+    def to_relation_source(self):
+        """Whatever DuckDB can register for the filled rows: Arrow if available, else pandas."""
+        return self.to_arrow() if pa is not None else self.to_frame()